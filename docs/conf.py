@@ -69,3 +69,6 @@ autodoc_mock_imports = [
 autosummary_generate = True
 
 suppress_warnings = ["myst.header"]
+
+# Standard library types used in annotations, which can't be linked to without intersphinx.
+nitpick_ignore = [("py:class", "array.array")]
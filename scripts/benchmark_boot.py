@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Breaks down the cost of ``import europi``. The module's components are constructed lazily, so the
+import itself only loads the configuration and sets the CPU frequency. The script then constructs
+each component in turn, to show what an import used to cost when everything was built eagerly,
+and what a script pays for the components it actually uses.
+
+It can be run on the host from the root of the project directory, where the hardware is mocked:
+
+   $ python3 scripts/benchmark_boot.py
+
+or on a EuroPi:
+
+   $ mpremote run scripts/benchmark_boot.py
+
+The mocked I2C bus takes no time, so on the host the display looks almost free to construct. The
+host run therefore also estimates the time the display's I2C scan and initial frame take on the
+bus, which is most of what the lazy import saves on a EuroPi.
+"""
+import sys
+
+if sys.implementation.name == "micropython":
+    from utime import ticks_diff, ticks_us
+else:
+    import os
+    import time
+
+    sys.path.insert(0, os.path.abspath("software/firmware"))
+    sys.path.insert(0, os.path.abspath("software/tests/mocks"))
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def ticks_diff(a, b):
+        return a - b
+
+
+COMPONENTS = [
+    "din",
+    "ain",
+    "k1",
+    "k2",
+    "b1",
+    "b2",
+    "oled",
+    "cv1",
+    "cv2",
+    "cv3",
+    "cv4",
+    "cv5",
+    "cv6",
+    "usb_connected",
+]
+
+I2C_BITS_PER_BYTE = 9  # 8 data bits and an acknowledge
+
+
+def measure(label, func):
+    start = ticks_us()
+    func()
+    elapsed = ticks_diff(ticks_us(), start)
+    print(f"{label: <32} {elapsed / 1000: >8.2f} ms")
+    return elapsed
+
+
+def import_europi():
+    # Make sure the import isn't served from a module that is already loaded, e.g. by main.py.
+    sys.modules.pop("europi", None)
+    import europi  # noqa: F401
+
+
+def main():
+    lazy = measure("import europi (lazy)", import_europi)
+
+    import europi
+
+    print()
+    print("Work done by an eager import:")
+    measure("  load_europi_config()", europi.load_europi_config)
+    measure("  freq()", lambda: europi.freq(europi.europi_config["cpu_freq"]))
+    components = 0
+    for name in COMPONENTS:
+        components += measure(f"  construct {name}", getattr(europi, name).construct)
+    reset = measure("  reset_state()", europi.reset_state)
+
+    # The lazy import still loads the configuration and sets the frequency, so only the components
+    # and the reset are saved.
+    eager = lazy + components + reset
+    print()
+    print(f"{'eager import (estimated)': <32} {eager / 1000: >8.2f} ms")
+    print(f"{'lazy import': <32} {lazy / 1000: >8.2f} ms")
+    print(f"{'saved': <32} {(eager - lazy) / 1000: >8.2f} ms")
+
+    if sys.implementation.name != "micropython":
+        i2c = europi.oled.i2c
+        # the scan addresses 0x08 to 0x77, each a start, address, acknowledge and stop condition
+        bits = 112 * 11 + i2c.bytes_written * I2C_BITS_PER_BYTE
+        print(f"{'  + I2C bus time (estimated)': <32} {bits * 1000 / i2c.freq: >8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
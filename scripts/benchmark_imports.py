@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measures the time and memory it takes to import each of the firmware modules and contrib scripts.
+Run it on a EuroPi once with the ``.py`` sources deployed and once with the ``.mpy`` bytecode from
+``scripts/build_mpy.py`` to see what compiling ahead of time saves:
+
+   $ mpremote run scripts/benchmark_imports.py
+
+It can also be run on the host from the root of the project directory, where the hardware is
+mocked, though CPython's numbers say little about the pico's.
+"""
+import gc
+import sys
+
+# Modules are listed after the ones they import, so that each row mostly measures the module itself.
+MODULES = [
+    "europi",
+    "europi_script",
+    "configuration",
+    "ui",
+    "bootloader",
+    "experimental.knobs",
+    "contrib.consequencer",
+    "contrib.cvecorder",
+    "contrib.polyrhythmic_sequencer",
+    "contrib.quantizer",
+    "contrib.strange_attractor",
+    "contrib.turing_machine",
+]
+
+if sys.implementation.name == "micropython":
+    from utime import ticks_diff, ticks_us
+
+    mem_free = gc.mem_free
+else:
+    import os
+    import time
+
+    sys.path.insert(0, os.path.abspath("software/firmware"))
+    sys.path.insert(0, os.path.abspath("software"))
+    sys.path.insert(0, os.path.abspath("software/tests/mocks"))
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def ticks_diff(a, b):
+        return a - b
+
+    def mem_free():
+        return 0
+
+    # the contrib scripts use MicroPython's time functions
+    time.ticks_ms = time.ticks_us = time.ticks_add = time.ticks_diff = lambda *args: 0
+    time.sleep_ms = lambda ms: None
+
+
+def main():
+    print(f"{'module': <32} {'time': >10} {'memory': >10}")
+    total_us = 0
+    for module in MODULES:
+        gc.collect()
+        before = mem_free()
+        start = ticks_us()
+        __import__(module)
+        elapsed = ticks_diff(ticks_us(), start)
+        gc.collect()
+        used = before - mem_free()
+        total_us += elapsed
+        print(f"{module: <32} {elapsed / 1000: >7.2f} ms {used / 1024: >8.2f}k")
+    print(f"{'total': <32} {total_us / 1000: >7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
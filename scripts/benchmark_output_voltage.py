@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Compares the cost of setting an output with ``Output.voltage()`` against the lookup table based
+``Output.voltage_mv()``. It can be run on the host from the root of the project directory, where
+the hardware is mocked:
+
+   $ python3 scripts/benchmark_output_voltage.py
+
+or on a EuroPi, where it measures the real register writes:
+
+   $ mpremote run scripts/benchmark_output_voltage.py
+"""
+import sys
+
+ITERATIONS = 10000
+
+if sys.implementation.name == "micropython":
+    from utime import ticks_diff, ticks_us
+else:
+    import os
+    import time
+
+    sys.path.insert(0, os.path.abspath("software/firmware"))
+    sys.path.insert(0, os.path.abspath("software/tests/mocks"))
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def ticks_diff(a, b):
+        return a - b
+
+
+def measure(label, func, values):
+    start = ticks_us()
+    for value in values:
+        func(value)
+    elapsed = ticks_diff(ticks_us(), start)
+    print(f"{label: <28} {elapsed / len(values): >8.2f} us/call")
+    return elapsed
+
+
+def main():
+    from europi import cv1
+
+    millivolts = [(i * 7) % 10001 for i in range(ITERATIONS)]
+    volts = [mv / 1000 for mv in millivolts]
+
+    cv1.voltage_mv(0)  # build the lookup table outside of the measurement
+
+    slow = measure("Output.voltage(volts)", cv1.voltage, volts)
+    fast = measure("Output.voltage_mv(millivolts)", cv1.voltage_mv, millivolts)
+    print(f"speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Measures how much drawing the display delays a main loop that updates an output every millisecond.
+The loop runs twice: first drawing a frame itself every 50ms, then publishing its state to an
+``experimental.dual_core.RenderThread`` that draws the same frames on the second core. For each
+run, the script prints how late the loop's iterations started.
+
+It can be run on the host from the root of the project directory, where the hardware is mocked:
+
+   $ python3 scripts/benchmark_render_jitter.py
+
+or on a EuroPi:
+
+   $ mpremote run scripts/benchmark_render_jitter.py
+
+On the host the render thread is a CPython thread, which has to take turns with the main loop, and
+the mocked I2C bus takes no time, so the comparison is only meaningful on a EuroPi.
+"""
+import sys
+
+if sys.implementation.name == "micropython":
+    from utime import ticks_add, ticks_diff, ticks_us
+else:
+    import os
+    import time
+
+    sys.path.insert(0, os.path.abspath("software/firmware"))
+    sys.path.insert(0, os.path.abspath("software/tests/mocks"))
+
+    # let the threads take turns often, as two cores would run them at the same time
+    sys.setswitchinterval(0.0002)
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def ticks_add(a, b):
+        return a + b
+
+    def ticks_diff(a, b):
+        return a - b
+
+
+from europi import cv1, oled
+from experimental.dual_core import RenderThread
+
+PERIOD_US = 1000
+FRAME_EVERY = 50  # iterations
+ITERATIONS = 3000
+
+
+def draw(state):
+    oled.fill(0)
+    oled.rect(0, 0, oled.width, oled.height, 1)
+    oled.text(f"step {state[0]}", 4, 4, 1)
+    oled.text(f"cv {state[1]}mV", 4, 14, 1)
+    oled.fill_rect(80, 4, state[0] % 40, 20, 1)
+    oled.show()
+
+
+def run(renderer):
+    """Run the loop, drawing every FRAME_EVERY iterations, and return how late each iteration
+    started, in microseconds."""
+    lateness = []
+    state = [0, 0]
+    deadline = ticks_add(ticks_us(), PERIOD_US)
+    for step in range(ITERATIONS):
+        while ticks_diff(deadline, ticks_us()) > 0:
+            pass
+        lateness.append(ticks_diff(ticks_us(), deadline))
+        deadline = ticks_add(deadline, PERIOD_US)
+
+        millivolts = (step * 10) % 10000
+        cv1.voltage_mv(millivolts)
+        if step % FRAME_EVERY == 0:
+            if renderer:
+                renderer.state[0] = step
+                renderer.state[1] = millivolts
+                renderer.publish()
+            else:
+                state[0] = step
+                state[1] = millivolts
+                draw(state)
+    return lateness
+
+
+def report(label, lateness):
+    lateness = sorted(lateness)
+    mean = sum(lateness) // len(lateness)
+    p99 = lateness[len(lateness) * 99 // 100]
+    print(f"{label: <24} mean {mean: >6}us  p99 {p99: >6}us  max {lateness[-1]: >6}us")
+
+
+if __name__ == "__main__":
+    oled.construct()
+    report("drawing in the loop", run(None))
+
+    renderer = RenderThread(draw, lambda: [0, 0], frame_ms=0)
+    renderer.start()
+    report("drawing on core 1", run(renderer))
+    renderer.stop()
+    print(f"{renderer.frames} frames drawn on core 1")
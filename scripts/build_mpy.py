@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Cross-compiles the firmware, experimental and contrib modules to MicroPython bytecode (``.mpy``),
+so that the pico doesn't have to compile them every time they are imported. Execute it from the
+root of the project directory:
+
+   $ python3 scripts/build_mpy.py
+
+The compiled modules are written to ``build/mpy/lib``, laid out as they are on the pico, along with
+an rshell script that uploads them. ``make deploy_firmware_mpy`` does both. The script prints the
+size of each module's source and bytecode.
+
+The version of ``mpy-cross`` must match the version of MicroPython on the pico, e.g.
+``pip install mpy-cross==1.19.1`` for the v1.19.1 firmware. To see the difference in import time
+and memory, run ``scripts/benchmark_imports.py`` on the pico before and after deploying.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+BUILD_DIR = "build/mpy"
+
+# source directory, directory on the pico
+SOURCES = [
+    ("software/firmware", "lib"),
+    ("software/firmware/experimental", "lib/experimental"),
+    ("software/contrib", "lib/contrib"),
+]
+
+# packaging scripts, not modules
+EXCLUDED = {"setup.py"}
+
+# The RP2040's Cortex-M0+ core, which allows mpy-cross to emit native code for @micropython.native
+MPY_CROSS_ARGS = ["-march=armv6m"]
+
+DEPLOY_SCRIPT = "deploy_firmware.rshell"
+
+
+def find_mpy_cross(path=None):
+    if path:
+        return path
+    try:
+        import mpy_cross
+
+        return mpy_cross.mpy_cross
+    except ImportError:
+        pass
+    path = shutil.which("mpy-cross")
+    if not path:
+        sys.exit("mpy-cross not found, install it with 'pip install mpy-cross' or pass --mpy-cross")
+    return path
+
+
+def find_modules():
+    """Yield the source path, the directory on the pico and the file name of each module."""
+    for source_dir, pico_dir in SOURCES:
+        for name in sorted(os.listdir(source_dir)):
+            if name.endswith(".py") and name not in EXCLUDED:
+                yield os.path.join(source_dir, name), pico_dir, name
+
+
+def pico_path(pico_dir, name):
+    """The module's path relative to the pico's /lib, e.g. ``contrib/coin_toss.py``."""
+    return f"{pico_dir[4:]}/{name}".lstrip("/")
+
+
+def compile_module(mpy_cross, source, pico_dir, name, build_dir):
+    target_dir = os.path.join(build_dir, pico_dir)
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, name[:-3] + ".mpy")
+    subprocess.run(
+        # -s sets the file name shown in tracebacks
+        [mpy_cross, *MPY_CROSS_ARGS, "-s", pico_path(pico_dir, name), "-o", target, source],
+        check=True,
+    )
+    return target
+
+
+def write_deploy_script(build_dir, modules):
+    lines = [f"mkdir /pyboard/{pico_dir}" for _, pico_dir in SOURCES[1:]]
+    # MicroPython imports a .py file in preference to a .mpy one, so remove the sources
+    lines += [f"rm -f /pyboard/{pico_dir}/{name}" for _, pico_dir, name in modules]
+    lines += [f"cp {build_dir}/{pico_dir}/*.mpy /pyboard/{pico_dir}" for _, pico_dir in SOURCES]
+    # the manifest refers to the .py files, the bootloader rebuilds it
+    lines.append("rm -f /pyboard/menu_manifest.json")
+    lines.append("repl ~ import machine ~ machine.soft_reset()~")
+
+    path = os.path.join(build_dir, DEPLOY_SCRIPT)
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--mpy-cross", help="path to the mpy-cross executable")
+    parser.add_argument("--build-dir", default=BUILD_DIR)
+    args = parser.parse_args()
+
+    mpy_cross = find_mpy_cross(args.mpy_cross)
+    shutil.rmtree(args.build_dir, ignore_errors=True)
+
+    modules = list(find_modules())
+    total_py = total_mpy = 0
+    print(f"{'module': <40} {'.py': >8} {'.mpy': >8} {'saved': >6}")
+    for source, pico_dir, name in modules:
+        target = compile_module(mpy_cross, source, pico_dir, name, args.build_dir)
+        py_size = os.path.getsize(source)
+        mpy_size = os.path.getsize(target)
+        total_py += py_size
+        total_mpy += mpy_size
+        print(
+            f"{pico_path(pico_dir, name): <40} {py_size: >8} {mpy_size: >8} {1 - mpy_size / py_size: >6.0%}"
+        )
+    print(f"{'total': <40} {total_py: >8} {total_mpy: >8} {1 - total_mpy / total_py: >6.0%}")
+
+    print(f"\nWrote {len(modules)} modules and {write_deploy_script(args.build_dir, modules)}")
+
+
+if __name__ == "__main__":
+    main()
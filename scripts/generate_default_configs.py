@@ -7,7 +7,13 @@ configuration feature. Simply execute this script from the root of the project d
 
 The config files will be generated in the a `config` directory. The files can be edited and then
 loaded onto the pico in a `config` directory in the root of the pico's file system.
+
+With `--store`, the configs are generated in a single consolidated file, `config/configs.json`,
+which the EuroPi reads once rather than opening a file for each script.
+
+   $ python3 scripts/generate_default_configs.py --store
 """
+import argparse
 import os
 import sys
 import importlib
@@ -42,12 +48,16 @@ def find_europi_scripts():
                         yield klass
 
 
-def generate_default_config(europi_script):
+def generate_default_config(europi_script, store=None):
     spec = ConfigSpec(europi_script.config_points())
 
     if spec:  # don't bother generating empty config files
-        print(f"Generating: {ConfigFile.config_filename(europi_script)}")
-        ConfigFile.save_config(europi_script, spec.default_config())
+        if store is None:
+            print(f"Generating: {ConfigFile.config_filename(europi_script)}")
+            ConfigFile.save_config(europi_script, spec.default_config())
+        else:
+            print(f"Adding: {europi_script.__qualname__}")
+            store[europi_script] = spec.default_config()
 
 
 def mock_time_functions():
@@ -66,6 +76,12 @@ def mock_time_functions():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate default config files.")
+    parser.add_argument(
+        "--store", action="store_true", help="generate a single consolidated config store"
+    )
+    args = parser.parse_args()
+
     sys.path.insert(0, os.path.abspath("software/firmware"))
     sys.path.insert(0, os.path.abspath("software"))
     sys.path.insert(0, os.path.abspath("software/tests/mocks"))
@@ -84,7 +100,12 @@ Edit and upload to /config on the pico to change a script's configuration.
 """
     )
 
-    generate_default_config(EuroPiConfig)
+    store = {} if args.store else None
+    generate_default_config(EuroPiConfig, store)
 
     for script in find_europi_scripts():
-        generate_default_config(script)
+        generate_default_config(script, store)
+
+    if store is not None:
+        print(f"Generating: {importlib.import_module('configuration').CONFIG_STORE_FILENAME}")
+        ConfigFile.save_config_store(store)
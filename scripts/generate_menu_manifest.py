@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+This script generates the bootloader's menu manifest, so that the menu can be shown without
+importing every script the first time the EuroPi boots. Execute it from the root of the project
+directory:
+
+   $ python3 scripts/generate_menu_manifest.py
+
+The manifest is written to ``menu_manifest.json``, which ``make deploy_firmware`` copies to the
+root of the pico's file system. Files copied to the pico get a new mtime, so the manifest only
+records their sizes. If it doesn't match the files on the pico, the bootloader rebuilds it.
+"""
+import importlib
+import json
+import os
+import sys
+
+MANIFEST_FILE = "menu_manifest.json"
+
+
+def mock_time_functions():
+    # a file in the mock package doesn't work for the `time` package, so we will have to monkey
+    # patch the missing functions to make the imports in contrib scripts succeed
+
+    import time
+
+    def noop(*args):
+        return 0
+
+    time.sleep_ms = noop
+    time.ticks_ms = noop
+    time.ticks_us = noop
+    time.ticks_add = noop
+    time.ticks_diff = noop
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath("software/firmware"))
+    sys.path.insert(0, os.path.abspath("software"))
+    sys.path.insert(0, os.path.abspath("software/tests/mocks"))
+
+    mock_time_functions()
+
+    bootloader = importlib.import_module("bootloader")
+    scripts = importlib.import_module("contrib.menu").EUROPI_SCRIPTS
+
+    classes = bootloader.BootloaderMenu.load_script_classes(scripts).values()
+    items = [
+        (name, f"{clazz.__module__}.{clazz.__name__}")
+        for name, clazz in bootloader.BootloaderMenu._build_scripts_mapping(classes).items()
+    ]
+    manifest = bootloader.build_menu_manifest(
+        scripts,
+        items,
+        lib_dirs=[os.path.abspath("software/firmware"), os.path.abspath("software")],
+        with_mtime=False,
+    )
+
+    with open(MANIFEST_FILE, "w") as file:
+        json.dump(manifest, file)
+    print(f"Wrote {len(items)} menu items to {MANIFEST_FILE}")
@@ -2,6 +2,8 @@ from europi import *
 from time import ticks_diff, ticks_ms, sleep_ms
 from random import randint, uniform
 from europi_script import EuroPiScript
+from state_journal import ArrayJournal
+from array import array
 import machine
 import json
 import gc
@@ -54,7 +56,6 @@ class CVecorder(EuroPiScript):
         self.resetTimeout = 1000
         self.debug = False
         self.CvIn = 0
-        self.bankToSave = 0
         self.initTest = False
         self.debugLogging = False
         self.errorString = ' '
@@ -93,8 +94,8 @@ class CVecorder(EuroPiScript):
                 for i in range(0, self.stepLength-1):
                     self.CVR[self.ActiveBank][self.ActiveCvr][i] = uniform(0.0, 9.99)
                     #print(f"[{self.ActiveBank}][{self.ActiveCvr}][{i}] = {self.CVR[self.ActiveBank][self.ActiveCvr][i]}")
-                self.bankToSave = self.ActiveBank
-                self.saveState()
+                self.journals[self.ActiveBank].mark_range(self.ActiveCvr * self.stepLength, (self.ActiveCvr + 1) * self.stepLength)
+                self.save_state()
                 self.loadState()
 
         @din.handler
@@ -112,7 +113,8 @@ class CVecorder(EuroPiScript):
             self.CvRecording[self.ActiveCvr] = 'pending'
             # Clear the array
             for n in range (0, self.stepLength):
-                self.CVR[self.ActiveBank][self.ActiveCvr][n] = 0
+                self.CVR[self.ActiveBank][self.ActiveCvr][n] = 0.0
+            self.journals[self.ActiveBank].mark_range(self.ActiveCvr * self.stepLength, (self.ActiveCvr + 1) * self.stepLength)
 
         # # B2 Long press
         # @b2.handler_falling
@@ -180,6 +182,7 @@ class CVecorder(EuroPiScript):
             # If recording, write the sampled value to the CVR list and play the voltage
             if self.CvRecording[i] == 'true':
                 self.CVR[self.ActiveBank][self.ActiveCvr][self.step] = self.CvIn
+                self.journals[self.ActiveBank].mark(self.ActiveCvr * self.stepLength + self.step)
                 cvs[self.ActiveCvr].voltage(self.CvIn)
             else:
                 cvs[i].voltage(self.CVR[self.ActiveBank][i][self.step])
@@ -188,14 +191,13 @@ class CVecorder(EuroPiScript):
         if self.step < self.stepLength - 1:
             self.step += 1
         else:
-            # Reset step to zero , stop recording and save recording to local storage
+            # Reset step to zero and stop recording. The recording is saved to local storage by the main loop
             self.step = 0
             if self.CvRecording[self.ActiveCvr] == 'true':
                 self.CvRecording[self.ActiveCvr] = 'false'
-                self.bankToSave = self.ActiveBank
-                self.saveState()
+                self.saveRequested = True
                 if self.debugLogging:
-                    self.writeToDebugLog(f"[handleClock] Calling saveState() for bank {self.bankToSave}.")
+                    self.writeToDebugLog(f"[handleClock] Requesting a save for bank {self.ActiveBank}.")
 
 
     def clearCvrs(self, bank):
@@ -208,154 +210,83 @@ class CVecorder(EuroPiScript):
             # Set all CV values to zero
             for i in range(self.numCVR+1):
                 for n in range (0, self.stepLength):
-                    self.CVR[b][i][n] = 0
-            # Save the cleared bank to local storage
-            self.bankToSave = b
-            self.saveState()
-            if self.debugLogging:
-                self.writeToDebugLog(f"[clearCvrs] Calling saveState() for bank {self.bankToSave}.")
-
-    # Currently not used, but keeping in this script for future use
-    def initCvrs(self):
-        for b in range(self.numCVRBanks+1): 
-            self.CVR.append([])
-            for i in range(self.numCVR+1):
-                self.CVR[b].append([])
-                self.CvRecording.append('false')
-                for n in range (0, self.stepLength):
-                    self.CVR[b][i].append(0)
-
-    def saveState(self):
-        # generate output filename
-        outputFile = f"saved_state_{self.__class__.__qualname__}_{self.bankToSave}.txt"
-
-        # Convert each value to an int by multiplying by 100. This saves on storage and memory a little
-        for i in range(len(self.CVR[self.bankToSave])):
-            self.CVR[self.bankToSave][i] = [int(x * 100) for x in self.CVR[self.bankToSave][i]]
-
-        if self.initTest:
-            print('Saving state for bank: ' + str(self.bankToSave))
-
-        # Trigger garbage collection to minimize memory use
-        gc.collect()
-
-        # Show free memory if running a debug test
-        if self.initTest:
-            print(self.free())
-
-        # Write the value to a the state file
-        maxRetries = 6
-        attempts = 0
-        while attempts < maxRetries:
-            try:
-                attempts += 1
-                # Create json object of current CV bank
-                jsonState = json.dumps(self.CVR[self.bankToSave])
-
-                if self.debugLogging:
-                    self.writeToDebugLog(f"[saveState] Saving state for bank: {str(self.bankToSave)}. Size: {len(jsonState)}")
+                    self.CVR[b][i][n] = 0.0
+            self.journals[b].mark_range(0, len(self.banks[b]))
+        # Save the cleared banks to local storage
+        self.save_state()
+        if self.debugLogging:
+            self.writeToDebugLog(f"[clearCvrs] Saved cleared bank(s) {bank}.")
 
-                with open(outputFile, 'w') as file:
-                    # Attempt write data to state on disk, then break from while loop if the return (num bytes written) > 0
-                    if file.write(jsonState) > 0:
-                        #self.errorString = ' '
-                        if self.debugLogging:
-                            self.writeToDebugLog(f"[saveState] Bank {str(self.bankToSave)} saved OK")
-                        break
-            except MemoryError as e:
-                self.errorString = 'w'
+    def save_state(self):
+        # Append the steps changed since the last save to each bank's journal, and rewrite the
+        # journals that have grown as large as the bank itself. Saves only cost the changed steps.
+        for b in range(self.numCVRBanks+1):
+            journal = self.journals[b]
+            if journal.dirty:
                 if self.initTest:
-                    print(f'[{attempts}] Error: Memory allocation failed, retrying: {e}')
+                    print('Saving state for bank: ' + str(b))
+                saved = journal.flush()
                 if self.debugLogging:
-                    self.writeToDebugLog(f"[saveState] Error: Memory allocation failed, retrying: {e}")
-                    print(micropython.mem_info("level"))
-                else:
-                    pass
-
-        # Convert from int back to float
-        i=0
-        for channel in self.CVR[self.bankToSave]:
-            self.CVR[self.bankToSave][i] = [x / 100 for x in self.CVR[self.bankToSave][i]]
-            i += 1
+                    self.writeToDebugLog(f"[save_state] Saved {saved} steps for bank: {str(b)}")
+            if journal.needs_compaction:
+                journal.compact()
+                if self.debugLogging:
+                    self.writeToDebugLog(f"[save_state] Compacted the journal of bank: {str(b)}")
 
     def loadState(self):
 
-        # For each bank, check if a state file exists, then load it
-        # If not, initialize the bank with zeros then save it
-
-        # Potential issue......
-        # If for some reason the file open command fails, it will init each bank and wipe any previous recordings
-        # Added retries and debug code to try and capture the error if this does occur
+        # For each bank, load its last snapshot and replay its journal of changed steps over it.
+        # Banks saved as JSON by earlier versions are converted, and new banks start with zeros.
 
+        # Each bank is one array of all its channels' steps, so that it can be saved without conversion.
+        # self.CVR[bank][channel] is a view of a channel's steps in its bank's array
+        self.banks = []
+        self.journals = []
         self.CVR = []  # CV recorder channels
         self.CvRecording = []  # CV recorder flags
+        self.saveRequested = False
 
         # init cvRecording list
         for i in range(self.numCVR+1):
             self.CvRecording.append('false')
 
         for b in range(self.numCVRBanks+1):
-            # Create a new array for the bank
-            self.CVR.append([])
-
-            # Check if a state file exists
-            fileName = f"saved_state_{self.__class__.__qualname__}_{b}.txt"
+            bank = array('f', bytearray(4 * (self.numCVR+1) * self.stepLength))
+            self.banks.append(bank)
+            self.CVR.append([memoryview(bank)[i * self.stepLength:(i + 1) * self.stepLength] for i in range(self.numCVR+1)])
+            journal = ArrayJournal(f"saved_state_{self.__class__.__qualname__}_{b}", bank, 'f')
+            self.journals.append(journal)
 
-            # Write the value to a the state file
-            maxRetries = 2
-            attempts = 0
-            while attempts < maxRetries:
-
-                try:
-                    # save state exists for this bank, load it
-                    with open(fileName, 'r') as file:
-
-                        # read state from file into json object
-                        jsonData = file.read()
-
-                        if self.initTest:
-                            print(f"Loading previous state for bank: {str(b)}. Size: {len(jsonData)}")
-
-                        self.showLoadingScreen(str(b))
-                        if self.debugLogging:
-                            self.writeToDebugLog(f"[loadState] [{attempts}] Loading previous state for bank: {str(b)}. Size: {len(jsonData)}")
-
-                        # populate CV recording channel with saved json data
-                        self.CVR[b] = json.loads(jsonData)
+            try:
+                if journal.load():
+                    if self.debugLogging:
+                        self.writeToDebugLog(f"[loadState] Loaded bank {b} with {journal.journal_entries} journal entries.")
+                else:
+                    self.loadJsonBank(b)
+            except Exception as e:
+                self.errorString = 'x'
+                if self.debugLogging:
+                    self.writeToDebugLog(f"[loadState] Exception when attempting to load the state of bank {b}. {e}")
 
-                        # convert values in the list from int back to float
-                        i=0
-                        for channel in self.CVR[b]:
-                            self.CVR[b][i] = [x / 100 if x > 0 else 0 for x in self.CVR[b][i]]
-                            i += 1
-                        
-                        # read OK, break from while loop
-                        break
+    def loadJsonBank(self, b):
+        # Convert a bank saved as JSON, in hundredths of a volt, by an earlier version of this script
+        fileName = f"saved_state_{self.__class__.__qualname__}_{b}.txt"
+        try:
+            with open(fileName, 'r') as file:
+                self.showLoadingScreen(str(b))
+                # parse straight from the file, rather than reading it into a string first
+                channels = json.load(file)
+        except (OSError, ValueError):
+            return
 
-                except OSError as e:
-                    self.errorString = 'r'
-                    if self.debugLogging:
-                        self.writeToDebugLog(f"[loadState] [{attempts}] No state file found for bank {b}. Error: {e}")
-                    # No state file exists, initialize the array with zeros
-                    if self.initTest:
-                        print('Initializing bank: ' + str(b))
-
-                    for i in range(self.numCVR+1):
-                        self.CVR[b].append([])
-                        for n in range (0, self.stepLength):
-                            self.CVR[b][i].append(0)
-                    # Save the state file for faster loading on next boot
-                    self.bankToSave = b
-                    self.saveState()
-
-                except Exception as e:
-                    self.errorString = 'x'
-                    if self.debugLogging:
-                        self.writeToDebugLog(f"[loadState] [{attempts}] Exception when attempting to open previous state file for bank {b}. {e}")
+        if self.initTest:
+            print(f"Converting previous state for bank: {str(b)}.")
 
-                # Sleep and increment attempt counter
-                sleep_ms(50)
-                attempts += 1
+        for i, channel in enumerate(channels[:self.numCVR+1]):
+            for n, x in enumerate(channel[:self.stepLength]):
+                self.CVR[b][i][n] = x / 100 if x > 0 else 0.0
+        self.journals[b].compact()
+        os.remove(fileName)
 
     # Currently not used, but keeping in this script for future use
     def debugDumpCvr(self):
@@ -377,6 +308,11 @@ class CVecorder(EuroPiScript):
             self.getCvBank()
             self.updateScreen()
 
+            # Save the steps recorded since the last pass ended
+            if self.saveRequested:
+                self.saveRequested = False
+                self.save_state()
+
             # If I have been running, then stopped for longer than reset_timeout, reset the steps and clock_step to 0
             if self.clockStep != 0 and ticks_diff(ticks_ms(), din.last_triggered()) > self.resetTimeout:
                 if self.CvRecording[self.ActiveCvr] != 'true':
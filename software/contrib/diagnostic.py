@@ -7,16 +7,11 @@ from europi import (
     ain,
     b1,
     b2,
-    cv1,
-    cv2,
-    cv3,
-    cv4,
-    cv5,
-    cv6,
     din,
     k1,
     k2,
     oled,
+    set_outputs,
 )
 from europi_script import EuroPiScript
 import configuration
@@ -75,12 +70,7 @@ class Diagnostic(EuroPiScript):
 
         while True:
             # Set the outputs to useful values
-            cv1.voltage(self.voltages[0])
-            cv2.voltage(self.voltages[1])
-            cv3.voltage(self.voltages[2])
-            cv4.voltage(self.voltages[3])
-            cv5.voltage(self.voltages[4])
-            cv6.voltage(self.voltages[5])
+            set_outputs(self.voltages)
 
             oled.fill(0)
 
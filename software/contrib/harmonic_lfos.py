@@ -55,7 +55,7 @@ class HarmonicLFOs(EuroPiScript):
     def change_mode(self):
         """Change the mode that controls wave shape"""
         self.modes[self.selected_lfo] = (self.modes[self.selected_lfo] + 1) % self.MODES_COUNT
-        self.save_state()
+        self.mark_state_dirty()
 
     def get_delay_increment_value(self):
         """Calculate the wait time between degrees"""
@@ -69,9 +69,6 @@ class HarmonicLFOs(EuroPiScript):
 
     def save_state(self):
         """Save the current set of divisions to file"""
-        if self.last_saved() < 5000:
-            return
-        
         self.save_state_json({
             "divisions": self.divisions,
             "modes": self.modes,
@@ -235,7 +232,7 @@ class HarmonicLFOs(EuroPiScript):
 
         if self.clock_division != self.selected_lfo_start_value:
             self.selected_lfo_start_value = self.divisions[self.selected_lfo] = self.clock_division
-            self.save_state()
+            self.mark_state_dirty()
 
     def main(self):
         while True:
@@ -247,6 +244,8 @@ class HarmonicLFOs(EuroPiScript):
             
             self.update_display()
             
+            self.flush_state()
+            
             self.increment()
 
 
@@ -4,6 +4,8 @@ from europi_script import EuroPiScript
 
 
 class HelloWorld(EuroPiScript):
+    SUPPORTS_SOFT_EXIT = True
+
     def __init__(self):
         super().__init__()
         state = self.load_state_json()
@@ -21,18 +23,14 @@ class HelloWorld(EuroPiScript):
     def increment_counter(self):
         if self.enabled:
             self.counter += 1
-            self.save_state()
+            self.mark_state_dirty()
 
     def toggle_enablement(self):
             self.enabled = not self.enabled
-            self.save_state()
+            self.mark_state_dirty()
 
     def save_state(self):
         """Save the current state variables as JSON."""
-        # Don't save if it has been less than 5 seconds since last save.
-        if self.last_saved() < 5000:
-            return
-
         state = {
             "counter": self.counter,
             "enabled": self.enabled,
@@ -40,9 +38,10 @@ class HelloWorld(EuroPiScript):
         self.save_state_json(state)
 
     def main(self):
-        while True:
+        while not self.exit_requested:
             oled.centre_text(f"Hello world\n{self.counter}")
-            sleep(1)
+            self.flush_state()
+            sleep(0.1)
 
 if __name__ == "__main__":
     HelloWorld().main()
@@ -126,7 +126,7 @@ class KeyboardScreen:
         
     def on_button1(self):
         self.quantizer.scale[self.highlight_note] = not self.quantizer.scale[self.highlight_note]
-        self.quantizer.save()
+        self.quantizer.mark_state_dirty()
 
 class MenuScreen:
     """Advanced menu options screen
@@ -173,7 +173,7 @@ class ModeChooser:
     def on_button1(self):
         new_mode = self.read_mode()
         self.quantizer.mode = new_mode
-        self.quantizer.save()
+        self.quantizer.mark_state_dirty()
         
     def draw(self):
         oled.fill(0)
@@ -214,7 +214,7 @@ class RootChooser:
     def on_button1(self):
         new_root = self.read_root()
         self.quantizer.root = new_root
-        self.quantizer.save()
+        self.quantizer.mark_state_dirty()
         
     def draw(self):
         oled.fill(0)
@@ -243,7 +243,7 @@ class OctaveChooser:
     def on_button1(self):
         new_octave = self.read_octave()
         self.quantizer.octave = new_octave
-        self.quantizer.save()
+        self.quantizer.mark_state_dirty()
         
     def draw(self):
         oled.fill(0)
@@ -305,7 +305,7 @@ class IntervalChooser:
     def on_button1(self):
         new_interval = self.read_interval()
         self.quantizer.intervals[self.n-2] = new_interval
-        self.quantizer.save()
+        self.quantizer.mark_state_dirty()
         
     def draw(self):
         oled.fill(0)
@@ -480,7 +480,7 @@ class QuantizerScript(EuroPiScript):
         self.intervals = state.get("intervals", self.intervals)
         self.mode = state.get("mode", self.mode)
     
-    def save(self):
+    def save_state(self):
         """Save the current settings to persistent storage
         """
         state = {
@@ -577,6 +577,9 @@ class QuantizerScript(EuroPiScript):
                 time.sleep(CYCLE_RATE)
             
             self.active_screen.draw()
+            
+            # Save any changed settings once the user stops changing them
+            self.flush_state()
     
 if __name__ == "__main__":
     QuantizerScript().main()
@@ -1,4 +1,6 @@
 import gc
+import json
+import sys
 import time
 from collections import OrderedDict
 
@@ -11,7 +13,9 @@ from europi import (
     OLED_WIDTH,
     oled,
 )
-from europi_script import EuroPiScript
+from europi_script import EuroPiScript, unload_module
+from file_utils import delete_file, file_signature, load_json_file
+from version import __version__
 
 from ui import Menu
 
@@ -19,6 +23,67 @@ SCRIPT_DIR = "/lib/contrib/"
 REG_FILE_CODE = 0x8000
 DEBUG = False
 
+# The menu manifest caches the display name of each script so that the menu doesn't have to import
+# them all. It records the size and mtime of each script's file, and of version.py, and is rebuilt
+# when any of them change.
+MENU_MANIFEST_FILE = "menu_manifest.json"
+MENU_MANIFEST_FORMAT = 1
+LIB_DIRS = ["/lib"]
+
+
+def module_file(module, lib_dirs=None):
+    """Return the path of the given module's file relative to its lib directory, e.g.
+    ``contrib/coin_toss.py``, and the full path to it. Returns ``None, None`` if it can't be
+    found."""
+    name = module.replace(".", "/")
+    for lib_dir in lib_dirs or LIB_DIRS:
+        for extension in (".py", ".mpy"):
+            path = f"{lib_dir}/{name}{extension}"
+            if file_signature(path):
+                return name + extension, path
+    return None, None
+
+
+def build_menu_manifest(scripts, items, lib_dirs=None, with_mtime=True):
+    """Build the manifest for the given qualified class names and their ``(display name,
+    qualified class name)`` menu items.
+
+    A manifest built without mtimes, e.g. on a computer before the files are copied to the EuroPi,
+    is only checked against file sizes.
+    """
+    files = {}
+    for module in ["version"] + [script.rsplit(".", 1)[0] for script in scripts]:
+        name, path = module_file(module, lib_dirs)
+        if name:
+            files[name] = file_signature(path, with_mtime)
+    return {
+        "format": MENU_MANIFEST_FORMAT,
+        "version": __version__,
+        "scripts": list(scripts),
+        "items": [list(item) for item in items],
+        "files": files,
+    }
+
+
+def menu_manifest_is_valid(manifest, scripts, lib_dirs=None):
+    """Return True if the manifest was built for these scripts, this version and the files as
+    they are now."""
+    if (
+        manifest.get("format") != MENU_MANIFEST_FORMAT
+        or manifest.get("version") != __version__
+        or manifest.get("scripts") != list(scripts)
+    ):
+        return False
+    for name, signature in manifest.get("files", {}).items():
+        module = name.rsplit(".", 1)[0].replace("/", ".")
+        current_name, path = module_file(module, lib_dirs)
+        if current_name != name:
+            return False
+        current = file_signature(path, signature[1] is not None)
+        if current != signature:
+            return False
+    return True
+
 
 class PrintMemoryUse:
     def __init__(self, label=""):
@@ -55,12 +120,16 @@ class BootloaderMenu(EuroPiScript):
 
     * Hold both buttons for at least 0.5s and release to return to the menu.
 
+    Scripts that set ``SUPPORTS_SOFT_EXIT`` are started and stopped without resetting the EuroPi,
+    see :class:`EuroPiScript`. The module is reset when switching to or from any other script.
+
     :param scripts: a list of qualified class names of Classes implementing EuroPiScript to be included in the menu
     """
 
     def __init__(self, scripts):
         self.scripts = scripts
         self.run_request = None
+        self.running_script = None
 
     @staticmethod
     def show_progress(percentage):
@@ -89,6 +158,39 @@ class BootloaderMenu(EuroPiScript):
             cls.show_progress(i / len(scripts))
         return classes
 
+    def load_menu_items(self) -> "OrderedDict(str, str)":
+        """Return a mapping of display name to qualified class name for the scripts in the menu.
+
+        The items come from the menu manifest when it is up to date. Otherwise every script is
+        imported to find its display name, and the manifest is rewritten.
+        """
+        manifest = load_json_file(MENU_MANIFEST_FILE)
+        if not menu_manifest_is_valid(manifest, self.scripts):
+            # the scripts are only imported for their display names, so they are unloaded again
+            loaded_modules = set(sys.modules)
+            script_classes = self.load_script_classes(self.scripts)
+            items = [
+                (name, f"{clazz.__module__}.{clazz.__name__}")
+                for name, clazz in BootloaderMenu._build_scripts_mapping(
+                    script_classes.values()
+                ).items()
+            ]
+            script_classes = None
+            for name in set(sys.modules) - loaded_modules:
+                unload_module(name)
+            gc.collect()
+            manifest = build_menu_manifest(self.scripts, items)
+            self.save_menu_manifest(manifest)
+        return OrderedDict(manifest["items"])
+
+    @staticmethod
+    def save_menu_manifest(manifest):
+        try:
+            with open(MENU_MANIFEST_FILE, "w") as file:
+                json.dump(manifest, file)
+        except OSError as e:
+            print(f"Warning: Unable to save the menu manifest\n  caused by: {e}")
+
     @classmethod
     def _is_europi_script(cls, c):
         return issubclass(c, EuroPiScript)
@@ -103,45 +205,84 @@ class BootloaderMenu(EuroPiScript):
         self.run_request = selected_item
 
     def exit_to_menu(self):
+        script = self.running_script
+        if script and script.SUPPORTS_SOFT_EXIT:
+            # main() returns and run_script() tears the script down outside of the handler
+            script.request_exit()
+            return
+
         self.remove_state()
+        if script and script.profiler:
+            script.profiler.dump()
         # Attempt to save the state of this script if it has been implemented.
-        self.save_state()  # TODO: isn't this the wrong state?
+        if script:
+            script.save_state()
         machine.reset()  # why doesn't machine.soft_reset() work anymore?
 
+    def run_script(self, script_class):
+        """Run the given script until it returns to the menu. Scripts that don't support a soft
+        exit only return by resetting the module."""
+        reset_state()  # remove the menu's handlers
+        europi.b1._handler_both(europi.b2, self.exit_to_menu)
+        europi.b2._handler_both(europi.b1, self.exit_to_menu)
+
+        self.running_script = script_class()
+        try:
+            self.running_script.main()
+        finally:
+            self.running_script.teardown()
+            self.running_script = None
+
     def run_menu(self) -> type:
-        # load menu classes
-        script_classes = self.load_script_classes(self.scripts)
-        scripts_mapping = BootloaderMenu._build_scripts_mapping(script_classes.values())
-        self.menu = Menu(
-            items=list(sorted(scripts_mapping.keys())),
-            select_func=self.launch,
-            select_knob=europi.k2,
-            choice_buttons=[europi.b1, europi.b2],
-        )
+        script_class = None
+        while not script_class:
+            menu_items = self.load_menu_items()
+            self.menu = Menu(
+                items=list(sorted(menu_items.keys())),
+                select_func=self.launch,
+                select_knob=europi.k2,
+                choice_buttons=[europi.b1, europi.b2],
+            )
 
-        # let the user make a selection
-        old_selected = -1
-        while not self.run_request:
-            if old_selected != self.menu.selected:
-                old_selected = self.menu.selected
-                self.menu.draw_menu()
-            time.sleep(0.1)
-        return scripts_mapping[self.run_request]
+            # let the user make a selection
+            self.run_request = None
+            old_selected = -1
+            while not self.run_request:
+                if old_selected != self.menu.selected:
+                    old_selected = self.menu.selected
+                    self.menu.draw_menu()
+                time.sleep(0.1)
+
+            # only the selected script is imported
+            script_class = self.get_class_for_name(menu_items[self.run_request])
+            if not script_class:
+                # the manifest is out of date in a way we couldn't detect, rebuild it
+                delete_file(MENU_MANIFEST_FILE)
+        return script_class
 
     def main(self):
         script_class_name = self.load_state_str()
-        script_class = None
 
-        if script_class_name:
-            script_class = self.get_class_for_name(script_class_name)
+        while True:
+            # modules imported from here on belong to the script, and are unloaded after it exits
+            loaded_modules = set(sys.modules)
+            script_class = None
 
-        if not script_class:
-            script_class = self.run_menu()
-            self.save_state_str(f"{script_class.__module__}.{script_class.__name__}")
-            machine.reset()
-        else:
-            # setup the exit handlers, and execute the selection
-            europi.b1._handler_both(europi.b2, self.exit_to_menu)
-            europi.b2._handler_both(europi.b1, self.exit_to_menu)
+            if script_class_name:
+                script_class = self.get_class_for_name(script_class_name)
 
-            script_class().main()
+            if not script_class:
+                script_class = self.run_menu()
+                self.save_state_str(f"{script_class.__module__}.{script_class.__name__}")
+                if not script_class.SUPPORTS_SOFT_EXIT:
+                    machine.reset()
+
+            # execute the selection, this only returns if the script supports a soft exit
+            self.run_script(script_class)
+
+            self.remove_state()
+            script_class_name = None
+            script_class = None
+            for name in set(sys.modules) - loaded_modules:
+                unload_module(name)
+            gc.collect()
@@ -10,7 +10,7 @@ of the valid values that it may have. There are several different types of COnfi
 
 import os
 import json
-from file_utils import load_file, delete_file, load_json_data
+from file_utils import delete_file, file_signature, load_json_file, save_file
 from collections import namedtuple
 
 Validation = namedtuple("Validation", "is_valid message")
@@ -141,8 +141,23 @@ class ConfigSpec:
         return VALID
 
 
+CONFIG_STORE_FILENAME = "config/configs.json"
+"""The optional consolidated config store, holding the configs of several classes in a single file,
+keyed by class name. A class's own config file, if it has one, takes precedence over the store."""
+
+# Saved configs, keyed by filename rather than class so that unloaded scripts aren't kept in memory,
+# with the signature of the file each was read from. A config is only read again once its file has
+# changed.
+_cache = {}
+_store = [None, {}]  # signature, configs keyed by class name
+
+
 class ConfigFile:
-    """A class containing functions for dealing with configuration files."""
+    """A class containing functions for dealing with configuration files.
+
+    Saved configs are cached, so that loading the same class's config again, e.g. EuroPi's own
+    config when each script starts, only checks that its file hasn't changed.
+    """
 
     @staticmethod
     def config_filename(cls):
@@ -166,18 +181,61 @@ class ConfigFile:
             pass
         with open(ConfigFile.config_filename(cls), "w") as file:
             file.write(json_str)
+        ConfigFile.forget_config(cls)
+
+    @staticmethod
+    def save_config_store(configs: dict):
+        """Save the configs of several classes to the consolidated config store, replacing its
+        previous contents. ``configs`` maps each class to its config dict."""
+        try:
+            os.mkdir("config")
+        except OSError:
+            pass
+        save_file(
+            CONFIG_STORE_FILENAME,
+            json.dumps({cls.__qualname__: config for cls, config in configs.items()}),
+        )
+        _store[0] = None
+
+    @staticmethod
+    def load_saved_config(cls) -> dict:
+        """Returns the config saved for this class, unvalidated, from its config file or else from
+        the config store. Returns an empty dict if neither has one. The returned dict is shared
+        with the cache and must not be modified."""
+        filename = ConfigFile.config_filename(cls)
+        signature = file_signature(filename)
+        if signature is None:
+            return ConfigFile._load_store().get(cls.__qualname__, {})
+        cached = _cache.get(filename)
+        if cached is None or cached[0] != signature:
+            cached = (signature, load_json_file(filename))
+            _cache[filename] = cached
+        return cached[1]
+
+    @staticmethod
+    def forget_config(cls):
+        """Drop this class's config from the cache, e.g. when its script is unloaded. It is read
+        from its file again the next time it is loaded."""
+        _cache.pop(ConfigFile.config_filename(cls), None)
+
+    @staticmethod
+    def _load_store() -> dict:
+        signature = file_signature(CONFIG_STORE_FILENAME)
+        if signature != _store[0]:
+            _store[0] = signature
+            _store[1] = load_json_file(CONFIG_STORE_FILENAME) if signature else {}
+        return _store[1]
 
     @staticmethod
     def load_config(cls, config_spec: ConfigSpec):
         """If this class has config points, this method validates and returns the config dictionary
-        as saved in this class's config file, else, returns an empty dict."""
+        as saved in this class's config file or the config store, else, returns an empty dict."""
         if len(config_spec):
-            data = load_file(ConfigFile.config_filename(cls))
             config = config_spec.default_config()
-            if not data:
+            saved_config = ConfigFile.load_saved_config(cls)
+            if not saved_config:
                 return config
             else:
-                saved_config = load_json_data(data)
                 validation = config_spec.validate(saved_config)
 
                 if not validation.is_valid:
@@ -193,3 +251,4 @@ class ConfigFile:
     def delete_config(cls):
         """Deletes the config file, effectively resetting to defaults."""
         delete_file(ConfigFile.config_filename(cls))
+        ConfigFile.forget_config(cls)
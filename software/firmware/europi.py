@@ -16,6 +16,8 @@ Will set the CV output 3 to a voltage of 4.5V.
 import sys
 import time
 
+from array import array
+
 from machine import ADC
 from machine import I2C
 from machine import PWM
@@ -60,6 +62,13 @@ OLED_HEIGHT = 32
 I2C_CHANNEL = 0
 I2C_FREQUENCY = 400000
 
+# SSD1306 commands used to write a window of the display's memory.
+SSD1306_SET_COL_ADDR = 0x21
+SSD1306_SET_PAGE_ADDR = 0x22
+
+# Columns sent per Display.service() call in double buffered mode.
+DEFAULT_FLUSH_CHUNK_SIZE = 32
+
 # Standard max int consts.
 MAX_UINT16 = 65535
 
@@ -68,10 +77,16 @@ MIN_INPUT_VOLTAGE = 0
 MAX_INPUT_VOLTAGE = 12
 DEFAULT_SAMPLES = 32
 
+# Fraction of a step an analogue reading must move past a position's edge to change position.
+DEFAULT_HYSTERESIS = 0.25
+
 # Output voltage range
 MIN_OUTPUT_VOLTAGE = 0
 MAX_OUTPUT_VOLTAGE = 10
 
+# Spacing of the entries of the duty cycle table used by Output.voltage_mv(), which must divide 1000.
+DUTY_TABLE_STEP_MV = 10
+
 # PWM Frequency
 PWM_FREQ = 100_000
 
@@ -83,6 +98,15 @@ CHAR_HEIGHT = 8
 HIGH = 1
 LOW = 0
 
+# Edges passed to DigitalReader handlers.
+EDGE_FALLING = 0
+EDGE_RISING = 1
+EDGE_BOTH = 2  # falling edge while the 'other' button is held
+DEFAULT_EDGE_QUEUE_SIZE = 16
+
+# Number of periods between clock pulses used by the DigitalInput tempo estimate.
+DEFAULT_TEMPO_WINDOW = 8
+
 
 # Helper functions.
 
@@ -92,12 +116,95 @@ def clamp(value, low, high):
     return max(min(value, high), low)
 
 
+def set_outputs(values, duties=False):
+    """Set several CV outputs at once, starting with ``cv1``.
+
+    All of the duty cycles are calculated before any output is changed, and then written back to
+    back, which keeps the outputs better aligned than a series of ``voltage()`` calls. Outputs whose
+    duty cycle would not change are not written at all. A ``None`` value leaves that output as it
+    is::
+
+        set_outputs([0, 2.5, 5, None, 10])  # cv4 and cv6 are left unchanged
+
+    :param values: up to six voltages, or raw duty cycles if ``duties`` is True
+    :param duties: if True, ``values`` are treated as ``duty_u16`` values (0-65535)
+    """
+    if len(values) > len(cvs):
+        raise ValueError(f"set_outputs expects at most {len(cvs)} values, got: {len(values)}")
+    pending = []
+    for cv, value in zip(cvs, values):
+        if value is None:
+            pending.append(-1)
+        elif duties:
+            pending.append(clamp(int(value), 0, MAX_UINT16))
+        else:
+            pending.append(cv._duty_for_voltage(value))
+    for cv, duty in zip(cvs, pending):
+        if duty >= 0:
+            cv._write_duty(duty)
+
+
+def _output_duty_table():
+    """Return the duty cycle lookup table shared by all outputs, building it on first use.
+
+    The table has an entry every ``DUTY_TABLE_STEP_MV`` millivolts across the calibrated 0-10V
+    range, generated with the same piecewise-linear interpolation of ``OUTPUT_CALIBRATION_VALUES``
+    as ``Output.voltage()``. ``Output.voltage_mv()`` interpolates between neighbouring entries,
+    which is exact to within a duty cycle step, as the calibration is linear over each volt. The
+    table takes about 2kB of RAM, and is only built if a script uses ``Output.voltage_mv()``.
+    """
+    global _duty_table
+    if _duty_table is None:
+        volts = len(OUTPUT_CALIBRATION_VALUES) - 1
+        steps = 1000 // DUTY_TABLE_STEP_MV  # per volt
+        table = array("H", bytearray(2 * (volts * steps + 1)))
+        for index in range(volts):
+            low = OUTPUT_CALIBRATION_VALUES[index]
+            gradient = OUTPUT_CALIBRATION_VALUES[index + 1] - low
+            offset = index * steps
+            for step in range(steps):
+                table[offset + step] = min(low + gradient * step // steps, MAX_UINT16)
+        table[volts * steps] = min(OUTPUT_CALIBRATION_VALUES[volts], MAX_UINT16)
+        _duty_table = table
+    return _duty_table
+
+
+_duty_table = None
+
+
 def reset_state():
-    """Return device to initial state with all components off and handlers reset."""
-    if not TEST_ENV:
-        oled.fill(0)
-    [cv.off() for cv in cvs]
-    [d.reset_handler() for d in (b1, b2, din)]
+    """Return device to initial state with all components off and handlers reset.
+
+    Components that have not been used yet are already in their initial state, so they are left
+    unconstructed. Background tasks such as a running ``BackgroundSampler`` or ``OutputScheduler``
+    are stopped, and the display is returned to unbuffered transfers.
+    """
+    [task.stop() for task in list(_background_tasks)]
+    if oled.constructed:
+        # Send any changes still waiting in the double buffer, so the next show() isn't held up.
+        oled.set_double_buffered(False)
+        if not TEST_ENV:
+            oled.fill(0)
+    [cv.off() for cv in cvs if cv.constructed]
+    [d.reset_handler() for d in (b1, b2, din) if d.constructed]
+    [a.reset_on_change() for a in list(_polled_readers)]
+
+
+def poll_inputs():
+    """Service the listeners registered with ``on_change()`` on the knobs and analogue input.
+
+    Call this once per iteration of your script's main loop.
+    """
+    for reader in _polled_readers:
+        reader._poll_change()
+
+
+# Analogue readers with at least one on_change() listener
+_polled_readers = []
+
+# Running timer driven tasks, such as the experimental sampler and scheduler, which reset_state()
+# stops
+_background_tasks = []
 
 
 def bootsplash():
@@ -131,7 +238,18 @@ class AnalogueReader:
         self.set_samples(samples)
         self.set_deadzone(deadzone)
 
+        # Ring buffer filled by an optional background sampler, see experimental.sampler
+        self._sample_buffer = None
+
+        # Listeners registered with on_change(), serviced by poll_inputs()
+        self._change_listeners = []
+
     def _sample_adc(self, samples=None):
+        # Use the background sampler's average when one is attached and its readings are fresh.
+        buffer = self._sample_buffer
+        if buffer is not None and samples is None and buffer.is_fresh():
+            return buffer.average()
+
         # Over-samples the ADC and returns the average.
         value = 0
         for _ in range(samples or self._samples):
@@ -177,6 +295,64 @@ class AnalogueReader:
             return values[-1]
         return values[int(percent * len(values))]
 
+    def on_change(self, callback, steps=100, hysteresis=DEFAULT_HYSTERESIS):
+        """Call ``callback(position)`` when this input's position, as returned by
+        ``range(steps)``, changes.
+
+        Listeners are serviced by :func:`~europi.poll_inputs`, so callbacks run in the main loop
+        rather than in an interrupt. Redraws and recalculations can then be skipped entirely while
+        nobody touches the module::
+
+            def division_changed(position):
+                self.division = position + 1
+                self.redraw = True
+
+            k2.on_change(division_changed, steps=16)
+
+            while True:
+                poll_inputs()
+                # ... redraw if self.redraw ...
+
+        Nothing calls ``poll_inputs()`` for you, unless the script uses
+        :meth:`EuroPiScript.run_async() <europi_script.EuroPiScript.run_async>`, so the callback is
+        never called if the main loop doesn't.
+
+        :param callback: a function called with the new position
+        :param steps: the number of positions, as for ``range()``
+        :param hysteresis: how far, as a fraction of a step, the reading must move past the edge of
+            the current position before the position changes. This stops ADC noise from making the
+            position chatter when the reading sits on a boundary.
+        """
+        if not callable(callback):
+            raise ValueError("Provided callback is not callable")
+        if not isinstance(steps, int) or steps < 1:
+            raise ValueError(f"on_change expects a positive int steps value, got: {steps}")
+        # percent() without a deadzone, which AnalogueInput doesn't take, as in _poll_change()
+        percent = self.percent()
+        position = steps - 1 if percent >= 1.0 else int(percent * steps)
+        self._change_listeners.append([callback, steps, hysteresis / steps, position])
+        if self not in _polled_readers:
+            _polled_readers.append(self)
+
+    def reset_on_change(self):
+        """Remove all of the listeners registered with ``on_change()``."""
+        self._change_listeners = []
+        if self in _polled_readers:
+            _polled_readers.remove(self)
+
+    def _poll_change(self):
+        # Take a single reading for all listeners, and fire the ones whose position has changed.
+        percent = self.percent()
+        for listener in self._change_listeners:
+            callback, steps, margin, position = listener
+            candidate = steps - 1 if percent >= 1.0 else int(percent * steps)
+            if candidate == position:
+                continue
+            if position / steps - margin < percent < (position + 1) / steps + margin:
+                continue  # still within the hysteresis band around the current position
+            listener[3] = candidate
+            callback(candidate)
+
 
 class AnalogueInput(AnalogueReader):
     """A class for handling the reading of analogue control voltage.
@@ -208,36 +384,70 @@ class AnalogueInput(AnalogueReader):
                     "The input calibration process did not complete properly. Please complete again with rack power turned on"
                 )
         self._gradients.append(self._gradients[-1])
+        self._build_calibration_table()
+
+    def _build_calibration_table(self):
+        """Precompute the piecewise-linear calibration so that a raw reading maps to volts with one
+        table lookup and one multiply.
+
+        Each calibration segment is stored as ``volts = raw * slope + intercept``. ``_segments`` maps
+        the top 8 bits of a raw reading to the segment containing the middle of that bucket; near a
+        calibration point the neighbouring segment's line is at most 256 codes from its own range.
+        """
+        calibration = INPUT_CALIBRATION_VALUES
+        self._offset = calibration[0]
+        self._span = calibration[-1] - calibration[0]
+
+        if len(calibration) == 2:
+            # low precision calibration: a single segment spanning 0-10V
+            points = [(0, calibration[0], 10 / self._span)]
+        else:
+            points = [(index, calibration[index], g) for index, g in enumerate(self._gradients)]
+        self._slopes = [slope for _, _, slope in points]
+        self._intercepts = [volts - raw * slope for volts, raw, slope in points]
+        # Fixed point (Q16) millivolt versions for read_voltage_mv()
+        self._slopes_mv = [round(slope * 1000 * 65536) for slope in self._slopes]
+        self._intercepts_mv = [round(intercept * 1000 * 65536) for intercept in self._intercepts]
+
+        self._segments = bytearray(256)
+        segment = 0
+        for bucket in range(256):
+            middle = (bucket << 8) + 128
+            while segment + 1 < len(points) and points[segment + 1][1] <= middle:
+                segment += 1
+            self._segments[bucket] = segment
+
+        self._min_mv = int(self.MIN_VOLTAGE * 1000)
+        self._max_mv = int(self.MAX_VOLTAGE * 1000)
 
     def percent(self, samples=None):
         """Current voltage as a relative percentage of the component's range."""
         # Determine the percent value from the max calibration value.
-        reading = self._sample_adc(samples) - INPUT_CALIBRATION_VALUES[0]
-        max_value = max(
-            reading,
-            INPUT_CALIBRATION_VALUES[-1] - INPUT_CALIBRATION_VALUES[0],
-        )
-        return max(reading / max_value, 0.0)
+        reading = self._sample_adc(samples) - self._offset
+        return max(reading / max(reading, self._span), 0.0)
 
     def read_voltage(self, samples=None):
+        """Current voltage in volts, using the calibration values."""
         raw_reading = self._sample_adc(samples)
-        reading = raw_reading - INPUT_CALIBRATION_VALUES[0]
-        max_value = max(
-            reading,
-            INPUT_CALIBRATION_VALUES[-1] - INPUT_CALIBRATION_VALUES[0],
-        )
-        percent = max(reading / max_value, 0.0)
-        # low precision vs. high precision
-        if len(self._gradients) == 2:
-            cv = 10 * max(
-                reading / (INPUT_CALIBRATION_VALUES[-1] - INPUT_CALIBRATION_VALUES[0]),
-                0.0,
-            )
-        else:
-            index = int(percent * (len(INPUT_CALIBRATION_VALUES) - 1))
-            cv = index + (self._gradients[index] * (raw_reading - INPUT_CALIBRATION_VALUES[index]))
+        segment = self._segments[raw_reading >> 8]
+        cv = raw_reading * self._slopes[segment] + self._intercepts[segment]
         return clamp(cv, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
 
+    def read_voltage_mv(self, samples=None):
+        """Current voltage as an integer number of millivolts, using the calibration values.
+
+        Uses integer arithmetic only, which makes it a good fit for scripts that quantize the
+        input or pass it straight on to ``Output.voltage_mv()``.
+        """
+        raw_reading = self._sample_adc(samples)
+        segment = self._segments[raw_reading >> 8]
+        mv = (raw_reading * self._slopes_mv[segment] + self._intercepts_mv[segment]) >> 16
+        if mv < self._min_mv:
+            return self._min_mv
+        if mv > self._max_mv:
+            return self._max_mv
+        return mv
+
 
 class Knob(AnalogueReader):
     """A class for handling the reading of knob voltage and position.
@@ -314,14 +524,32 @@ class DigitalReader:
         # IRQ event timestamps
         self.last_rising_ms = 0
         self.last_falling_ms = 0
+        self.last_rising_us = 0
+
+        # Ring buffer of the periods between rising edges, see DigitalInput.track_tempo()
+        self._periods = None
+
+        # Optional queue of edges captured in the IRQ, see enable_edge_queue()
+        self._edge_queue = None
+        self.last_edge_us = 0
+        self.edge_overflows = 0
 
     def _bounce_wrapper(self, pin):
         """IRQ handler wrapper for falling and rising edge callback functions."""
+        now_us = time.ticks_us()
         if self.value() == HIGH:
             if time.ticks_diff(time.ticks_ms(), self.last_rising_ms) < self.debounce_delay:
                 return
             self.last_rising_ms = time.ticks_ms()
-            return self._rising_handler()
+            if self._periods is not None and self.last_rising_us:
+                self._periods[self._period_index] = time.ticks_diff(now_us, self.last_rising_us)
+                self._period_index = (self._period_index + 1) % len(self._periods)
+                # Only the first few periods need counting. An unbounded count would outgrow the
+                # small int range and allocate in the IRQ.
+                if self._period_count < len(self._periods):
+                    self._period_count += 1
+            self.last_rising_us = now_us
+            return self._handle_edge(EDGE_RISING, now_us)
         else:
             if time.ticks_diff(time.ticks_ms(), self.last_falling_ms) < self.debounce_delay:
                 return
@@ -333,8 +561,107 @@ class DigitalReader:
                 and self._other.value()
                 and time.ticks_diff(self.last_falling_ms, self.last_rising_ms) > 500
             ):
-                return self._both_handler()
-            return self._falling_handler()
+                return self._handle_edge(EDGE_BOTH, now_us)
+            return self._handle_edge(EDGE_FALLING, now_us)
+
+    def _handle_edge(self, edge, ticks):
+        if self._edge_queue is None:
+            return self._call_handler(edge)
+
+        # Queued mode: record the edge without allocating, and defer the handler.
+        queue = self._edge_queue
+        tail = self._queue_tail
+        next_tail = (tail + 1) % len(queue)
+        if next_tail == self._queue_head:
+            # wrapped so that it stays a small int, which doesn't allocate in the IRQ
+            self.edge_overflows = (self.edge_overflows + 1) & 0x3FFFFFFF
+            return
+        queue[tail] = edge
+        self._queue_ticks[tail] = ticks
+        self._queue_tail = next_tail
+        if self._schedule is not None and not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            try:
+                self._schedule(self._dispatch_ref, 0)
+            except Exception:
+                # The schedule queue is full, the edge will be handled along with the next one.
+                self._dispatch_scheduled = False
+
+    def _call_handler(self, edge):
+        if edge == EDGE_RISING:
+            return self._rising_handler()
+        if edge == EDGE_BOTH:
+            return self._both_handler()
+        return self._falling_handler()
+
+    def _dispatch_scheduled_edges(self, _):
+        self._dispatch_scheduled = False
+        self.process_edges()
+
+    def enable_edge_queue(self, size=DEFAULT_EDGE_QUEUE_SIZE, schedule=True):
+        """Capture edges into a queue in the interrupt, and call the handlers later.
+
+        By default handlers are called directly from the pin's interrupt, so a slow handler delays
+        everything else and can cause edges to be missed. With the edge queue enabled the interrupt
+        only records each edge and its ``ticks_us`` time in a preallocated ring buffer. The handlers
+        are then called outside of the interrupt, either as soon as possible through
+        ``micropython.schedule()``, or when the script calls ``process_edges()`` from its main loop
+        if ``schedule`` is False. While a handler runs, ``last_edge_us`` holds the time its edge
+        occurred.
+
+        Edges that arrive while the queue is full are dropped and counted in ``edge_overflows``,
+        which wraps around to 0 after ``0x3FFFFFFF``.
+
+        :param size: the maximum number of edges waiting to be handled
+        :param schedule: if False, edges are only handled by calls to ``process_edges()``
+        """
+        if size < 1:
+            raise ValueError(f"enable_edge_queue expects a positive size, got: {size}")
+        self._edge_queue = bytearray(size + 1)  # one slot is kept empty to tell full from empty
+        self._queue_ticks = array("L", [0] * (size + 1))
+        self._queue_head = 0
+        self._queue_tail = 0
+        self.edge_overflows = 0
+        self._dispatch_scheduled = False
+        self._dispatch_ref = self._dispatch_scheduled_edges  # preallocated for use in the IRQ
+        if schedule:
+            from micropython import schedule as micropython_schedule
+
+            self._schedule = micropython_schedule
+        else:
+            self._schedule = None
+        self._enable_irq()
+
+    def disable_edge_queue(self):
+        """Handle any queued edges, then go back to calling handlers from the interrupt."""
+        if self._edge_queue is not None:
+            self.process_edges()
+            self._edge_queue = None
+            self._enable_irq()
+
+    def process_edges(self):
+        """Call the handlers for the edges captured since the last call, oldest first. Returns the
+        number of edges handled."""
+        queue = self._edge_queue
+        if queue is None:
+            return 0
+        handled = 0
+        while self._queue_head != self._queue_tail:
+            head = self._queue_head
+            edge = queue[head]
+            self.last_edge_us = self._queue_ticks[head]
+            self._queue_head = (head + 1) % len(queue)
+            self._call_handler(edge)
+            handled += 1
+        return handled
+
+    def _enable_irq(self):
+        # The queued mode does no allocation in the IRQ, so it can use a hard interrupt for the
+        # most accurate timestamps.
+        if self._edge_queue is None:
+            self.pin.irq(handler=self._bounce_wrapper)
+        else:
+            self.pin.irq(handler=self._bounce_wrapper, hard=True)
 
     def value(self):
         """The current binary value, HIGH (1) or LOW (0)."""
@@ -348,25 +675,35 @@ class DigitalReader:
         if not callable(func):
             raise ValueError("Provided handler func is not callable")
         self._rising_handler = func
-        self.pin.irq(handler=self._bounce_wrapper)
+        self._enable_irq()
 
     def handler_falling(self, func):
         """Define the callback function to call when falling edge detected."""
         if not callable(func):
             raise ValueError("Provided handler func is not callable")
         self._falling_handler = func
-        self.pin.irq(handler=self._bounce_wrapper)
+        self._enable_irq()
 
     def reset_handler(self):
+        """Remove the handlers and stop the edge queue and tempo tracking."""
         self.pin.irq(handler=None)
+        self._rising_handler = lambda: None
+        self._falling_handler = lambda: None
+        self._both_handler = lambda: None
+        self._other = None
+        self._periods = None
+        self.last_rising_us = 0
+        self._edge_queue = None
+        self._queue_ticks = None
 
     def _handler_both(self, other, func):
         """When this and other are high, execute the both func."""
         if not callable(func):
             raise ValueError("Provided handler func is not callable")
-        self._other = other
+        # The other reader is used from the IRQ, so don't go through a lazy proxy there.
+        self._other = other.construct() if isinstance(other, LazyComponent) else other
         self._both_handler = func
-        self.pin.irq(handler=self._bounce_wrapper)
+        self._enable_irq()
 
 
 class DigitalInput(DigitalReader):
@@ -412,6 +749,53 @@ class DigitalInput(DigitalReader):
         """
         return self.last_rising_ms
 
+    def last_triggered_us(self):
+        """Return the ticks_us of the last trigger, or 0 if there hasn't been one yet."""
+        return self.last_rising_us
+
+    def track_tempo(self, window=DEFAULT_TEMPO_WINDOW):
+        """Start measuring the period between rising edges, for ``period_us()``, ``bpm()`` and
+        ``next_edge_us()``.
+
+        The estimate is the median of the last ``window`` periods, which ignores the odd late or
+        missing clock pulse. Tracking needs the input's interrupt, so it stops if
+        ``reset_handler()`` is called.
+
+        :param window: the number of periods to take the median of
+        """
+        if window < 1:
+            raise ValueError(f"track_tempo expects a positive window, got: {window}")
+        self._period_index = 0
+        self._period_count = 0
+        self._periods = array("L", [0] * window)
+        self._enable_irq()
+
+    def period_us(self):
+        """The estimated period between rising edges in microseconds, or 0 if there have not yet
+        been two edges since ``track_tempo()`` was called."""
+        if self._periods is None or not self._period_count:
+            return 0
+        periods = sorted(self._periods[: min(self._period_count, len(self._periods))])
+        middle = len(periods) // 2
+        if len(periods) % 2:
+            return periods[middle]
+        return (periods[middle - 1] + periods[middle]) // 2
+
+    def bpm(self, ppqn=1):
+        """The estimated tempo in beats per minute, given the number of pulses per quarter note of
+        the incoming clock. Returns 0 until a period has been measured."""
+        period = self.period_us()
+        if not period:
+            return 0
+        return 60_000_000 / (period * ppqn)
+
+    def next_edge_us(self):
+        """The predicted ticks_us of the next rising edge, or 0 if no period has been measured."""
+        period = self.period_us()
+        if not period:
+            return 0
+        return time.ticks_add(self.last_rising_us, period)
+
 
 class Button(DigitalReader):
     """A class for handling push button behavior.
@@ -480,7 +864,242 @@ class Display(SSD1306_I2C):
                 raise Exception(
                     "EuroPi Hardware Error:\nMake sure the OLED display is connected correctly"
                 )
+
+        # Damage tracking: the range of columns drawn to on each 8 pixel high page since the last
+        # show(), and a copy of what was last sent to the display. This is set up before the driver
+        # is initialized as the driver clears and shows the display. The small drawing calls that
+        # pixel-heavy scripts make many of, and those whose extent is costly to work out, only set
+        # _dirty_unknown, and show() then compares every page with the copy.
+        self._page_count = self.height // 8
+        self._dirty_start = bytearray(self._page_count)
+        self._dirty_end = bytearray(self._page_count)
+        self._dirty_unknown = False
+        self._shadow = bytearray(self._page_count * self.width)
+        self.invalidate()
+
+        # Double buffering: the columns of each page still to be sent to the display by service()
+        self._double_buffered = False
+        self._chunk_size = DEFAULT_FLUSH_CHUNK_SIZE
+        self._pending_start = bytearray([1] * self._page_count)
+        self._pending_end = bytearray(self._page_count)
+
         super().__init__(self.width, self.height, i2c)
+        self._buffer_view = memoryview(self.buffer)
+        self._shadow_view = memoryview(self._shadow)
+
+    def invalidate(self):
+        """Resend the whole frame buffer on the next ``show()``.
+
+        Only needed if the display's memory was changed by something other than this class.
+        """
+        self._full_refresh = True
+
+    def _mark(self, x, y, w, h):
+        # Record that the given rectangle has been drawn to.
+        if w <= 0 or h <= 0:
+            return
+        x0 = max(x, 0)
+        x1 = min(x + w - 1, self.width - 1)
+        y0 = max(y, 0)
+        y1 = min(y + h - 1, self.height - 1)
+        if x0 > x1 or y0 > y1:
+            return
+        for page in range(y0 >> 3, (y1 >> 3) + 1):
+            if self._dirty_start[page] > self._dirty_end[page]:
+                self._dirty_start[page] = x0
+                self._dirty_end[page] = x1
+            else:
+                if x0 < self._dirty_start[page]:
+                    self._dirty_start[page] = x0
+                if x1 > self._dirty_end[page]:
+                    self._dirty_end[page] = x1
+
+    def _mark_all(self):
+        for page in range(self._page_count):
+            self._dirty_start[page] = 0
+            self._dirty_end[page] = self.width - 1
+
+    def _mark_clean(self):
+        for page in range(self._page_count):
+            self._dirty_start[page] = 1
+            self._dirty_end[page] = 0
+        self._dirty_unknown = False
+
+    def fill(self, c):
+        super().fill(c)
+        self._mark_all()
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, c)
+        self._dirty_unknown = True
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self._dirty_unknown = True
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self._dirty_unknown = True
+
+    def line(self, x1, y1, x2, y2, c):
+        super().line(x1, y1, x2, y2, c)
+        self._dirty_unknown = True
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        super().ellipse(x, y, xr, yr, c, *args)
+        self._dirty_unknown = True
+
+    def poly(self, x, y, coords, c, *args):
+        super().poly(x, y, coords, c, *args)
+        self._dirty_unknown = True
+
+    def rect(self, x, y, w, h, c, *args):
+        super().rect(x, y, w, h, c, *args)
+        self._mark(x, y, w, h)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        self._mark(x, y, w, h)
+
+    def text(self, s, x, y, c=1):
+        super().text(s, x, y, c)
+        self._mark(x, y, len(s) * CHAR_WIDTH, CHAR_HEIGHT)
+
+    def blit(self, fbuf, x, y, *args):
+        # The size of the source frame buffer isn't available, so assume it covers the rest of the
+        # display.
+        super().blit(fbuf, x, y, *args)
+        self._mark(x, y, self.width - x, self.height - y)
+
+    def scroll(self, xstep, ystep):
+        super().scroll(xstep, ystep)
+        self._mark_all()
+
+    def _write_window(self, page, start, end):
+        # Send columns start to end (inclusive) of the given page, as last shown, to the display.
+        self.write_cmd(SSD1306_SET_COL_ADDR)
+        self.write_cmd(start)
+        self.write_cmd(end)
+        self.write_cmd(SSD1306_SET_PAGE_ADDR)
+        self.write_cmd(page)
+        self.write_cmd(page)
+        offset = page * self.width
+        self.write_data(self._shadow_view[offset + start : offset + end + 1])
+
+    def _queue_window(self, page, start, end):
+        # Add columns start to end (inclusive) of the given page to the pending transfer.
+        if self._pending_start[page] > self._pending_end[page]:
+            self._pending_start[page] = start
+            self._pending_end[page] = end
+        else:
+            if start < self._pending_start[page]:
+                self._pending_start[page] = start
+            if end > self._pending_end[page]:
+                self._pending_end[page] = end
+
+    def set_double_buffered(self, enabled=True, chunk_size=DEFAULT_FLUSH_CHUNK_SIZE):
+        """Enable or disable double buffered, incremental transfers to the display.
+
+        When enabled, ``show()`` takes a snapshot of the changes and returns straight away. The
+        snapshot is then sent to the display in chunks of at most ``chunk_size`` columns of one page
+        by calls to ``service()``, which should be made frequently, for example once per main loop
+        iteration. Each call blocks for a fraction of a millisecond rather than for a whole frame::
+
+            oled.set_double_buffered()
+
+            while True:
+                # ... handle inputs and outputs, draw ...
+                oled.show()
+                oled.service()
+
+        Disabling double buffering sends any pending changes first.
+        """
+        if not enabled:
+            self.flush()
+        self._double_buffered = enabled
+        self._chunk_size = max(int(chunk_size), 1)
+
+    @property
+    def busy(self):
+        """True while changes are waiting to be sent to the display by ``service()``."""
+        for page in range(self._page_count):
+            if self._pending_start[page] <= self._pending_end[page]:
+                return True
+        return False
+
+    def service(self):
+        """Send the next chunk of the changes made pending by ``show()`` in double buffered mode.
+
+        Returns True if more changes are still pending.
+        """
+        for page in range(self._page_count):
+            start = self._pending_start[page]
+            end = self._pending_end[page]
+            if start > end:
+                continue
+            last = min(end, start + self._chunk_size - 1)
+            self._write_window(page, start, last)
+            if last == end:
+                self._pending_start[page] = 1
+                self._pending_end[page] = 0
+            else:
+                self._pending_start[page] = last + 1
+            return self.busy
+        return False
+
+    def flush(self):
+        """Send all pending changes to the display, blocking until done."""
+        while self.service():
+            pass
+
+    def show(self):
+        """Send the changes made since the last call to ``show()`` to the display.
+
+        Only the columns of each page that were drawn to, and differ from what is already on the
+        display, are sent. Redrawing a mostly static screen, even after an ``oled.fill(0)``, is
+        therefore much cheaper than sending the whole 512 byte frame buffer.
+
+        In double buffered mode (see ``set_double_buffered()``) the changes are only queued, to be
+        sent by ``service()``.
+        """
+        if self._full_refresh:
+            self._shadow[:] = self.buffer
+            self._full_refresh = False
+            self._mark_clean()
+            if self._double_buffered:
+                for page in range(self._page_count):
+                    self._queue_window(page, 0, self.width - 1)
+            else:
+                super().show()
+            return
+
+        if self._dirty_unknown:
+            self._mark_all()
+        buffer = self.buffer
+        shadow = self._shadow
+        for page in range(self._page_count):
+            start = self._dirty_start[page]
+            end = self._dirty_end[page]
+            if start > end:
+                continue
+            # trim the columns that are unchanged at either end of the dirty range
+            offset = page * self.width
+            while start <= end and buffer[offset + start] == shadow[offset + start]:
+                start += 1
+            while end > start and buffer[offset + end] == shadow[offset + end]:
+                end -= 1
+            if start > end:
+                continue
+            self._shadow_view[offset + start : offset + end + 1] = self._buffer_view[
+                offset + start : offset + end + 1
+            ]
+            if self._double_buffered:
+                self._queue_window(page, start, end)
+            else:
+                self._write_window(page, start, end)
+        self._mark_clean()
 
     def centre_text(self, text):
         """Split the provided text across 3 lines of display."""
@@ -523,18 +1142,59 @@ class Output:
             self._gradients.append(OUTPUT_CALIBRATION_VALUES[index + 1] - value)
         self._gradients.append(self._gradients[-1])
 
+        # Millivolt range and duty cycle lookup table for voltage_mv()
+        self._min_mv = max(int(min_voltage * 1000), 0)
+        self._max_mv = min(int(max_voltage * 1000), (len(OUTPUT_CALIBRATION_VALUES) - 1) * 1000)
+        self._duty_table = None
+
     def _set_duty(self, cycle):
         cycle = int(cycle)
         self.pin.duty_u16(clamp(cycle, 0, MAX_UINT16))
         self._duty = cycle
 
+    def _write_duty(self, duty):
+        # Write an already clamped duty cycle, if it differs from the current one. Used by
+        # set_outputs(), as a method call is a single cached lookup on the cvs' LazyComponents,
+        # where reading and setting their attributes would go through the proxy each time.
+        if duty != self._duty:
+            self.pin.duty_u16(duty)
+            self._duty = duty
+
+    def _duty_for_voltage(self, voltage):
+        # The calibrated duty cycle for the given voltage, clamped to this output's range.
+        voltage = clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
+        index = int(voltage // 1)
+        return int(OUTPUT_CALIBRATION_VALUES[index] + (self._gradients[index] * (voltage % 1)))
+
     def voltage(self, voltage=None):
         """Set the output voltage to the provided value within the range of 0 to 10."""
         if voltage is None:
             return self._duty / MAX_UINT16
-        voltage = clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
-        index = int(voltage // 1)
-        self._set_duty(OUTPUT_CALIBRATION_VALUES[index] + (self._gradients[index] * (voltage % 1)))
+        self._set_duty(self._duty_for_voltage(voltage))
+
+    def voltage_mv(self, millivolts):
+        """Set the output voltage to the provided number of millivolts. Fractions of a millivolt
+        are dropped.
+
+        This is a faster alternative to ``voltage()`` for scripts that update their outputs
+        continuously. The duty cycle is interpolated between two entries of a lookup table
+        generated from the calibration values, using integer arithmetic only, followed by one
+        register write. The table is built, and shared by all outputs, on the first call.
+        """
+        if self._duty_table is None:
+            self._duty_table = _output_duty_table()
+        millivolts = int(millivolts)  # the table is indexed by whole millivolts
+        if millivolts < self._min_mv:
+            millivolts = self._min_mv
+        elif millivolts > self._max_mv:
+            millivolts = self._max_mv
+        index = millivolts // DUTY_TABLE_STEP_MV
+        remainder = millivolts - index * DUTY_TABLE_STEP_MV
+        duty = self._duty_table[index]
+        if remainder:
+            duty += (self._duty_table[index + 1] - duty) * remainder // DUTY_TABLE_STEP_MV
+        self.pin.duty_u16(duty)
+        self._duty = duty
 
     def on(self):
         """Set the voltage HIGH at 5 volts."""
@@ -559,28 +1219,93 @@ class Output:
             self.off()
 
 
+class LazyComponent:
+    """A stand-in for one of the EuroPi singletons that constructs the real component the first
+    time it is used.
+
+    Building every component at import time costs a noticeable part of the boot time, most of it
+    for the display's I2C scan, so ``import europi`` only creates these proxies. Scripts use them
+    exactly like the components themselves::
+
+        from europi import cv1, k1
+
+        cv1.voltage(k1.percent() * 10)  # cv1 and k1 are constructed here
+
+    Methods are cached on the proxy after their first lookup, so repeated calls cost a single
+    attribute lookup, as they would on the component. Setting an attribute sets it on the
+    component.
+
+    :param cls: the component class, e.g. ``Knob``
+    :param args: the arguments passed to ``cls`` when the component is constructed
+    """
+
+    def __init__(self, cls, *args):
+        object.__setattr__(self, "_cls", cls)
+        object.__setattr__(self, "_args", args)
+        object.__setattr__(self, "_component", None)
+
+    @property
+    def constructed(self):
+        """True once the component has been constructed."""
+        return self._component is not None
+
+    def construct(self):
+        """Construct the component if needed and return it."""
+        component = self._component
+        if component is None:
+            component = self._cls(*self._args)
+            object.__setattr__(self, "_component", component)
+        return component
+
+    def __getattr__(self, name):
+        component = self.construct()
+        value = getattr(component, name)
+        # Only methods are cached. Callables stored on the component, such as the handlers of a
+        # DigitalReader, are replaced by its own methods, which the proxy wouldn't notice.
+        if callable(value) and not name.startswith("__") and name not in component.__dict__:
+            object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        self._uncache(name)
+        setattr(self.construct(), name, value)
+
+    def __delattr__(self, name):
+        self._uncache(name)
+        delattr(self.construct(), name)
+
+    def _uncache(self, name):
+        # Drop a cached method so that it doesn't shadow a new value set on the component.
+        if name in self.__dict__:
+            object.__delattr__(self, name)
+
+    def __repr__(self):
+        return f"<lazy {self._cls.__name__}{self._args}>"
+
+
 ## Initialize EuroPi global singleton instance variables.
 
 europi_config = load_europi_config()
 
-# Define all the I/O using the appropriate class and with the pins used
-din = DigitalInput(22)
-ain = AnalogueInput(26)
-k1 = Knob(27)
-k2 = Knob(28)
-b1 = Button(4)
-b2 = Button(5)
-
-oled = Display(0, 1)
-cv1 = Output(21)
-cv2 = Output(20)
-cv3 = Output(16)
-cv4 = Output(17)
-cv5 = Output(18)
-cv6 = Output(19)
+# Define all the I/O using the appropriate class and with the pins used. Each component is
+# constructed on first use.
+din = LazyComponent(DigitalInput, 22)
+ain = LazyComponent(AnalogueInput, 26)
+k1 = LazyComponent(Knob, 27)
+k2 = LazyComponent(Knob, 28)
+b1 = LazyComponent(Button, 4)
+b2 = LazyComponent(Button, 5)
+
+oled = LazyComponent(Display, 0, 1)
+cv1 = LazyComponent(Output, 21)
+cv2 = LazyComponent(Output, 20)
+cv3 = LazyComponent(Output, 16)
+cv4 = LazyComponent(Output, 17)
+cv5 = LazyComponent(Output, 18)
+cv6 = LazyComponent(Output, 19)
 cvs = [cv1, cv2, cv3, cv4, cv5, cv6]
 
-usb_connected = DigitalReader(24, 0)
+usb_connected = LazyComponent(DigitalReader, 24, 0)
 
 # Overclock the Pico for improved performance.
 freq(europi_config["cpu_freq"])
@@ -1,10 +1,100 @@
 """Provides a base class for scripts which wish to participate in the bootloader menu."""
+import gc
 import os
 import json
-from utime import ticks_diff, ticks_ms
+import sys
+from utime import ticks_add, ticks_diff, ticks_ms, ticks_us
 from configuration import ConfigSpec, ConfigFile
 from europi_config import EuroPiConfig
-from file_utils import load_file, delete_file, load_json_data
+from file_utils import load_file, delete_file, load_json_file, open_saved_file, save_file
+
+
+def _import_asyncio():
+    """Import ``uasyncio`` when it is first needed, so that scripts which don't use
+    ``run_async()`` don't spend the RAM on it. Also sets ``_sleep_ms()``."""
+    global _sleep_ms
+    try:
+        import uasyncio as asyncio
+    except ImportError:
+        import asyncio
+
+    if _sleep_ms is None:
+        if hasattr(asyncio, "sleep_ms"):
+            _sleep_ms = asyncio.sleep_ms
+        else:
+
+            def _sleep_ms(ms):
+                return asyncio.sleep(ms / 1000)
+
+    return asyncio
+
+
+# asyncio.sleep_ms(), or an equivalent where it is missing, once _import_asyncio() has been called
+_sleep_ms = None
+
+
+# Default period of the input polling task started by EuroPiScript.run_async()
+DEFAULT_INPUT_POLL_MS = 10
+
+# Period of the run_async() task that saves the state once it has been marked dirty and left alone
+STATE_SERVICE_PERIOD_US = 100_000
+
+
+class _Periodic:
+    """Marks a method of a EuroPiScript to be called periodically by ``run_async()``."""
+
+    def __init__(self, func, period_us):
+        if period_us <= 0:
+            raise ValueError(f"period must be positive, got: {period_us}")
+        self.func = func
+        self.period_us = period_us
+
+    def __get__(self, instance, owner=None):
+        # Keep the decorated method callable as a normal method.
+        if instance is None:
+            return self
+        func = self.func
+        return lambda *args, **kwargs: func(instance, *args, **kwargs)
+
+
+def every_ms(period_ms):
+    """Decorate a method of a :class:`EuroPiScript` to have it called every ``period_ms``
+    milliseconds by :meth:`EuroPiScript.run_async`."""
+    return lambda func: _Periodic(func, int(period_ms * 1000))
+
+
+def every_us(period_us):
+    """Decorate a method of a :class:`EuroPiScript` to have it called every ``period_us``
+    microseconds by :meth:`EuroPiScript.run_async`. Periods below a millisecond are kept by yielding
+    to the other tasks until the deadline rather than sleeping."""
+    return lambda func: _Periodic(func, int(period_us))
+
+
+def unload_module(name):
+    """Remove the named module from ``sys.modules`` and from its parent package, so that the memory
+    it uses can be collected and a later import runs it afresh."""
+    sys.modules.pop(name, None)
+    parent, _, child = name.rpartition(".")
+    if parent in sys.modules:
+        try:
+            delattr(sys.modules[parent], child)
+        except (AttributeError, TypeError):
+            pass
+
+
+class _EdgeFlag:
+    """A minimal stand-in for ``uasyncio.ThreadSafeFlag`` where it is not available."""
+
+    def __init__(self):
+        self._set = False
+
+    def set(self):
+        self._set = True
+
+    async def wait(self):
+        while not self._set:
+            await _sleep_ms(0)
+        self._set = False
 
 
 class EuroPiScript:
@@ -41,7 +131,7 @@ class EuroPiScript:
     When adding ``save_state()`` calls to your script, there are a few important considerations to keep in mind:
 
         * Frequency of saves - scripts should only save state to disk when state changes, and should not save too frequently because os write operations are expensive in terms of time. Saving too frequently will affect the performance of a script.
-        * Save state file size - The pico only has about 1MB of free space available so save state storage format is important to keep as minimal as possible.
+        * Save state file size - The pico only has about 1MB of free space available so save state storage format is important to keep as minimal as possible. ``save_state_struct()`` saves a binary format declared with a :class:`~state_schema.StateSchema`, which is the most compact, and the fastest to save and load.
         * No externally influenced input - The instance variables your script saves should not be externally influenced, meaning you should not save the current knob position, current analog input value or current digital input value.
 
     To add the ability to save and load state, you must:
@@ -52,11 +142,13 @@ class EuroPiScript:
 
         3. **Apply saved state variables to this instance.** Set state variables with default fallback values if not found in the json save state.
 
-        4. **Save state upon state change.** When a state variable changes, call the save state function.
+        4. **Mark the state dirty upon state change.** When a state variable changes, call ``mark_state_dirty()``.
 
         5. **Implement save_state() method.** Provide an implementation to serialize the state variables into a string, JSON, or bytes an call the appropriate save state method.
 
-        6. **Throttle the frequency of saves.** Saving state too often could negatively impact the performance of your script, so it is advised to add some checks in your code to ensure it doesn't save too frequently.
+        6. **Flush the state at an idle point.** Call ``flush_state()`` from the main loop, e.g. after updating the display. It calls ``save_state()`` once the state has been left unchanged for ``SAVE_QUIET_MS``, so that a burst of changes, such as turning a knob, is saved once rather than stalling the script with a write per change. Scripts using ``run_async()`` don't need to, as it flushes the state regularly.
+
+    States are written to a temporary file which then replaces the previous save, so a power cut while saving never leaves a corrupted state behind.
 
 
     Here is an extension of the script above with some added trivial features that incorporate saving and loading script state::
@@ -77,18 +169,14 @@ class EuroPiScript:
                 def increment_counter():
                     if self.enabled:
                         self.counter += 1
-                        self.save_state()  # 4
+                        self.mark_state_dirty()  # 4
 
                 @b1.handler
                 def toggle_enablement():
                     self.enabled = not self.enabled
-                    self.save_state()  # 4
+                    self.mark_state_dirty()  # 4
 
             def save_state(self):  # 5
-                # Don't save if it has been less than 5 seconds since last save.
-                if self.last_saved() < 5000:  # 6
-                    return
-
                 state = {
                     "counter": self.counter,
                     "enabled": self.enabled,
@@ -96,7 +184,9 @@ class EuroPiScript:
                 self.save_state_json(state)
 
             def main(self):
-                oled.centre_text("Hello world")
+                while True:
+                    oled.centre_text(f"Count: {self.counter}")
+                    self.flush_state()  # 6
 
 
     .. note::
@@ -131,10 +221,116 @@ class EuroPiScript:
     Users can create and edit configuration files in order to change a script's configuration. The
     files should be uploaded to the pico in the `/config` directory. To assist in generating initial
     versions of these files, see `/scripts/generate_default_configs.py`.
+
+    **Asyncio Runtime**
+
+    Instead of a busy ``while True`` loop, a script can declare how often each part of its work
+    should run and hand control to ``run_async()``. Decorated methods are run as ``uasyncio``
+    tasks at a fixed rate, without drift. The runtime also polls the inputs for ``on_change()``
+    listeners, services a double buffered display, and can turn handler calls into events that a
+    task can wait on::
+
+        from europi import cv1, din, k1, oled
+        from europi_script import EuroPiScript, every_ms, every_us
+
+        class Example(EuroPiScript):
+            @every_us(500)
+            def update_outputs(self):
+                cv1.voltage(k1.percent() * 10)
+
+            @every_ms(50)
+            def draw(self):
+                oled.centre_text(f"{k1.read_position()}")
+
+            async def on_clock(self):
+                clock = self.edge_event(din)
+                while True:
+                    await clock.wait()
+                    # ... react to the rising edge outside of the interrupt
+
+            def main(self):
+                self.run_async(self.on_clock())
+
+    ``run_async()`` returns once ``request_exit()`` has been called.
+
+    **Returning to the Menu**
+
+    By default, the EuroPi is reset when the user returns to the menu and again when they choose a
+    script. A script can instead opt in to being stopped and started without a reset, which makes
+    switching between scripts almost instant. To opt in, set ``SUPPORTS_SOFT_EXIT`` and make
+    ``main()`` return once ``exit_requested`` is true::
+
+        class HelloWorld(EuroPiScript):
+            SUPPORTS_SOFT_EXIT = True
+
+            def main(self):
+                while not self.exit_requested:
+                    oled.centre_text("Hello world")
+                    sleep(0.1)
+
+            def on_exit(self):
+                self.timer.deinit()  # anything that reset_state() doesn't know about
+
+    When ``main()`` returns, the menu calls ``teardown()``, which calls ``on_exit()``, saves the
+    script's state, resets the handlers and outputs, and unloads the script's module.
+
+    **Rendering on the Second Core**
+
+    Drawing and sending a frame to the display takes several milliseconds, during which the main
+    loop can't update the outputs. A script can instead draw on the RP2040's second core, from
+    snapshots of its state that the main loop publishes::
+
+        def render(self, state):  # called on the second core
+            oled.centre_text(f"{state['bpm']} BPM")
+
+        def main(self):
+            renderer = self.start_render_thread(self.render)
+            while True:
+                ...  # inputs and outputs only
+                renderer.state["bpm"] = self.bpm
+                renderer.publish()
+
+    See :mod:`experimental.dual_core`.
+
+    **Profiling**
+
+    When a script stutters, the profiler shows where the time goes. Once enabled, it records how long
+    each iteration of the main loop takes, how long the input handlers and ``oled.show()`` take,
+    and the latency from each input edge to its handler. The results are printed over the serial
+    connection when the script exits, and ``overlay=True`` also shows them at the bottom of the
+    display::
+
+        def main(self):
+            self.enable_profiler(overlay=True)
+            while True:
+                self.profile_loop()
+                ...
+
+    In ``run_async()``, each ``every_ms``/``every_us`` method is recorded instead of loop times.
+    With ``allocations=True``, the profiler records the bytes allocated and the garbage collections
+    instead of times, to find the allocations that lead to collections landing on clock edges. See
+    :mod:`experimental.profiler`.
     """
 
+    # Set to True in a script whose main() returns once exit_requested is true.
+    SUPPORTS_SOFT_EXIT = False
+
+    # How long, in milliseconds, the state must be left unchanged after mark_state_dirty() before
+    # flush_state() saves it.
+    SAVE_QUIET_MS = 2000
+
+    # The experimental.profiler.Profiler, once enable_profiler() has been called.
+    profiler = None
+
+    # The experimental.dual_core.RenderThread, once start_render_thread() has been called.
+    render_thread = None
+
     def __init__(self):
         self._last_saved = 0
+        self._state_dirty = False
+        self._state_saved = False  # set by each save, so flush_state() can tell if one happened
+        self._state_changed = None  # until mark_state_dirty() is first called
+        self._exit_requested = False
         self.config = EuroPiScript._load_config_for_class(self.__class__)
         self.europi_config = EuroPiScript._load_config_for_class(EuroPiConfig)
 
@@ -155,6 +351,171 @@ class EuroPiScript:
         """
         return cls.__qualname__
 
+    # Lifecycle methods
+
+    def on_exit(self):
+        """Override this method to release anything the script set up that ``teardown()`` doesn't
+        know about, such as timers. Called before the script's state is saved."""
+        pass
+
+    def teardown(self):
+        """Stop the script after its ``main()`` has returned: stop its render thread, call
+        ``on_exit()``, save the state if it changed, reset the handlers and outputs, and unload the
+        script's module and cached config."""
+        import europi
+
+        if self.render_thread:
+            self.render_thread.stop()
+        self.on_exit()
+        if self.profiler:
+            self.profiler.dump()
+            self.profiler.detach()
+        if self._state_changed is None:
+            # The script doesn't track its changes, so they may not have been saved yet.
+            self.save_state()
+        else:
+            self.flush_state(force=True)
+        europi.reset_state()
+        ConfigFile.forget_config(self.__class__)
+        unload_module(self.__class__.__module__)
+        gc.collect()
+
+    # Profiling methods
+
+    def enable_profiler(self, overlay=False, allocations=False):
+        """Start recording handler, latency and display times, and loop times with
+        ``profile_loop()``. Returns the :class:`~experimental.profiler.Profiler`.
+
+        :param overlay: if True, show a summary at the bottom of the display
+        :param allocations: if True, record the bytes allocated and the garbage collections
+            instead of times, with an :class:`~experimental.profiler.AllocationProfiler`
+        """
+        import europi
+        from experimental.profiler import AllocationProfiler, Profiler
+
+        if self.profiler is None:
+            self.profiler = AllocationProfiler() if allocations else Profiler()
+            for name in ("din", "b1", "b2"):
+                self.profiler.attach_reader(name, getattr(europi, name))
+            self.profiler.attach_display(europi.oled, overlay)
+        return self.profiler
+
+    def profile_loop(self):
+        """Call at the start of each iteration of the main loop to record loop times while the
+        profiler is enabled. Does nothing otherwise."""
+        if self.profiler is not None:
+            self.profiler.tick()
+
+    # Dual core methods
+
+    def start_render_thread(self, render, factory=dict, frame_ms=None):
+        """Call ``render(state)`` on the RP2040's second core with each snapshot of the script's
+        state published by the main loop. Returns the
+        :class:`~experimental.dual_core.RenderThread`, whose ``state`` the main loop fills in
+        before calling its ``publish()``. Only the render thread may use ``oled`` while it runs.
+
+        :param render: the function that draws a snapshot, usually ending with ``oled.show()``
+        :param factory: creates an empty snapshot, e.g. ``dict`` or ``lambda: [0, 0]``
+        :param frame_ms: the shortest time between two frames
+        """
+        import europi
+        from experimental.dual_core import DEFAULT_FRAME_MS, RenderThread
+
+        europi.oled.construct()  # so that the render thread doesn't construct it concurrently
+        if self.render_thread is None:
+            self.render_thread = RenderThread(render, factory, frame_ms or DEFAULT_FRAME_MS)
+        self.render_thread.start()
+        return self.render_thread
+
+    # Asyncio runtime methods
+
+    def run_async(self, *coroutines, input_poll_ms=DEFAULT_INPUT_POLL_MS):
+        """Run this script's ``every_ms``/``every_us`` methods, the given coroutines, and the input
+        polling, display and state saving service tasks until ``request_exit()`` is called.
+
+        :param coroutines: additional coroutines to run as tasks
+        :param input_poll_ms: the period of the task that services ``on_change()`` listeners
+        """
+        asyncio = _import_asyncio()
+        if hasattr(asyncio, "sleep_ms"):
+            asyncio.new_event_loop()  # uasyncio: discard any tasks left over from a previous run
+        asyncio.run(self._run_async(coroutines, input_poll_ms))
+
+    def request_exit(self):
+        """Ask the script to stop. ``run_async()`` returns once its tasks notice the request."""
+        self._exit_requested = True
+
+    @property
+    def exit_requested(self):
+        return self._exit_requested
+
+    def edge_event(self, reader, falling=False):
+        """Set the rising (or falling) edge handler of the given button or digital input to set a
+        flag that a task can ``await flag.wait()`` on. The handler itself does nothing else, so it
+        is safe to use from an interrupt."""
+        asyncio = _import_asyncio()
+        flag = asyncio.ThreadSafeFlag() if hasattr(asyncio, "ThreadSafeFlag") else _EdgeFlag()
+        if falling:
+            reader.handler_falling(flag.set)
+        else:
+            reader.handler(flag.set)
+        return flag
+
+    def _periodic_methods(self):
+        cls = self.__class__
+        methods = []
+        for name in dir(cls):
+            attr = getattr(cls, name)
+            if isinstance(attr, _Periodic):
+                methods.append(attr)
+        return methods
+
+    async def _run_async(self, coroutines, input_poll_ms):
+        import europi
+
+        asyncio = _import_asyncio()
+
+        def service_inputs(_):
+            europi.poll_inputs()
+
+        def service_display(_):
+            europi.oled.service()  # only does work in double buffered mode
+
+        def service_state(_):
+            self.flush_state()
+
+        periodic = [(p.func, p.period_us) for p in self._periodic_methods()]
+        if self.profiler:
+            periodic = [(self.profiler.profiled(f.__name__, f), period) for f, period in periodic]
+        tasks = [asyncio.create_task(self._every(func, period)) for func, period in periodic]
+        tasks.append(asyncio.create_task(self._every(service_inputs, input_poll_ms * 1000)))
+        tasks.append(asyncio.create_task(self._every(service_display, 1000)))
+        tasks.append(asyncio.create_task(self._every(service_state, STATE_SERVICE_PERIOD_US)))
+        tasks.extend(asyncio.create_task(c) for c in coroutines)
+
+        while not self._exit_requested:
+            await _sleep_ms(10)
+        for task in tasks:
+            task.cancel()
+
+    async def _every(self, func, period_us):
+        # Call func(self) every period_us, scheduling from the previous deadline rather than from
+        # when the call finished, so that the rate doesn't drift.
+        deadline = ticks_us()
+        while not self._exit_requested:
+            func(self)
+            deadline = ticks_add(deadline, period_us)
+            delay = ticks_diff(deadline, ticks_us())
+            if delay < -period_us:
+                # We've fallen more than a period behind, skip the missed calls rather than
+                # trying to catch up with a burst of them.
+                deadline = ticks_us()
+            if delay <= 0:
+                await _sleep_ms(0)  # always give the other tasks a turn
+            while delay > 0:
+                await _sleep_ms(delay // 1000)
+                delay = ticks_diff(deadline, ticks_us())
+
     # Save State Methods
 
     @property
@@ -205,10 +566,62 @@ class EuroPiScript:
         json_str = json.dumps(state)
         return self._save_state(json_str)
 
+    def save_state_struct(self, state: dict, schema):
+        """Take state as a dict and save it in the binary format declared by ``schema``, a
+        :class:`~state_schema.StateSchema`.
+
+        The values and arrays are written straight to the file, without building a string of the
+        whole state first, so large states are saved faster than with ``save_state_json()`` and
+        without the heap needed to hold them twice.
+
+        .. note::
+            Be mindful of how often `save_state_struct()` is called because
+            writing to disk too often can slow down the performance of your
+            script. Only call save state when state has changed and consider
+            adding a time since last save check to reduce save frequency.
+        """
+        save_file(self._state_filename, lambda file: schema.write(file, state), "wb")
+        self._last_saved = ticks_ms()
+        self._state_saved = True
+
     def _save_state(self, state: str, mode: str = "w"):
-        with open(self._state_filename, mode) as file:
-            file.write(state)
+        save_file(self._state_filename, state, mode)
         self._last_saved = ticks_ms()
+        self._state_saved = True
+
+    def mark_state_dirty(self):
+        """Note that the state has changed and should be saved by ``flush_state()``.
+
+        This is cheap enough to call from a handler on every change, e.g. while a knob is turned.
+        """
+        self._state_dirty = True
+        self._state_changed = ticks_ms()
+
+    @property
+    def state_dirty(self):
+        """True if the state has changed since it was last saved by ``flush_state()``."""
+        return self._state_dirty
+
+    def flush_state(self, force=False):
+        """Call ``save_state()`` if the state was marked dirty and has then been left unchanged for
+        ``SAVE_QUIET_MS``, so that a burst of changes is saved once, after it ends. Call this from
+        an idle point of the main loop, such as after drawing the display. ``run_async()`` calls it
+        regularly. Returns True if the state was saved.
+
+        :param force: save a dirty state without waiting for the quiet period
+        """
+        if not self._state_dirty:
+            return False
+        if not force and ticks_diff(ticks_ms(), self._state_changed) < self.SAVE_QUIET_MS:
+            return False
+        self._state_saved = False
+        self._state_dirty = False  # before saving, so that a change made meanwhile is kept
+        self.save_state()
+        if not self._state_saved:
+            # save_state() didn't save, e.g. because it throttles itself with last_saved()
+            self._state_dirty = True
+            return False
+        return True
 
     def load_state_str(self) -> str:
         """Check disk for saved state, if it exists, return the raw state value as a string.
@@ -232,7 +645,22 @@ class EuroPiScript:
         Check for a previously saved state. If it exists, return state as a
         dict. If no state is found, an empty dictionary will be returned.
         """
-        return load_json_data(self._load_state())
+        return load_json_file(self._state_filename)
+
+    def load_state_struct(self, schema, state: dict = None) -> dict:
+        """Load state saved with ``save_state_struct()`` as a dict.
+
+        Check for a previously saved state. If it exists, return state as a
+        dict, converted from an earlier version of ``schema`` if needed. If no
+        state is found, the defaults of the schema's fields are returned. If
+        ``state`` is given it is filled in and returned, and its arrays are
+        read into in place.
+        """
+        try:
+            with open_saved_file(self._state_filename, "rb") as file:
+                return schema.read(file, state)
+        except OSError:
+            return schema.default_state(state)
 
     def _load_state(self, mode: str = "r") -> any:
         return load_file(self._state_filename, mode)
@@ -0,0 +1,166 @@
+"""Rendering the display on the RP2040's second core.
+
+Drawing a frame and sending it to the display over I2C takes several milliseconds, during which a
+script's main loop can't read its inputs or update its outputs. A :class:`RenderThread` runs the
+script's drawing code on the second core instead, through ``_thread``, so that the first core only
+handles the inputs, outputs and timing.
+
+The two cores share the script's state through a :class:`TripleBuffer`: the main loop fills in a
+snapshot of what the display should show and publishes it, and the render thread draws the most
+recent snapshot. Neither core waits for the other to finish with a snapshot, and nothing is
+allocated to hand one over::
+
+    class MyScript(EuroPiScript):
+        def render(self, state):  # called on the second core
+            oled.fill(0)
+            oled.text(f"step {state[0]}", 0, 0, 1)
+            oled.show()
+
+        def main(self):
+            renderer = self.start_render_thread(self.render, lambda: [0])
+            while True:
+                ...  # inputs and outputs
+                renderer.state[0] = self.step
+                renderer.publish()
+
+While the render thread runs, only it may use ``oled``. On a computer the render thread is a CPython
+thread, which shares the interpreter with the main loop, so it takes turns with the main loop rather
+than running in parallel.
+"""
+import _thread
+
+from utime import sleep_ms, ticks_diff, ticks_ms
+
+# The shortest time between two frames, about 30 frames per second.
+DEFAULT_FRAME_MS = 33
+
+
+class TripleBuffer:
+    """Three snapshots of a script's state, created by ``factory``, passed from a writer to a reader
+    on another core or thread.
+
+    The writer fills in :attr:`back` and calls :meth:`publish`. The reader calls :meth:`latest`, or
+    :meth:`wait`, to get the most recently published snapshot, which stays untouched until the
+    reader asks for the next one. The lock is only held to swap two indices.
+
+    The back buffer is one of the writer's older snapshots, so the writer must set every field of it
+    before publishing.
+
+    :param factory: a function returning a new, empty snapshot, e.g. ``dict`` or
+        ``lambda: array("f", [0] * 6)``
+    """
+
+    def __init__(self, factory):
+        self._buffers = [factory(), factory(), factory()]
+        self._back = 0
+        self._ready = 1
+        self._front = 2
+        self._fresh = False
+        self._lock = _thread.allocate_lock()
+        # Held while no new snapshot has been published, so that wait() can block on it.
+        self._published = _thread.allocate_lock()
+        self._published.acquire()
+
+    @property
+    def back(self):
+        """The snapshot for the writer to fill in."""
+        return self._buffers[self._back]
+
+    def publish(self):
+        """Hand the back buffer over to the reader."""
+        with self._lock:
+            self._back, self._ready = self._ready, self._back
+            self._fresh = True
+        self.wake()
+
+    def latest(self):
+        """Return the most recently published snapshot, or None if nothing was published since the
+        last call."""
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._front, self._ready = self._ready, self._front
+            self._fresh = False
+        return self._buffers[self._front]
+
+    def wait(self):
+        """Block until a snapshot is published, or :meth:`wake` is called, and return the latest
+        snapshot, or None if there isn't a new one."""
+        self._published.acquire()
+        return self.latest()
+
+    def wake(self):
+        """Release a reader blocked in :meth:`wait`."""
+        if self._published.locked():
+            self._published.release()
+
+
+class RenderThread:
+    """Calls ``render(state)`` on the second core with each snapshot published through its
+    :class:`TripleBuffer`, at most once every ``frame_ms`` milliseconds.
+
+    If ``render`` raises an exception the thread stops, and the exception is kept in its ``error``
+    attribute.
+
+    :param render: the function that draws a snapshot, usually ending with ``oled.show()``
+    :param factory: creates the snapshots, see :class:`TripleBuffer`
+    :param frame_ms: the shortest time between two frames
+    """
+
+    def __init__(self, render, factory=dict, frame_ms=DEFAULT_FRAME_MS):
+        self.render = render
+        self.buffer = TripleBuffer(factory)
+        self.frame_ms = frame_ms
+        self.frames = 0
+        self.error = None
+        self._running = False
+        # Held while the thread runs, so that stop() can wait for it to finish.
+        self._done = _thread.allocate_lock()
+
+    @property
+    def state(self):
+        """The snapshot for the main loop to fill in before calling :meth:`publish`."""
+        return self.buffer.back
+
+    def publish(self):
+        """Hand the snapshot over to the render thread."""
+        self.buffer.publish()
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Start rendering on the second core."""
+        if self._running:
+            return
+        self._running = True
+        self._done.acquire()
+        _thread.start_new_thread(self._run, ())
+
+    def stop(self):
+        """Stop the render thread and wait for it to finish drawing its current frame."""
+        if not self._running:
+            return
+        self._running = False
+        self.buffer.wake()
+        self._done.acquire()  # released by the thread as it ends
+        self._done.release()
+
+    def _run(self):
+        try:
+            while self._running:
+                state = self.buffer.wait()
+                if state is None or not self._running:
+                    continue
+                start = ticks_ms()
+                self.render(state)
+                self.frames += 1
+                delay = self.frame_ms - ticks_diff(ticks_ms(), start)
+                if delay > 0:
+                    sleep_ms(delay)
+        except Exception as e:
+            self.error = e
+            self._running = False
+        finally:
+            self._done.release()
@@ -0,0 +1,398 @@
+"""Instrumentation for finding out what makes a script stutter.
+
+A :class:`Profiler` records durations into fixed-size histograms:
+
+* the time between iterations of the script's main loop, see :meth:`Profiler.tick`
+* the time each digital input and button handler takes to run
+* the latency from an edge on a digital input or button to its handler being called
+* the time ``oled.show()`` takes to send the frame to the display
+
+An :class:`AllocationProfiler` records the bytes allocated on the heap, and the garbage collections,
+at the same points instead. Every allocation brings the next garbage collection closer, and a
+collection that runs while a clock edge arrives delays its handler by milliseconds.
+
+Scripts normally enable one through :meth:`~europi_script.EuroPiScript.enable_profiler`, which
+attaches it to the EuroPi's inputs and display::
+
+    class MyScript(EuroPiScript):
+        def main(self):
+            self.enable_profiler(overlay=True)  # or allocations=True
+            while True:
+                self.profile_loop()
+                ...
+
+The histograms are printed when the script exits, and with ``overlay`` the display shows a summary
+in its bottom line. A profiler that isn't enabled costs nothing, as nothing is attached.
+
+Each histogram counts values into power of two buckets, so recording a value is a handful of integer
+operations and doesn't allocate.
+"""
+import gc
+from array import array
+
+from utime import ticks_diff, ticks_us
+
+from europi import LazyComponent
+
+try:
+    from gc import mem_alloc  # MicroPython
+except ImportError:
+    mem_alloc = None
+
+# The last bucket holds every value of 2**22 (about 4 seconds in microseconds) or more.
+DEFAULT_BUCKETS = 24
+
+OVERLAY_HEIGHT = 8
+
+
+class Histogram:
+    """Counts values, such as durations in microseconds, into power of two buckets. Bucket 0 counts
+    values of 0, and bucket ``i`` those from ``2**(i-1)`` up to ``2**i - 1``.
+
+    :param buckets: the number of buckets, the last one counts every larger value
+    :param unit: the unit shown in the summary
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, unit="us"):
+        if buckets < 2:
+            raise ValueError(f"Histogram needs at least 2 buckets, got: {buckets}")
+        self.counts = array("L", [0] * buckets)
+        self.unit = unit
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        """Count a value. Negative values count as 0."""
+        if value < 0:
+            value = 0
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        index = 0
+        last = len(self.counts) - 1
+        while value and index < last:
+            value >>= 1
+            index += 1
+        self.counts[index] += 1
+
+    def mean(self):
+        return self.total // self.count if self.count else 0
+
+    def percentile(self, fraction):
+        """An upper bound on the given fraction of the values, e.g. 0.99 for the 99th percentile.
+        The bound is the top of the bucket the percentile falls in, or the largest value."""
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                if index == len(self.counts) - 1:
+                    break
+                return min((1 << index) - 1, self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return "no samples"
+        unit = self.unit
+        return (
+            f"n={self.count} mean={self.mean()}{unit} p50<={self.percentile(0.5)}{unit} "
+            f"p99<={self.percentile(0.99)}{unit} max={self.max}{unit}"
+        )
+
+
+class AllocationHistogram(Histogram):
+    """A :class:`Histogram` of bytes allocated, which also counts the garbage collections."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        super().__init__(buckets, unit="B")
+
+    def reset(self):
+        super().reset()
+        self.gc_runs = 0
+
+    def summary(self):
+        return f"{super().summary()} gc={self.gc_runs}"
+
+
+class Profiler:
+    """Records loop, handler, latency and display times into :class:`Histogram`\\ s.
+
+    :param buckets: the number of buckets in each histogram
+    """
+
+    RECORDS_LATENCY = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.histogram("loop")
+        self._last_tick = None
+        self._detach = []
+
+    def histogram(self, name):
+        """The histogram with the given name, created if needed."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = self._new_histogram()
+        return histogram
+
+    def _new_histogram(self):
+        return Histogram(self.buckets)
+
+    def _begin(self):
+        # Start a measurement, returns what _end() needs to complete it.
+        return ticks_us()
+
+    def _end(self, begin, histogram):
+        histogram.record(ticks_diff(ticks_us(), begin))
+
+    def tick(self):
+        """Call once per iteration of the script's main loop to record each iteration."""
+        if self._last_tick is not None:
+            self._end(self._last_tick, self.histograms["loop"])
+        self._last_tick = self._begin()
+
+    def profiled(self, name, func):
+        """Return a version of ``func`` that records each of its calls."""
+        histogram = self.histogram(name)
+
+        def profiled_func(*args):
+            begin = self._begin()
+            result = func(*args)
+            self._end(begin, histogram)
+            return result
+
+        return profiled_func
+
+    def attach_reader(self, name, reader):
+        """Record the handlers of a digital input or button as ``<name>``, and if the profiler
+        records latency, the latency from each edge to its handler as ``<name> latency``."""
+        handler = self.histogram(name)
+        latency = self.histogram(f"{name} latency") if self.RECORDS_LATENCY else None
+        handle_edge = reader._handle_edge
+        call_handler = reader._call_handler
+        # read the edge queue from the component itself, rather than through the proxy
+        component = reader.construct() if isinstance(reader, LazyComponent) else reader
+        edge_us = 0
+
+        def profiled_handle_edge(edge, ticks):
+            nonlocal edge_us
+            edge_us = ticks
+            return handle_edge(edge, ticks)
+
+        def profiled_call_handler(edge):
+            if latency is not None:
+                # queued edges are handled later, with the time of their edge in last_edge_us
+                queued = component._edge_queue is not None
+                latency.record(
+                    ticks_diff(ticks_us(), component.last_edge_us if queued else edge_us)
+                )
+            begin = self._begin()
+            result = call_handler(edge)
+            self._end(begin, handler)
+            return result
+
+        reader._handle_edge = profiled_handle_edge
+        reader._call_handler = profiled_call_handler
+        self._detach.append(lambda: delattr(reader, "_handle_edge"))
+        self._detach.append(lambda: delattr(reader, "_call_handler"))
+
+    def attach_display(self, display, overlay=False):
+        """Record ``display.show()`` as ``show``. With ``overlay``, :meth:`overlay_text` is drawn
+        over the bottom line of every frame."""
+        histogram = self.histogram("show")
+        show = display.show
+
+        def profiled_show():
+            if overlay:
+                self.draw_overlay(display)
+            begin = self._begin()
+            show()
+            self._end(begin, histogram)
+
+        display.show = profiled_show
+        self._detach.append(lambda: delattr(display, "show"))
+
+    def detach(self):
+        """Stop profiling the inputs and display."""
+        while self._detach:
+            self._detach.pop()()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self._last_tick = None
+
+    def worst_handler(self):
+        """The largest value recorded for any handler, excluding the loop, latencies and
+        display."""
+        return max(
+            [
+                h.max
+                for name, h in self.histograms.items()
+                if name not in ("loop", "show") and not name.endswith(" latency")
+            ]
+            or [0]
+        )
+
+    def overlay_text(self):
+        """The 99th percentile loop time and the longest handler time."""
+        loop = self.histograms["loop"].percentile(0.99)
+        return f"L{_short_us(loop)} H{_short_us(self.worst_handler())}"
+
+    def draw_overlay(self, display):
+        """Draw :meth:`overlay_text` over the bottom line of the display."""
+        y = display.height - OVERLAY_HEIGHT
+        display.fill_rect(0, y, display.width, OVERLAY_HEIGHT, 0)
+        display.text(self.overlay_text(), 0, y, 1)
+
+    def report(self):
+        """The summary of every histogram that has samples, one line each."""
+        width = max(len(name) for name in self.histograms)
+        return [
+            f"{name: <{width}} {histogram.summary()}"
+            for name, histogram in self.histograms.items()
+            if histogram.count or getattr(histogram, "gc_runs", 0)
+        ]
+
+    def dump(self):
+        """Print the report, e.g. over the USB serial connection."""
+        print("Profile:")
+        for line in self.report():
+            print(f"  {line}")
+
+
+class AllocationProfiler(Profiler):
+    """Records the bytes allocated on the heap, and the garbage collections, during each loop
+    iteration, handler call and ``show()``, into :class:`AllocationHistogram`\\ s. A hot path that
+    doesn't allocate records 0 bytes.
+
+    On the EuroPi, the bytes allocated are read from ``gc.mem_alloc()``. A garbage collection is
+    detected when the allocated memory shrinks, in which case the bytes allocated in that interval
+    are unknown and only the collection is counted. A collection that frees less than is allocated
+    in the same interval goes unnoticed.
+
+    On a computer, with the test mocks or the simulator, it uses ``tracemalloc`` instead. The bytes
+    recorded are the most memory held at once during the interval, counting only what was allocated
+    during it, so 0 still means that nothing was allocated. The host only approximates MicroPython:
+    CPython allocates every int outside of -5 to 256, where MicroPython doesn't allocate ints below
+    2**30, and CPython's collections only look for reference cycles. The simulator's and mocks' own
+    bookkeeping is included too, so prove a hot path is allocation-free with the plain mocks::
+
+        profiler = AllocationProfiler()
+        advance = profiler.profiled("advance", generator.advance)
+        for _ in range(100):
+            advance()
+        assert profiler.histograms["advance"].max == 0
+
+    :param buckets: the number of buckets in each histogram
+    """
+
+    RECORDS_LATENCY = False
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        super().__init__(buckets)
+        self.meter = HeapMeter() if mem_alloc else TracedMemoryMeter()
+        self._detach.append(self.meter.close)
+
+    def _new_histogram(self):
+        return AllocationHistogram(self.buckets)
+
+    def _begin(self):
+        return self.meter.begin()
+
+    def _end(self, begin, histogram):
+        allocated, collected = self.meter.end(begin)
+        if collected:
+            histogram.gc_runs += 1
+        if allocated is not None:
+            histogram.record(allocated)
+
+    def overlay_text(self):
+        """The 99th percentile of the bytes allocated per loop, and the collections so far."""
+        loop = self.histograms["loop"]
+        return f"A{loop.percentile(0.99)}B GC{loop.gc_runs}"
+
+
+class HeapMeter:
+    """Measures allocations with MicroPython's ``gc.mem_alloc()``, which doesn't allocate."""
+
+    def begin(self):
+        return mem_alloc()
+
+    def end(self, begin):
+        """Return the bytes allocated since ``begin``, or None if a collection ran, and whether a
+        collection ran."""
+        after = mem_alloc()
+        if after < begin:
+            return None, True
+        return after - begin, False
+
+    def close(self):
+        pass
+
+
+class TracedMemoryMeter:
+    """Measures allocations on the host with ``tracemalloc``. Intervals may be nested, e.g. a
+    handler called during a loop iteration, but must end in the reverse order they began."""
+
+    def __init__(self):
+        import tracemalloc
+
+        self._tracemalloc = tracemalloc
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        # [memory held at the last clear_traces(), most held so far, collections at the start]
+        # for each open interval, innermost last. The memory is relative to the interval's start.
+        self._intervals = []
+        self.collections = 0
+        gc.callbacks.append(self._count_collection)
+
+    def _count_collection(self, phase, info):
+        if phase == "start":
+            self.collections += 1
+
+    def begin(self):
+        # Clearing the traces sets the traced and peak memory back to 0, so that the peak only
+        # covers this interval, and the open intervals carry on from what they held so far.
+        current, peak = self._tracemalloc.get_traced_memory()
+        for interval in self._intervals:
+            interval[1] = max(interval[1], interval[0] + peak)
+            interval[0] += current
+        self._intervals.append([0, 0, self.collections])  # before clearing, so it isn't counted
+        self._tracemalloc.clear_traces()
+        return len(self._intervals)
+
+    def end(self, begin):
+        """Return the most memory held at once since the matching ``begin()``, and whether a
+        collection ran."""
+        held, most, collections = self._intervals.pop()
+        peak = self._tracemalloc.get_traced_memory()[1]
+        return max(most, held + peak), self.collections > collections
+
+    def close(self):
+        if self._count_collection in gc.callbacks:
+            gc.callbacks.remove(self._count_collection)
+        if self._started:
+            self._tracemalloc.stop()
+            self._started = False
+
+
+def _short_us(us):
+    if us >= 10_000:
+        return f"{us // 1000}ms"
+    if us >= 1000:
+        return f"{us / 1000:.1f}ms"
+    return f"{us}us"
@@ -0,0 +1,147 @@
+"""Background sampling of the analogue inputs.
+
+By default every call to :meth:`~europi.AnalogueReader.percent` and friends blocks while the ADC is
+over-sampled. A :class:`BackgroundSampler` instead sweeps a set of analogue readers round-robin from
+a ``machine.Timer`` callback, storing each reading in a fixed-size ring buffer. While the sampler is
+running, the readers' methods return the average of their buffer right away::
+
+    from europi import ain, k1, k2
+    from experimental.sampler import BackgroundSampler
+
+    sampler = BackgroundSampler([ain, k1, k2])
+    sampler.start()
+
+    while True:
+        k1.percent()  # no longer blocks on the ADC
+
+If the sampler is stopped, or falls behind by more than ``max_age_ms``, the readers silently fall
+back to sampling the ADC themselves. Passing an explicit ``samples`` argument to a reader method
+also bypasses the buffer.
+"""
+from array import array
+
+from europi import _background_tasks
+from machine import Timer
+from utime import ticks_diff, ticks_ms
+
+DEFAULT_BUFFER_SIZE = 16
+DEFAULT_SAMPLE_FREQ = 1000  # sweeps per second
+DEFAULT_MAX_AGE_MS = 50
+
+
+class SampleBuffer:
+    """A fixed-size ring buffer of raw ADC readings with a running total, so that the average is
+    available without iterating over the buffer.
+
+    :param size: the number of readings to average over
+    :param max_age_ms: readings older than this are considered stale
+    """
+
+    def __init__(self, size=DEFAULT_BUFFER_SIZE, max_age_ms=DEFAULT_MAX_AGE_MS):
+        if size < 1:
+            raise ValueError(f"SampleBuffer size must be at least 1, got: {size}")
+        self.size = size
+        self.max_age_ms = max_age_ms
+        self._values = array("H", [0] * size)
+        self.clear()
+
+    def clear(self):
+        """Empty the buffer. An empty buffer is never fresh."""
+        for i in range(self.size):
+            self._values[i] = 0
+        self._index = 0
+        self._count = 0
+        self._total = 0
+        self.last_write_ms = 0
+
+    def write(self, value):
+        """Add a raw reading to the buffer, replacing the oldest one once the buffer is full. This
+        is called from the sampler's timer callback and does not allocate."""
+        self._total += value - self._values[self._index]
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+        self.last_write_ms = ticks_ms()
+
+    def average(self):
+        """The rounded average of the readings currently in the buffer."""
+        if not self._count:
+            return 0
+        return round(self._total / self._count)
+
+    def is_fresh(self):
+        """True if the buffer holds readings and the newest one is no older than ``max_age_ms``."""
+        return self._count > 0 and ticks_diff(ticks_ms(), self.last_write_ms) <= self.max_age_ms
+
+
+class BackgroundSampler:
+    """Sweeps the ADC of each of the given readers round-robin into a :class:`SampleBuffer` per
+    reader. The buffers are attached to the readers so that their existing methods return the
+    buffered average.
+
+    :param readers: a list of :class:`~europi.AnalogueReader` instances, e.g. ``[ain, k1, k2]``
+    :param buffer_size: the number of readings averaged per reader
+    :param freq: the number of sweeps per second while the sampler is running
+    :param max_age_ms: how old the newest reading may be before a reader falls back to the ADC
+    """
+
+    def __init__(
+        self,
+        readers,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+        freq=DEFAULT_SAMPLE_FREQ,
+        max_age_ms=DEFAULT_MAX_AGE_MS,
+    ):
+        self.readers = list(readers)
+        self.freq = freq
+        self.buffers = [SampleBuffer(buffer_size, max_age_ms) for _ in self.readers]
+        self._adcs = [reader.pin for reader in self.readers]
+        self._timer = None
+        # Preallocate the bound method so the timer doesn't allocate one on every tick.
+        self._callback = self._on_timer
+
+    def attach(self):
+        """Attach the buffers to their readers without starting the timer. Useful if the caller
+        prefers to call :meth:`sweep` from its own loop or timer."""
+        for reader, buffer in zip(self.readers, self.buffers):
+            reader._sample_buffer = buffer
+
+    def detach(self):
+        """Return the readers to sampling the ADC themselves."""
+        for reader in self.readers:
+            reader._sample_buffer = None
+
+    def start(self):
+        """Attach the buffers, prime them with one sweep and start the sampling timer."""
+        self.attach()
+        self.sweep()
+        if self._timer is None:
+            self._timer = Timer()
+        self._timer.init(freq=self.freq, mode=Timer.PERIODIC, callback=self._callback)
+        if self not in _background_tasks:
+            _background_tasks.append(self)
+
+    def stop(self):
+        """Stop the sampling timer and detach the buffers. This is done for you when a script
+        exits."""
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        if self in _background_tasks:
+            _background_tasks.remove(self)
+        self.detach()
+        for buffer in self.buffers:
+            buffer.clear()
+
+    @property
+    def running(self):
+        return self._timer is not None
+
+    def sweep(self):
+        """Take one reading from each reader's ADC."""
+        for i in range(len(self._adcs)):
+            self.buffers[i].write(self._adcs[i].read_u16())
+
+    def _on_timer(self, timer):
+        self.sweep()
@@ -0,0 +1,235 @@
+"""Timer-driven output events.
+
+A script that sets its gate lengths, ratchets and delays with sleeps, or by watching ``ticks_ms()``
+from its main loop, only gets them right while the loop is idle. An :class:`OutputScheduler` instead
+takes voltage changes timestamped with ``ticks_us()`` and applies them from a ``machine.Timer``
+callback, so they happen on time however busy the main loop is::
+
+    from europi import cv1, cv2, din
+    from experimental.scheduler import OutputScheduler
+
+    scheduler = OutputScheduler()
+    scheduler.start()
+
+    @din.handler
+    def clock():
+        scheduler.trigger(cv1, 10000)  # a 10ms trigger, ended by the timer
+        scheduler.ratchet(cv2, 4, 25000, 5000)  # four 5ms triggers, 25ms apart
+
+Events are kept in a priority queue of fixed size, allocated when the scheduler is created, so the
+timer callback does not allocate. An event is applied within one timer period, ``1 / freq``
+seconds, of its time. Events scheduled while the queue is full are dropped and counted in
+``overflows``.
+"""
+from array import array
+
+from europi import MAX_OUTPUT_VOLTAGE, _background_tasks, _output_duty_table, clamp, cvs
+from machine import Timer, disable_irq, enable_irq
+from utime import ticks_add, ticks_diff, ticks_us
+
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_TIMER_FREQ = 2000  # checks for due events per second
+DEFAULT_TRIGGER_VOLTAGE = 5
+
+
+class OutputScheduler:
+    """Applies timestamped voltage changes to the outputs from a timer.
+
+    Events due at the same time are applied lowest voltage first, so that a gate ending as the next
+    one starts leaves the output high.
+
+    :param outputs: the outputs events can be scheduled for, all six by default
+    :param size: the maximum number of pending events
+    :param freq: how many times per second the timer checks for due events
+    """
+
+    def __init__(self, outputs=None, size=DEFAULT_QUEUE_SIZE, freq=DEFAULT_TIMER_FREQ):
+        if size < 1:
+            raise ValueError(f"OutputScheduler size must be at least 1, got: {size}")
+        self.outputs = list(cvs if outputs is None else outputs)
+        self.size = size
+        self.freq = freq
+        self.overflows = 0
+
+        # A binary heap of events ordered by time, stored as parallel arrays.
+        self._when = array("l", [0] * size)
+        self._millivolts = array("H", [0] * size)
+        self._output = bytearray(size)
+        self._count = 0
+
+        # Look up the outputs' setters and build their duty cycle table now, rather than in the
+        # timer callback.
+        _output_duty_table()
+        self._setters = [output.voltage_mv for output in self.outputs]
+        self._timer = None
+        # Preallocate the bound method so the timer doesn't allocate one on every tick.
+        self._callback = self._on_timer
+
+    def __len__(self):
+        """The number of pending events."""
+        return self._count
+
+    def start(self):
+        """Start applying events."""
+        if self._timer is None:
+            self._timer = Timer()
+        self._timer.init(freq=self.freq, mode=Timer.PERIODIC, callback=self._callback)
+        if self not in _background_tasks:
+            _background_tasks.append(self)
+
+    def stop(self):
+        """Stop the timer and discard the pending events. This is done for you when a script
+        exits."""
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        if self in _background_tasks:
+            _background_tasks.remove(self)
+        self._count = 0
+
+    @property
+    def running(self):
+        return self._timer is not None
+
+    def schedule(self, when_us, output, voltage):
+        """Set ``output`` to ``voltage`` at ``when_us``, a ``ticks_us()`` time. Returns False if the
+        queue is full and the event was dropped.
+
+        :param output: one of the scheduler's outputs, e.g. ``cv1``, or its index in ``outputs``
+        """
+        index = self._index(output)
+        millivolts = self._to_millivolts(voltage)
+        state = disable_irq()
+        try:
+            if self._count == self.size:
+                self.overflows += 1
+                return False
+            self._push(when_us, index, millivolts)
+            return True
+        finally:
+            enable_irq(state)
+
+    def trigger(self, output, length_us, voltage=DEFAULT_TRIGGER_VOLTAGE, when_us=None):
+        """Output a trigger or gate of ``length_us`` microseconds, starting at ``when_us``, or now.
+        Returns False, and schedules nothing, if the queue doesn't have room for both edges."""
+        return self.ratchet(output, 1, 0, length_us, voltage, when_us)
+
+    def ratchet(
+        self, output, count, interval_us, length_us, voltage=DEFAULT_TRIGGER_VOLTAGE, when_us=None
+    ):
+        """Output ``count`` triggers of ``length_us`` microseconds, ``interval_us`` apart, starting
+        at ``when_us``, or now. Returns False, and schedules nothing, if the queue doesn't have room
+        for all of them."""
+        index = self._index(output)
+        millivolts = self._to_millivolts(voltage)
+        if when_us is None:
+            when_us = ticks_us()
+        state = disable_irq()
+        try:
+            if self._count + 2 * count > self.size:
+                self.overflows += 1
+                return False
+            for _ in range(count):
+                self._push(when_us, index, millivolts)
+                self._push(ticks_add(when_us, length_us), index, 0)
+                when_us = ticks_add(when_us, interval_us)
+            return True
+        finally:
+            enable_irq(state)
+
+    def cancel(self, output=None):
+        """Discard the pending events of ``output``, or of every output. The outputs are left as
+        they are."""
+        if output is None:
+            self._count = 0
+            return
+        index = self._index(output)
+        state = disable_irq()
+        try:
+            kept = 0
+            for i in range(self._count):
+                if self._output[i] != index:
+                    self._when[kept] = self._when[i]
+                    self._millivolts[kept] = self._millivolts[i]
+                    self._output[kept] = self._output[i]
+                    kept += 1
+            self._count = kept
+            for i in range(kept // 2 - 1, -1, -1):
+                self._sift_down(i)
+        finally:
+            enable_irq(state)
+
+    def process(self, now_us):
+        """Apply the events due at ``now_us``, a ``ticks_us()`` time. This is called by the timer
+        and doesn't allocate. Returns the number of events applied."""
+        applied = 0
+        while self._count and ticks_diff(self._when[0], now_us) <= 0:
+            self._setters[self._output[0]](self._millivolts[0])
+            self._pop()
+            applied += 1
+        return applied
+
+    def _on_timer(self, timer):
+        self.process(ticks_us())
+
+    def _index(self, output):
+        if isinstance(output, int):
+            if not 0 <= output < len(self.outputs):
+                raise ValueError(f"No output at index {output}")
+            return output
+        for index, candidate in enumerate(self.outputs):
+            if candidate is output:
+                return index
+        raise ValueError(f"{output} is not one of the scheduler's outputs")
+
+    @staticmethod
+    def _to_millivolts(voltage):
+        return int(clamp(voltage, 0, MAX_OUTPUT_VOLTAGE) * 1000)
+
+    # Heap operations, called with interrupts disabled or from the timer.
+
+    def _before(self, i, j):
+        diff = ticks_diff(self._when[i], self._when[j])
+        return diff < 0 or (diff == 0 and self._millivolts[i] < self._millivolts[j])
+
+    def _swap(self, i, j):
+        self._when[i], self._when[j] = self._when[j], self._when[i]
+        self._millivolts[i], self._millivolts[j] = self._millivolts[j], self._millivolts[i]
+        self._output[i], self._output[j] = self._output[j], self._output[i]
+
+    def _push(self, when_us, index, millivolts):
+        i = self._count
+        self._when[i] = when_us
+        self._millivolts[i] = millivolts
+        self._output[i] = index
+        self._count += 1
+        while i:
+            parent = (i - 1) >> 1
+            if not self._before(i, parent):
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _pop(self):
+        self._count -= 1
+        last = self._count
+        if last:
+            self._when[0] = self._when[last]
+            self._millivolts[0] = self._millivolts[last]
+            self._output[0] = self._output[last]
+            self._sift_down(0)
+
+    def _sift_down(self, i):
+        count = self._count
+        while True:
+            first = i
+            left = 2 * i + 1
+            right = left + 1
+            if left < count and self._before(left, first):
+                first = left
+            if right < count and self._before(right, first):
+                first = right
+            if first == i:
+                return
+            self._swap(i, first)
+            i = first
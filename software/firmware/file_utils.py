@@ -2,14 +2,94 @@ import os
 import json
 
 
+def open_saved_file(filename, mode: str = "r"):
+    """Open a file written by ``save_file()`` for reading.
+
+    If a power cut hit ``save_file()`` after it had deleted the old file but before it renamed the
+    new one, the new file is renamed into place first. Raises ``OSError`` if neither exists.
+    """
+    try:
+        return open(filename, mode)
+    except OSError:
+        os.rename(f"{filename}.tmp", filename)
+        return open(filename, mode)
+
+
 def load_file(filename, mode: str = "r") -> any:
     try:
-        with open(filename, mode) as file:
+        with open_saved_file(filename, mode) as file:
             return file.read()
     except OSError as e:
         return ""
 
 
+def file_signature(path, with_mtime=True):
+    """Return ``[size, mtime]`` for the given file, or ``None`` if it doesn't exist. The mtime is
+    ``None`` if ``with_mtime`` is false."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat[6], stat[8] if with_mtime else None]
+
+
+def save_file(filename, data, mode: str = "w"):
+    """Replace the contents of a file with ``data``, or with what ``data(file)`` writes if it is a
+    function.
+
+    The data is written to a temporary file that is then renamed over the original, so that a power
+    cut while saving leaves either the old or the new file, never a partial one.
+    """
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, mode) as file:
+        if callable(data):
+            data(file)
+        else:
+            file.write(data)
+    try:
+        os.rename(temp_filename, filename)
+    except OSError:
+        # Some filesystems don't rename over an existing file.
+        delete_file(filename)
+        os.rename(temp_filename, filename)
+
+
+def load_json_file(filename) -> dict:
+    """Load a json file as a dict, parsing it straight from the file.
+
+    Unlike ``load_json_data(load_file(filename))``, the whole of the file is never held in memory as
+    a string next to the parsed data, so loading needs about half the memory. If the file doesn't
+    exist or can't be decoded, an empty dictionary will be returned.
+    """
+    try:
+        with open_saved_file(filename, "r") as file:
+            return json.load(file)
+    except OSError:
+        return {}
+    except ValueError as e:
+        if os.stat(filename)[6]:  # an empty file is as good as a missing one
+            print(f"Unable to decode {filename}: {e}")
+        return {}
+
+
+def read_chunks(filename, buffer):
+    """Read a binary file in chunks the size of ``buffer``, a preallocated ``bytearray``, yielding a
+    ``memoryview`` of the bytes read each time. The buffer is reused, so each chunk must be handled
+    before the next one is read. Nothing is yielded if the file doesn't exist.
+    """
+    try:
+        file = open_saved_file(filename, "rb")
+    except OSError:
+        return
+    with file:
+        view = memoryview(buffer)
+        while True:
+            count = file.readinto(buffer)
+            if not count:
+                return
+            yield view[:count]
+
+
 def load_json_data(json_str):
     """Load previously saved json data as a dict.
 
@@ -0,0 +1,145 @@
+"""Saving large arrays, such as recorded sequences, as a snapshot plus a journal of changes.
+
+Rewriting the whole of a large state each time part of it changes makes every save as slow as the
+state is large. An :class:`ArrayJournal` keeps an ``array`` in two files: a snapshot of the whole
+array, and an append-only journal of the elements changed since the snapshot was written. Saving
+appends only the changed elements, and loading replays the journal over the snapshot. Once the
+journal has grown as large as the snapshot, :meth:`~ArrayJournal.compact` rewrites the snapshot and
+empties the journal. Scripts should save and compact from an idle point of their main loop::
+
+    steps = array("f", bytearray(4 * 64))
+    journal = ArrayJournal("saved_state_MySequencer", steps, "f")
+    journal.load()
+
+    # in a handler
+    steps[step] = voltage
+    journal.mark(step)
+
+    # in the main loop
+    journal.flush()
+    if journal.needs_compaction:
+        journal.compact()
+"""
+import struct
+
+from file_utils import delete_file, read_chunks, save_file
+
+MAGIC = b"EJ"
+_HEADER_FORMAT = "<2sBH"  # magic, type code, number of values
+
+
+class ArrayJournal:
+    """Saves ``values``, an ``array`` of the given type code, to ``<filename>.bin`` and the changes
+    made since to ``<filename>.jnl``.
+
+    :param filename: The name of the files, without their extension
+    :param values: The array to save and load, which is updated in place
+    :param typecode: The ``array`` type code of ``values``
+    """
+
+    def __init__(self, filename: str, values, typecode: str):
+        self.snapshot_filename = f"{filename}.bin"
+        self.journal_filename = f"{filename}.jnl"
+        self.values = values
+        self.typecode = typecode
+        self.length = len(values)
+        self.journal_entries = 0
+
+        self._header = struct.pack(_HEADER_FORMAT, MAGIC, ord(typecode), self.length)
+        self._entry_format = "<H" + typecode
+        self._entry_size = struct.calcsize(self._entry_format)
+        self._values_size = struct.calcsize(typecode) * self.length
+        self._changed = bytearray(self.length)
+        self._dirty = False
+        # Preallocated, so that flushing doesn't allocate in proportion to the changes.
+        self._buffer = bytearray(self._entry_size * self.length)
+
+    @property
+    def dirty(self) -> bool:
+        """True if values were marked as changed since the last flush."""
+        return self._dirty
+
+    @property
+    def needs_compaction(self) -> bool:
+        """True once the journal is at least as large as the snapshot."""
+        return self.journal_entries * self._entry_size >= self._values_size
+
+    def mark(self, index: int):
+        """Note that ``values[index]`` has changed. Cheap enough to call from a handler."""
+        self._changed[index] = 1
+        self._dirty = True
+
+    def mark_range(self, start: int, stop: int):
+        """Note that the values from ``start`` up to, but not including, ``stop`` have changed."""
+        for index in range(start, stop):
+            self._changed[index] = 1
+        self._dirty = True
+
+    def flush(self) -> int:
+        """Append the values marked as changed to the journal. Returns the number of values saved."""
+        if not self._dirty:
+            return 0
+        self._dirty = False  # before saving, so that a change made meanwhile is kept
+        count = 0
+        for index in range(self.length):
+            if self._changed[index]:
+                self._changed[index] = 0
+                struct.pack_into(
+                    self._entry_format,
+                    self._buffer,
+                    count * self._entry_size,
+                    index,
+                    self.values[index],
+                )
+                count += 1
+        with open(self.journal_filename, "ab") as file:
+            file.write(memoryview(self._buffer)[: count * self._entry_size])
+        self.journal_entries += count
+        return count
+
+    def compact(self):
+        """Save every value to the snapshot and empty the journal."""
+
+        def write(file):
+            file.write(self._header)
+            file.write(self.values)
+
+        self.flush()  # so that replaying a journal left over by a power cut changes nothing
+        save_file(self.snapshot_filename, write, "wb")
+        delete_file(self.journal_filename)
+        self.journal_entries = 0
+
+    def load(self) -> bool:
+        """Read the snapshot into ``values`` and replay the journal over it. Values missing from
+        both are set to zero. Returns False if there was nothing to load."""
+        loaded = self._read_snapshot()
+        self.journal_entries = 0
+        remainder = 0
+        # The journal is read in chunks through the flush buffer, so loading needs no more memory
+        # however long the journal has grown.
+        for chunk in read_chunks(self.journal_filename, self._buffer):
+            count = len(chunk) // self._entry_size
+            for entry in range(count):
+                index, value = struct.unpack_from(
+                    self._entry_format, chunk, entry * self._entry_size
+                )
+                if index < self.length:
+                    self.values[index] = value
+            self.journal_entries += count
+            remainder = len(chunk) % self._entry_size
+        if remainder:
+            # The last entry was cut short, start afresh rather than append after it.
+            self.compact()
+        return loaded or self.journal_entries > 0 or remainder > 0
+
+    def _read_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_filename, "rb") as file:
+                if file.read(len(self._header)) == self._header:
+                    if file.readinto(self.values) == self._values_size:
+                        return True
+        except OSError:
+            pass
+        for index in range(self.length):
+            self.values[index] = 0
+        return False
@@ -0,0 +1,298 @@
+"""Declared binary formats for a script's saved state.
+
+``EuroPiScript.save_state_json()`` is simple to use, but building and parsing the JSON string of a
+large state, such as a sequencer's banks of steps, takes time and several times the state's size in
+heap. A :class:`StateSchema` instead declares the fields of the state and their binary types, so
+that :meth:`~europi_script.EuroPiScript.save_state_struct` can write the state straight from its
+values and arrays::
+
+    from state_schema import StateSchema, boolean, fixed, integer, packed_array
+
+    STATE = StateSchema(
+        [
+            integer("step", bits=8, signed=False),
+            fixed("swing", scale=100),
+            boolean("running", default=True),
+            packed_array("voltages", "f", 6 * 64),
+        ]
+    )
+
+    class Sequencer(EuroPiScript):
+        def __init__(self):
+            super().__init__()
+            self.state = self.load_state_struct(STATE)
+
+        def save_state(self):
+            self.save_state_struct(self.state, STATE)
+
+A saved state starts with a header holding the schema's version, followed by the scalar fields and
+then the arrays, in the order they are declared. If the layout of the state changes, declare a new
+schema with a higher version and the old one as its ``previous``, so that states saved with the old
+layout are still loaded.
+"""
+import struct
+from array import array
+
+MAGIC = b"ES"
+_INTEGER_FORMATS = {8: "b", 16: "h", 32: "i"}
+
+
+class StateField:
+    """Base class for the fields of a :class:`StateSchema`.
+
+    :param name: The key of the field's value in the state dict
+    :param default: The value used when no state has been saved
+    """
+
+    def __init__(self, name: str, default):
+        self.name = name
+        self.default = default
+
+
+class ScalarField(StateField):
+    """A field holding one integer, packed with the given ``struct`` format character. Values
+    outside of ``low`` and ``high`` are clamped when saved."""
+
+    def __init__(self, name: str, format: str, default, low: int, high: int):
+        super().__init__(name, default)
+        self.format = format
+        self.low = low
+        self.high = high
+
+    def encode(self, value) -> int:
+        return min(max(int(value), self.low), self.high)
+
+    def decode(self, raw: int):
+        return raw
+
+
+class FixedPointField(ScalarField):
+    """A field holding a number with a fixed number of decimals, saved as an integer multiple of
+    ``1 / scale``."""
+
+    def __init__(self, name: str, format: str, default: float, low: int, high: int, scale: int):
+        super().__init__(name, format, default, low, high)
+        self.scale = scale
+
+    def encode(self, value) -> int:
+        return super().encode(round(value * self.scale))
+
+    def decode(self, raw: int) -> float:
+        return raw / self.scale
+
+
+class BooleanField(ScalarField):
+    """A field holding True or False, saved in one byte."""
+
+    def __init__(self, name: str, default: bool):
+        super().__init__(name, "B", default, 0, 1)
+
+    def encode(self, value) -> int:
+        return 1 if value else 0
+
+    def decode(self, raw: int) -> bool:
+        return bool(raw)
+
+
+class ArrayField(StateField):
+    """A field holding an ``array`` of ``length`` numbers of the given type code, saved and loaded
+    in place as raw bytes. The value must be an array of this type code, such as the one returned
+    by :meth:`new`, or a list, which is converted when saved.
+    """
+
+    def __init__(self, name: str, typecode: str, length: int, default=0):
+        super().__init__(name, default)
+        self.typecode = typecode
+        self.length = length
+        self.size = struct.calcsize(typecode) * length
+
+    def new(self) -> array:
+        """Return a new array filled with the default value."""
+        values = array(self.typecode, bytearray(self.size))
+        if self.default:
+            self.fill(values)
+        return values
+
+    def fill(self, values):
+        for i in range(self.length):
+            values[i] = self.default
+
+
+def integer(name: str, default: int = 0, bits: int = 16, signed: bool = True) -> ScalarField:
+    """A helper function to declare an integer field.
+
+    :param name: The key of the field's value in the state dict
+    :param default: The value used when no state has been saved
+    :param bits: The size of the saved integer, 8, 16 or 32 bits
+    :param signed: False if the value is never negative, which doubles its range
+    """
+    if bits not in _INTEGER_FORMATS:
+        raise ValueError(f"integer fields have 8, 16 or 32 bits, got: {bits}")
+    if signed:
+        return ScalarField(
+            name, _INTEGER_FORMATS[bits], default, -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+        )
+    return ScalarField(name, _INTEGER_FORMATS[bits].upper(), default, 0, (1 << bits) - 1)
+
+
+def fixed(
+    name: str, default: float = 0.0, scale: int = 1000, bits: int = 16, signed: bool = True
+) -> FixedPointField:
+    """A helper function to declare a fixed-point field, e.g. a voltage saved in millivolts with
+    ``scale=1000``.
+
+    :param name: The key of the field's value in the state dict
+    :param default: The value used when no state has been saved
+    :param scale: The number of steps per unit
+    :param bits: The size of the saved integer, 8, 16 or 32 bits
+    :param signed: False if the value is never negative, which doubles its range
+    """
+    field = integer(name, bits=bits, signed=signed)
+    return FixedPointField(name, field.format, default, field.low, field.high, scale)
+
+
+def boolean(name: str, default: bool = False) -> BooleanField:
+    """A helper function to declare a boolean field.
+
+    :param name: The key of the field's value in the state dict
+    :param default: The value used when no state has been saved
+    """
+    return BooleanField(name, default)
+
+
+def packed_array(name: str, typecode: str, length: int, default=0) -> ArrayField:
+    """A helper function to declare an array field.
+
+    :param name: The key of the field's value in the state dict
+    :param typecode: The ``array`` type code of the values, e.g. ``"B"`` or ``"f"``
+    :param length: The number of values
+    :param default: The value of every element when no state has been saved
+    """
+    return ArrayField(name, typecode, length, default)
+
+
+class StateSchema:
+    """The layout of a script's saved state: a version and a list of fields.
+
+    :param fields: The fields of the state, declared with :func:`integer`, :func:`fixed`,
+        :func:`boolean` and :func:`packed_array`
+    :param version: The version of this layout, from 0 to 255
+    :param previous: The schema of the previous version, used to load states saved with it
+    """
+
+    def __init__(self, fields: "List[StateField]", version: int = 1, previous=None):
+        if not 0 <= version <= 255:
+            raise ValueError(f"schema version must be between 0 and 255, got: {version}")
+        self.fields = {}
+        for field in fields:
+            if field.name in self.fields:
+                raise ValueError(f"state field {field.name} is already defined")
+            self.fields[field.name] = field
+        self.version = version
+        self.previous = previous
+
+        self._header = MAGIC + bytes([version])
+        self._scalars = [field for field in fields if isinstance(field, ScalarField)]
+        self._arrays = [field for field in fields if isinstance(field, ArrayField)]
+        self._format = "<" + "".join(field.format for field in self._scalars)
+        # Preallocated, so that saving the scalar fields allocates nothing in proportion to them.
+        self._buffer = bytearray(struct.calcsize(self._format))
+
+    @property
+    def size(self) -> int:
+        """The size of a saved state in bytes."""
+        return len(self._header) + len(self._buffer) + sum(field.size for field in self._arrays)
+
+    def default_state(self, state: dict = None) -> dict:
+        """Return a state holding the default value of every field. If ``state`` is given, it is
+        filled in, its arrays in place, and returned."""
+        if state is None:
+            state = {}
+        for field in self._scalars:
+            state[field.name] = field.default
+        for field in self._arrays:
+            values = state.get(field.name)
+            if values is None or len(values) != field.length:
+                state[field.name] = field.new()
+            else:
+                field.fill(values)
+        return state
+
+    def write(self, file, state: dict):
+        """Write ``state`` to a file opened in binary mode."""
+        for field in self._arrays:
+            if len(state[field.name]) != field.length:
+                raise ValueError(
+                    f"state field {field.name} holds {field.length} values, "
+                    f"got: {len(state[field.name])}"
+                )
+        file.write(self._header)
+        if self._scalars:
+            struct.pack_into(
+                self._format,
+                self._buffer,
+                0,
+                *[field.encode(state[field.name]) for field in self._scalars],
+            )
+            file.write(self._buffer)
+        for field in self._arrays:
+            values = state[field.name]
+            if isinstance(values, list):
+                values = array(field.typecode, values)
+            file.write(values)
+
+    def read(self, file, state: dict = None) -> dict:
+        """Read a state from a file opened in binary mode. States saved with a previous version of
+        the schema are converted, keeping the fields with the same name. If the file doesn't hold a
+        state of a known version, the defaults are returned.
+
+        If ``state`` is given, it is filled in and returned, and its arrays are read into in place.
+        """
+        header = file.read(len(self._header))
+        if len(header) != len(self._header) or header[: len(MAGIC)] != MAGIC:
+            return self.default_state(state)
+        schema = self
+        while schema is not None and schema.version != header[-1]:
+            schema = schema.previous
+        if schema is None:
+            return self.default_state(state)
+        if schema is not self:
+            saved = {}
+            if not schema._read_fields(file, saved):
+                return self.default_state(state)
+            return self._convert(saved, state)
+        if state is None:
+            state = {}
+        if not self._read_fields(file, state):
+            return self.default_state(state)
+        return state
+
+    def _read_fields(self, file, state: dict) -> bool:
+        if file.readinto(self._buffer) != len(self._buffer):
+            return False
+        if self._scalars:
+            values = struct.unpack_from(self._format, self._buffer)
+            for field, raw in zip(self._scalars, values):
+                state[field.name] = field.decode(raw)
+        for field in self._arrays:
+            values = state.get(field.name)
+            # only an array can be read into, a list is replaced like a missing value
+            if not isinstance(values, array) or len(values) != field.length:
+                values = state[field.name] = field.new()
+            if file.readinto(values) != field.size:
+                return False
+        return True
+
+    def _convert(self, saved: dict, state: dict = None) -> dict:
+        state = self.default_state(state)
+        for name, field in self.fields.items():
+            if name not in saved:
+                continue
+            if isinstance(field, ArrayField):
+                values = state[name]
+                old = saved[name]
+                for i in range(min(len(values), len(old))):
+                    values[i] = old[i]
+            else:
+                state[name] = saved[name]
+        return state
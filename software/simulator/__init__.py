@@ -0,0 +1,27 @@
+"""A host-side simulator of the EuroPi, for running scripts on a computer faster than real time.
+
+It builds on the hardware mocks in ``tests/mocks``, which are added to the import path along with
+the firmware and contrib scripts. See :class:`Simulator`, or run a script from the command line with
+``python3 -m simulator``.
+"""
+import os
+import sys
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in ("", "firmware", os.path.join("tests", "mocks")):
+    _path = os.path.join(_SOFTWARE_DIR, _path)
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+from simulator.clock import SimulationFinished, VirtualClock  # noqa: E402
+from simulator.hardware import Simulator  # noqa: E402
+from simulator.signals import (  # noqa: E402
+    Clock,
+    Constant,
+    Gate,
+    constant,
+    noise,
+    saw,
+    sine,
+    triangle,
+)
@@ -0,0 +1,54 @@
+"""Run a EuroPi script in the simulator from the command line, from the ``software`` directory::
+
+    $ python3 -m simulator contrib.euclid.EuclideanRhythms --seconds 10 --k1 0.3 --din-bpm 120
+
+Prints the number of changes of each output, how long the run took and the final display. The
+script runs in a temporary directory, so it starts without any saved state or configuration.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from simulator import Clock, Simulator
+
+import europi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a EuroPi script in the simulator.")
+    parser.add_argument("script", help="qualified class name, e.g. contrib.euclid.EuclideanRhythms")
+    parser.add_argument("--seconds", type=float, default=10.0, help="virtual seconds to run for")
+    parser.add_argument("--k1", type=float, default=0.5, help="knob 1 position, 0 to 1")
+    parser.add_argument("--k2", type=float, default=0.5, help="knob 2 position, 0 to 1")
+    parser.add_argument("--ain", type=float, default=0.0, help="analogue input voltage")
+    parser.add_argument("--din-bpm", type=float, help="clock the digital input at this tempo")
+    args = parser.parse_args()
+
+    sim = Simulator()
+    sim.set_knob(europi.k1, args.k1)
+    sim.set_knob(europi.k2, args.k2)
+    sim.set_analogue_input(args.ain)
+    if args.din_bpm:
+        sim.set_digital(europi.din, Clock(bpm=args.din_bpm))
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            start = time.perf_counter()
+            sim.run(args.script, args.seconds)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)  # before the directory is removed
+
+    for index, cv in enumerate(europi.cvs, 1):
+        changes = sim.output(cv)
+        final = changes[-1][1] if changes else 0.0
+        print(f"cv{index}: {len(changes): >6} changes, final {final:.3f}V")
+    print(f"{args.seconds:.2f} virtual seconds in {elapsed:.2f}s")
+    print(sim.display())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""A virtual monotonic clock for running EuroPi scripts faster than real time."""
+
+# MicroPython's ticks functions wrap around at 2**30 on the rp2 port.
+TICKS_PERIOD = 1 << 30
+TICKS_HALF_PERIOD = TICKS_PERIOD >> 1
+
+# Virtual time taken by reading the clock, roughly the cost of the call in MicroPython on the
+# EuroPi, so that scripts busy waiting on ticks still make progress.
+TICKS_COST_US = 10
+
+
+class SimulationFinished(BaseException):
+    """Raised by the clock once the simulation has run for its duration. It derives from
+    ``BaseException`` so that a script's ``except Exception`` doesn't swallow it."""
+
+
+class VirtualClock:
+    """A clock that only moves forward when the simulated script sleeps or does something that takes
+    time on the EuroPi, such as reading the ADC or writing to the display.
+
+    Event sources, such as digital inputs and timers, are registered with :meth:`add_source`.
+    Whenever time moves forward, the events that fall within the step are fired in order, with the
+    clock set to the time of each event.
+    """
+
+    def __init__(self):
+        self.now_us = 0
+        self.end_us = None
+        self._sources = []
+        self._dispatching = False
+        self._next_event_us = None  # time of the next event, None if it needs to be looked up
+
+    def add_source(self, source):
+        """Register a function of the current time that returns ``(time_us, fire)`` for its next
+        event, where ``fire`` is called with no arguments at that time, or None if it has none."""
+        self._sources.append(source)
+        self.reschedule()
+
+    def remove_source(self, source):
+        if source in self._sources:
+            self._sources.remove(source)
+        self.reschedule()
+
+    def reschedule(self):
+        """Call when a source's next event may have changed, e.g. a handler or timer was set."""
+        self._next_event_us = None
+
+    @property
+    def seconds(self):
+        return self.now_us / 1_000_000
+
+    # utime
+
+    def ticks_us(self):
+        self.advance(TICKS_COST_US)
+        return self.now_us % TICKS_PERIOD
+
+    def ticks_ms(self):
+        self.advance(TICKS_COST_US)
+        return (self.now_us // 1000) % TICKS_PERIOD
+
+    def ticks_add(self, ticks, delta):
+        return (ticks + delta) % TICKS_PERIOD
+
+    def ticks_diff(self, ticks1, ticks2):
+        return (ticks1 - ticks2 + TICKS_HALF_PERIOD) % TICKS_PERIOD - TICKS_HALF_PERIOD
+
+    def sleep_us(self, us):
+        self.advance(max(us, 0))
+
+    def advance(self, us):
+        """Move the clock forward, firing any events along the way.
+
+        Time spent while an event is being handled moves the clock without firing further events,
+        much like interrupts on the EuroPi don't nest.
+        """
+        target = self.now_us + us
+        if self.end_us is not None:
+            target = min(target, self.end_us)
+        if self._dispatching or (self._next_event_us is not None and target < self._next_event_us):
+            # nothing happens in this step, which is by far the most common case
+            self.now_us = max(self.now_us, target)
+        else:
+            self._dispatch(target)
+
+        if self.end_us is not None and self.now_us >= self.end_us:
+            raise SimulationFinished()
+
+    def _dispatch(self, target):
+        self._dispatching = True
+        try:
+            while True:
+                event = self._next_event()
+                self._next_event_us = event[0] if event else float("inf")
+                if not event or event[0] > target:
+                    break
+                self.now_us = max(self.now_us, event[0])
+                event[1]()
+        finally:
+            self._dispatching = False
+        self.now_us = max(self.now_us, target)
+
+    def _next_event(self):
+        next_event = None
+        for source in self._sources:
+            event = source(self.now_us)
+            if event and (not next_event or event[0] < next_event[0]):
+                next_event = event
+        return next_event
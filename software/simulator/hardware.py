@@ -0,0 +1,342 @@
+"""Simulated EuroPi hardware, driven by a :class:`~simulator.clock.VirtualClock`."""
+import sys
+
+import framebuf
+import machine
+import utime
+
+import europi
+from europi import (
+    INPUT_CALIBRATION_VALUES,
+    MAX_OUTPUT_VOLTAGE,
+    MAX_UINT16,
+    OUTPUT_CALIBRATION_VALUES,
+    LazyComponent,
+    clamp,
+)
+from europi_script import unload_module
+
+from simulator.clock import SimulationFinished, VirtualClock
+
+# Virtual time taken by hardware accesses from MicroPython on the EuroPi, in microseconds.
+ADC_READ_COST_US = 5
+PIN_READ_COST_US = 5
+PWM_WRITE_COST_US = 5
+I2C_BITS_PER_BYTE = 9  # 8 data bits and an acknowledge
+DRAW_CALL_COST_US = 10  # each frame buffer drawing call
+TEXT_CHAR_COST_US = 10  # each character drawn by text()
+FRAMEBUF_DRAWING_METHODS = (
+    "pixel",
+    "fill",
+    "fill_rect",
+    "hline",
+    "vline",
+    "line",
+    "rect",
+    "ellipse",
+    "poly",
+    "blit",
+)
+
+# The reading of the RP2040's temperature sensor, on ADC channel 4, at 27C.
+TEMPERATURE_SENSOR_CHANNEL = 4
+TEMPERATURE_SENSOR_READING = round(0.706 / 3.3 * MAX_UINT16)
+
+
+class Simulator:
+    """Runs EuroPi scripts on the host, against simulated hardware and a virtual clock::
+
+        from simulator import Clock, Simulator, sine
+
+        sim = Simulator()
+        sim.set_knob(k1, sine(0.5))
+        sim.set_digital(din, Clock(bpm=120))
+        sim.run("contrib.euclid.EuclideanRhythms", seconds=10)
+
+        sim.output(cv1)  # [(seconds, volts), ...] for every change of cv1
+        print(sim.display())
+
+    While the simulator is installed, with ``with sim:`` or during :meth:`run`:
+
+    * the ``utime`` functions, and ``time`` for scripts imported from then on, use the virtual clock
+    * ADC reads return the knob positions and input voltages given by :meth:`set_knob` and
+      :meth:`set_analogue_input`
+    * the digital inputs follow the signals given by :meth:`set_digital`, and their handlers are
+      called at each edge
+    * every duty cycle written to an output is recorded with its time
+    * ``machine.Timer`` callbacks are called on time
+
+    The EuroPi's components are rebuilt when the simulator is installed, so each run starts from a
+    freshly booted module. Reading the hardware, drawing and writing to the display take
+    virtual time, so a script's busy loop still moves the clock forward. A loop that does none of
+    these would never end. Scripts using ``run_async()`` are not supported, as asyncio uses the
+    real clock.
+
+    The time taken by the script's own Python code isn't counted, so loops run more often than
+    they would on a EuroPi. Scripts that redraw the display on every iteration of a busy loop run
+    only a few times faster than real time, which ``test_simulation_speed`` checks.
+    """
+
+    def __init__(self):
+        self.clock = VirtualClock()
+        self.analogue = {}  # pin id: (function of time in seconds, conversion to a raw reading)
+        self.digital = {}  # pin id: digital signal
+        self.duties = {}  # pin id: [(time_us, duty), ...]
+        self._pins = {}  # pin id: Pin with an IRQ handler
+        self._handled_us = {}  # pin id: time of the last edge handled, edges after it are pending
+        self._timers = {}  # Timer: [deadline_us, period_us or None, callback]
+        self._patches = []
+        self.clock.add_source(self._next_edge)
+        self.clock.add_source(self._next_timer)
+
+    # Inputs
+
+    def set_knob(self, knob, signal):
+        """Drive a knob with a position between 0 and 1, or a function of time returning one."""
+        self.analogue[knob.pin_id] = (_as_signal(signal), _knob_reading)
+
+    def set_analogue_input(self, signal, ain=None):
+        """Drive the analogue input with a voltage, or a function of time returning one."""
+        self.analogue[(ain or europi.ain).pin_id] = (_as_signal(signal), _input_reading)
+
+    def set_digital(self, reader, signal):
+        """Drive a digital input or button with a signal from :mod:`simulator.signals`, e.g.
+        ``Clock(bpm=120)`` or ``Gate((1.0, 1.5))``, or hold it at a constant 0 or 1."""
+        if isinstance(signal, int):
+            from simulator.signals import Constant
+
+            signal = Constant(signal)
+        self.digital[reader.pin.id] = signal
+        self.clock.reschedule()
+
+    # Outputs
+
+    def output(self, cv):
+        """Return the ``(seconds, volts)`` of every change of the given output, as recorded during
+        the simulation. Voltages are recovered from the duty cycles with the output calibration."""
+        duties = self.duties.get(cv.pin.pin.id, [])
+        return [(t / 1_000_000, _duty_to_voltage(duty)) for t, duty in duties]
+
+    def display(self, on="#", off="."):
+        """Return the display's frame buffer as text, one line per row of pixels."""
+        oled = europi.oled
+        return "\n".join(
+            "".join(on if oled.pixel(x, y) else off for x in range(oled.width))
+            for y in range(oled.height)
+        )
+
+    # Running scripts
+
+    def run(self, script, seconds):
+        """Run a ``EuroPiScript``, given as a class or its qualified class name, for ``seconds``
+        of virtual time. The script's module is imported afresh, so that it uses the virtual clock.
+        Returns the script instance."""
+        with self:
+            script_class = self.load_script(script)
+            self.clock.end_us = self.clock.now_us + int(seconds * 1_000_000)
+            instance = None
+            try:
+                instance = script_class()
+                instance.main()
+            except SimulationFinished:
+                pass
+            finally:
+                self.clock.end_us = None
+                if europi.oled.constructed:
+                    # send the changes still waiting in double buffered mode, as service() would have
+                    europi.oled.flush()
+            return instance
+
+    @staticmethod
+    def load_script(script):
+        if not isinstance(script, str):
+            if script.__module__ == "__main__":
+                return script  # can't be imported again
+            script = f"{script.__module__}.{script.__qualname__}"
+        module, clazz = script.rsplit(".", 1)
+        unload_module(module)
+        return getattr(__import__(module, None, None, [clazz]), clazz)
+
+    # Installation
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *args):
+        self.uninstall()
+
+    def install(self):
+        """Connect the mocked hardware to the simulator."""
+        sim = self
+        i2c_writeto = machine.I2C.writeto
+        framebuf_text = framebuf.FrameBuffer.text
+
+        def read_u16(adc):
+            sim.clock.advance(ADC_READ_COST_US)
+            # internal channels, such as the temperature sensor, are given as an int
+            return sim._read_adc(adc.pin if isinstance(adc.pin, int) else adc.pin.id)
+
+        def pin_value(pin, *args):
+            if args:
+                return
+            sim.clock.advance(PIN_READ_COST_US)
+            signal = sim.digital.get(pin.id)
+            # the digital inputs are inverted by the EuroPi's input circuit
+            return 1 if signal is None or not signal.level(sim.clock.now_us) else 0
+
+        def irq(pin, handler=None, trigger=None, hard=False):
+            pin.handler = handler
+            if handler:
+                sim._pins[pin.id] = pin
+                sim._handled_us[pin.id] = sim.clock.now_us
+            else:
+                sim._pins.pop(pin.id, None)
+            sim.clock.reschedule()
+
+        def duty_u16(pwm, duty):
+            sim.clock.advance(PWM_WRITE_COST_US)
+            sim.duties.setdefault(pwm.pin.id, []).append((sim.clock.now_us, duty))
+
+        def writeto(i2c, addr, buf, *args):
+            i2c_writeto(i2c, addr, buf, *args)
+            sim.clock.advance((1 + len(buf)) * I2C_BITS_PER_BYTE * 1_000_000 // i2c.freq)
+
+        def drawing(method):
+            def draw(fb, *args):
+                sim.clock.advance(DRAW_CALL_COST_US)
+                return method(fb, *args)
+
+            return draw
+
+        def text(fb, s, *args):
+            sim.clock.advance(DRAW_CALL_COST_US + TEXT_CHAR_COST_US * len(s))
+            return framebuf_text(fb, s, *args)
+
+        def timer_init(
+            timer, *args, mode=machine.Timer.PERIODIC, freq=None, period=None, callback=None
+        ):
+            period_us = 1_000_000 / freq if freq else (period or 0) * 1000
+            sim._timers[timer] = [
+                sim.clock.now_us + period_us,
+                period_us if mode == machine.Timer.PERIODIC else None,
+                callback,
+            ]
+            sim.clock.reschedule()
+
+        def timer_deinit(timer):
+            sim._timers.pop(timer, None)
+            sim.clock.reschedule()
+
+        self._patch(utime, "clock", self.clock)
+        self._patch(sys.modules, "time", utime)
+        self._patch(europi, "time", utime)
+        self._patch(machine.ADC, "read_u16", read_u16)
+        self._patch(machine.Pin, "value", pin_value)
+        self._patch(machine.Pin, "irq", irq)
+        self._patch(machine.PWM, "duty_u16", duty_u16)
+        self._patch(machine.I2C, "writeto", writeto)
+        for name in FRAMEBUF_DRAWING_METHODS:
+            self._patch(framebuf.FrameBuffer, name, drawing(getattr(framebuf.FrameBuffer, name)))
+        self._patch(framebuf.FrameBuffer, "text", text)
+        self._patch(machine.Timer, "init", timer_init)
+        self._patch(machine.Timer, "deinit", timer_deinit)
+        _reset_components()
+
+    def uninstall(self):
+        """Restore the mocked hardware."""
+        while self._patches:
+            target, name, value = self._patches.pop()
+            if isinstance(target, dict):
+                target[name] = value
+            else:
+                setattr(target, name, value)
+        self._pins.clear()
+        self._handled_us.clear()
+        self._timers.clear()
+
+    def _patch(self, target, name, value):
+        if isinstance(target, dict):
+            self._patches.append((target, name, target[name]))
+            target[name] = value
+        else:
+            self._patches.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+    # Hardware models
+
+    def _read_adc(self, pin_id):
+        if pin_id not in self.analogue:
+            return TEMPERATURE_SENSOR_READING if pin_id == TEMPERATURE_SENSOR_CHANNEL else 0
+        signal, to_reading = self.analogue[pin_id]
+        return int(clamp(to_reading(signal(self.clock.seconds)), 0, MAX_UINT16))
+
+    def _next_edge(self, now_us):
+        # Edges are tracked per pin, so that an edge that happens while another pin's handler is
+        # running is handled late rather than missed.
+        next_event = None
+        for pin_id, pin in self._pins.items():
+            signal = self.digital.get(pin_id)
+            edge = signal.next_edge_us(self._handled_us[pin_id]) if signal else None
+            if edge is not None and (not next_event or edge < next_event[0]):
+                next_event = (edge, self._edge_handler(pin, edge))
+        return next_event
+
+    def _edge_handler(self, pin, edge):
+        def handle():
+            self._handled_us[pin.id] = edge
+            if pin.handler:
+                pin.handler(pin)
+
+        return handle
+
+    def _next_timer(self, now_us):
+        next_event = None
+        for timer, (deadline, _, _) in self._timers.items():
+            if not next_event or deadline < next_event[0]:
+                next_event = (deadline, lambda timer=timer: self._fire_timer(timer))
+        return next_event
+
+    def _fire_timer(self, timer):
+        deadline, period, callback = self._timers[timer]
+        if period:
+            self._timers[timer][0] = deadline + period
+        else:
+            del self._timers[timer]
+        if callback:
+            callback(timer)
+
+
+def _as_signal(signal):
+    return signal if callable(signal) else (lambda t: signal)
+
+
+def _knob_reading(position):
+    # the knobs read a high value when turned fully anticlockwise
+    return (1 - position) * MAX_UINT16
+
+
+def _input_reading(volts):
+    calibration = INPUT_CALIBRATION_VALUES
+    if len(calibration) == 2:
+        return calibration[0] + volts / 10 * (calibration[1] - calibration[0])
+    index = min(max(int(volts), 0), len(calibration) - 2)
+    return calibration[index] + (volts - index) * (calibration[index + 1] - calibration[index])
+
+
+def _duty_to_voltage(duty):
+    calibration = OUTPUT_CALIBRATION_VALUES
+    for index in range(len(calibration) - 1):
+        low, high = calibration[index], calibration[index + 1]
+        if duty <= high or index == len(calibration) - 2:
+            return round(min(index + (duty - low) / (high - low), MAX_OUTPUT_VOLTAGE), 3)
+
+
+def _reset_components():
+    """Forget the europi module's components, so that they are rebuilt on their next use."""
+    for value in vars(europi).values():
+        if isinstance(value, LazyComponent):
+            cls, args = value._cls, value._args
+            vars(value).clear()
+            LazyComponent.__init__(value, cls, *args)
+    europi._polled_readers.clear()
@@ -0,0 +1,106 @@
+"""Signals to drive the simulated inputs with.
+
+Analogue signals are functions of the time in seconds, returning a knob position between 0 and 1
+or a voltage for the analogue input. Any such function can be used, these are the common ones.
+
+Digital signals report their level at a time in microseconds, and when their next edge is, so that
+the simulator can fire the input's handlers at the right time.
+"""
+import math
+import random
+
+
+def constant(value):
+    return lambda t: value
+
+
+def sine(freq, low=0.0, high=1.0, phase=0.0):
+    """A sine wave of ``freq`` Hz between ``low`` and ``high``, starting at its midpoint."""
+    middle, amplitude = (high + low) / 2, (high - low) / 2
+    return lambda t: middle + amplitude * math.sin(2 * math.pi * (freq * t + phase))
+
+
+def saw(freq, low=0.0, high=1.0):
+    """A rising sawtooth wave of ``freq`` Hz between ``low`` and ``high``."""
+    return lambda t: low + (high - low) * ((freq * t) % 1.0)
+
+
+def triangle(freq, low=0.0, high=1.0):
+    """A triangle wave of ``freq`` Hz between ``low`` and ``high``, starting at ``low``."""
+    return lambda t: low + (high - low) * (1 - abs(2 * ((freq * t) % 1.0) - 1))
+
+
+def noise(low=0.0, high=1.0, seed=0):
+    """Uniform random values between ``low`` and ``high``, a new value on every read."""
+    rng = random.Random(seed)
+    return lambda t: rng.uniform(low, high)
+
+
+class Clock:
+    """A square wave clock, given either its frequency in Hz or its tempo in BPM.
+
+    :param freq: pulses per second
+    :param bpm: beats per minute, at ``ppqn`` pulses per beat
+    :param duty: the fraction of each period that the clock is high
+    :param start: the time in seconds of the first rising edge
+    """
+
+    def __init__(self, freq=None, bpm=None, ppqn=1, duty=0.5, start=0.0):
+        if (freq is None) == (bpm is None):
+            raise ValueError("Clock expects either freq or bpm")
+        if freq is None:
+            freq = bpm * ppqn / 60
+        self.period_us = 1_000_000 / freq
+        self.high_us = self.period_us * duty
+        self.start_us = start * 1_000_000
+
+    def level(self, t_us):
+        if t_us < self.start_us:
+            return 0
+        return 1 if (t_us - self.start_us) % self.period_us < self.high_us else 0
+
+    def next_edge_us(self, t_us):
+        if t_us < self.start_us:
+            return math.ceil(self.start_us)
+        cycle = (t_us - self.start_us) // self.period_us
+        period_start = self.start_us + cycle * self.period_us
+        for edge in (period_start + self.high_us, period_start + self.period_us):
+            if math.ceil(edge) > t_us:
+                return math.ceil(edge)
+        return math.ceil(period_start + self.period_us + self.high_us)
+
+
+class Constant:
+    """Held at ``level``, 0 or 1, with no edges."""
+
+    def __init__(self, level):
+        self.value = 1 if level else 0
+
+    def level(self, t_us):
+        return self.value
+
+    def next_edge_us(self, t_us):
+        return None
+
+
+class Gate:
+    """High during each of the given ``(start, end)`` intervals in seconds, low otherwise. Useful for
+    button presses::
+
+        sim.set_digital(b1, Gate((1.0, 1.1)))  # press button 1 for 100ms after a second
+    """
+
+    def __init__(self, *intervals):
+        self.intervals = sorted(
+            (round(start * 1_000_000), round(end * 1_000_000)) for start, end in intervals
+        )
+
+    def level(self, t_us):
+        return 1 if any(start <= t_us < end for start, end in self.intervals) else 0
+
+    def next_edge_us(self, t_us):
+        for start, end in self.intervals:
+            for edge in (start, end):
+                if edge > t_us:
+                    return edge
+        return None
@@ -0,0 +1,232 @@
+"""Micro-benchmarks for the firmware's hot paths and the contrib scripts' per-clock handlers.
+
+Each benchmark calls a function many times against the hardware mocks, and records:
+
+* how many times the function calls into the hardware, e.g. ``ADC.read_u16``, per call
+* how long a call takes, relative to a fixed pure Python workload timed alongside it, which evens
+  out changes in the load on the host
+
+The call counts are the same on every host, and are compared with the baselines committed in
+``baselines.json``. A benchmark fails if it calls into the hardware more often than its baseline, as
+that is slower on the EuroPi whatever the host.
+
+Timings don't carry over from one host or Python version to another, so they are only compared with
+timings taken on the same interpreter and platform, which are kept in ``timings.json``. That file is
+not committed. A benchmark that is slower than its timing by more than the threshold is only
+reported, unless ``--benchmark-check`` is given. Run from the ``software`` directory::
+
+    $ pytest tests/benchmarks                     # report regressions
+    $ pytest tests/benchmarks --benchmark-check   # fail on timing regressions too
+    $ pytest tests/benchmarks --benchmark-update  # accept the current results as the baselines
+
+Timings on the host only approximate those on the EuroPi, but the relative cost of two versions of a
+function usually carries over. Take them before and after a change, on the same machine.
+"""
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+import machine
+import pytest
+import utime
+
+import europi
+from europi_script import unload_module
+
+BASELINES_FILE = Path(__file__).parent / "baselines.json"
+TIMINGS_FILE = Path(__file__).parent / "timings.json"
+
+# Timings are only compared with those taken on the same interpreter and platform.
+HOST = "-".join(
+    [
+        sys.implementation.name,
+        ".".join(str(part) for part in sys.version_info[:2]),
+        sys.platform,
+        platform.machine(),
+    ]
+)
+
+ITERATIONS = 200
+ROUNDS = 5
+MIN_ROUND_SECONDS = 0.01  # short rounds are dominated by timer resolution and noise
+
+# The hardware access counted by the benchmarks, as (class, method) pairs.
+HARDWARE_CALLS = [
+    (machine.ADC, "read_u16"),
+    (machine.Pin, "value"),
+    (machine.PWM, "duty_u16"),
+    (machine.I2C, "writeto"),
+]
+
+_results = {}
+_regressions = []
+
+
+def _time_round(func, args, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(*args)
+    return time.perf_counter() - start
+
+
+def _iterations_per_round(func, args, iterations):
+    elapsed = _time_round(func, args, iterations)
+    if elapsed < MIN_ROUND_SECONDS:
+        iterations = int(iterations * MIN_ROUND_SECONDS / max(elapsed, 1e-6)) + 1
+    return iterations
+
+
+def _reference_workload():
+    total = 0
+    for i in range(100):
+        total += i * i % 7
+    return total
+
+
+def measure(func, args, iterations):
+    """Return the best time per call of ``func``, in microseconds, and the same relative to the
+    reference workload. The rounds of the two are interleaved, so that both see the same load on
+    the host."""
+    iterations = _iterations_per_round(func, args, iterations)
+    reference_iterations = _iterations_per_round(_reference_workload, (), ITERATIONS)
+    best = best_reference = float("inf")
+    for _ in range(ROUNDS):
+        best = min(best, _time_round(func, args, iterations) / iterations)
+        best_reference = min(
+            best_reference,
+            _time_round(_reference_workload, (), reference_iterations) / reference_iterations,
+        )
+    return best * 1_000_000, best / best_reference
+
+
+def load_baselines(path=BASELINES_FILE):
+    if not path.exists():
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baselines(baselines, path=BASELINES_FILE):
+    with open(path, "w") as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+@pytest.fixture(autouse=True)
+def mock_time_module(monkeypatch, tmp_path):
+    """Use the utime mock for ``time`` as well, as the contrib scripts import the ticks functions
+    from it. Scripts save their state in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sys.modules, "time", utime)
+    monkeypatch.setattr(europi, "time", utime)
+    europi.reset_state()
+
+
+@pytest.fixture
+def load():
+    """Import a module afresh and return the named attribute, e.g.
+    ``load("contrib.euclid.EuclidGenerator")``."""
+
+    def load(name):
+        module, attribute = name.rsplit(".", 1)
+        unload_module(module)
+        return getattr(__import__(module, None, None, [attribute]), attribute)
+
+    return load
+
+
+@pytest.fixture
+def benchmark(request, monkeypatch):
+    """Benchmark a function with the given arguments::
+
+    def test_voltage(benchmark):
+        benchmark(cv1.voltage, 5.5)
+
+    The random module is seeded first, so that the hardware calls of scripts using it are
+    repeatable.
+    """
+    name = request.node.name
+
+    def run(func, *args, iterations=ITERATIONS):
+        random.seed(0)
+        counts = {f"{cls.__name__}.{method}": 0 for cls, method in HARDWARE_CALLS}
+        with monkeypatch.context() as patch:
+            for cls, method in HARDWARE_CALLS:
+                key = f"{cls.__name__}.{method}"
+                patch.setattr(cls, method, _counting(getattr(cls, method), counts, key))
+            for _ in range(iterations):
+                func(*args)
+        calls = {key: round(count / iterations, 2) for key, count in counts.items() if count}
+
+        us, cost = measure(func, args, iterations)
+        result = {"calls": calls, "cost": round(cost, 3)}
+        _results[name] = result
+        _check(request.config, name, result, us)
+        return result
+
+    return run
+
+
+def _counting(func, counts, key):
+    def counted(*args, **kwargs):
+        counts[key] += 1
+        return func(*args, **kwargs)
+
+    return counted
+
+
+def _check(config, name, result, us):
+    if config.getoption("--benchmark-update", False):
+        return
+
+    baseline = load_baselines().get(name)
+    if baseline is None:
+        return
+    more_calls = {
+        key: (baseline["calls"].get(key, 0), count)
+        for key, count in result["calls"].items()
+        if count > baseline["calls"].get(key, 0)
+    }
+    if more_calls:
+        pytest.fail(
+            f"{name} calls into the hardware more often than its baseline, (before, after): "
+            f"{more_calls}. Run with --benchmark-update if this is intended."
+        )
+
+    cost = load_baselines(TIMINGS_FILE).get(HOST, {}).get(name)
+    if cost is None:
+        return
+    threshold = config.getoption("--benchmark-threshold", 0.5)
+    if result["cost"] > cost * (1 + threshold):
+        message = (
+            f"{name} is {result['cost'] / cost - 1:.0%} slower than its timing on {HOST} "
+            f"({us:.1f}us per call)"
+        )
+        if config.getoption("--benchmark-check", False):
+            pytest.fail(message)
+        _regressions.append(message)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not _results:
+        return
+    if config.getoption("--benchmark-update", False):
+        baselines = load_baselines()
+        timings = load_baselines(TIMINGS_FILE)
+        host_timings = timings.setdefault(HOST, {})
+        for name, result in _results.items():
+            baselines[name] = {"calls": result["calls"]}
+            host_timings[name] = result["cost"]
+        save_baselines(baselines)
+        save_baselines(timings, TIMINGS_FILE)
+        terminalreporter.write_line(
+            f"Wrote {len(_results)} benchmark results to {BASELINES_FILE}, "
+            f"and their timings on {HOST} to {TIMINGS_FILE}"
+        )
+    elif _regressions:
+        terminalreporter.section("benchmark regressions")
+        for message in _regressions:
+            terminalreporter.write_line(message)
@@ -0,0 +1,56 @@
+import pytest
+
+from europi import cv1, din
+
+
+@pytest.mark.parametrize("steps,pulses", [(16, 5), (32, 13)])
+def test_generate_euclidean_pattern(benchmark, load, steps, pulses):
+    generate_euclidean_pattern = load("contrib.euclid.generate_euclidean_pattern")
+    benchmark(generate_euclidean_pattern, steps, pulses, 2)
+
+
+def test_euclid_generator_advance(benchmark, load):
+    EuclidGenerator = load("contrib.euclid.EuclidGenerator")
+    benchmark(EuclidGenerator(cv1, steps=16, pulses=5, skip=0.1).advance)
+
+
+def test_consequencer_clock_trigger(benchmark, load):
+    load("contrib.consequencer.Consequencer")()
+    rising, falling = din._rising_handler, din._falling_handler
+
+    def clock():
+        rising()
+        falling()
+
+    benchmark(clock)
+
+
+def test_turing_machine_step(benchmark, load):
+    TuringMachine = load("contrib.turing_machine.TuringMachine")
+    benchmark(TuringMachine(16).step)
+
+
+def test_europi_turing_machine_step(benchmark, load):
+    script = load("contrib.turing_machine.EuroPiTuringMachine")()
+    benchmark(script.tm.step)
+
+
+def test_quantizer_scale_quantize(benchmark, load):
+    Quantizer = load("contrib.quantizer.Quantizer")
+    major = Quantizer([True, False, True, False, True, True, False, True, False, True, False, True])
+    benchmark(major.quantize, 3.14)
+
+
+def test_quantizer_script_quantize(benchmark, load):
+    script = load("contrib.quantizer.QuantizerScript")()
+    benchmark(script.quantize, 3.14)
+
+
+def test_polyrhythmic_sequence_play_next_step(benchmark, load):
+    script = load("contrib.polyrhythmic_sequencer.PolyrhythmSeq")()
+    benchmark(script.seqs[0].play_next_step)
+
+
+@pytest.mark.parametrize("attractor", ["Lorenz", "PanXuZhou", "Rossler", "Rikitake"])
+def test_strange_attractor_step(benchmark, load, attractor):
+    benchmark(load(f"contrib.strange_attractor.{attractor}")().step)
@@ -0,0 +1,80 @@
+import pytest
+
+from europi import OLED_HEIGHT, OLED_WIDTH, Display, ain, cv1, din, k1
+from europi_script import EuroPiScript
+from state_schema import StateSchema, packed_array
+
+# A bank of the CVecorder: 6 channels of 64 steps, in hundredths of a volt.
+BANK_CHANNELS = 6
+BANK_STEPS = 64
+
+
+def test_knob_sample_adc(benchmark):
+    benchmark(k1._sample_adc)
+
+
+def test_knob_percent(benchmark):
+    benchmark(k1.percent)
+
+
+def test_knob_range(benchmark):
+    benchmark(k1.range, 12)
+
+
+def test_analogue_input_read_voltage(benchmark):
+    benchmark(ain.read_voltage)
+
+
+@pytest.mark.parametrize("voltage", [0, 5.5])
+def test_output_voltage(benchmark, voltage):
+    benchmark(cv1.voltage, voltage)
+
+
+def test_output_voltage_mv(benchmark):
+    benchmark(cv1.voltage_mv, 5500)
+
+
+def test_output_on_off(benchmark):
+    def toggle():
+        cv1.on()
+        cv1.off()
+
+    benchmark(toggle)
+
+
+def test_digital_input_irq(benchmark):
+    din.debounce_delay = 0
+    din.handler(lambda: None)
+    benchmark(din._bounce_wrapper, din.pin)
+
+
+def test_display_centre_text(benchmark):
+    benchmark(Display(0, 1).centre_text, "Hello\nworld", iterations=20)
+
+
+def test_display_pixel_trace(benchmark):
+    # a scope-like trace of one pixel per column, moving on every frame
+    display = Display(0, 1)
+    phase = [0]
+
+    def draw():
+        display.fill(0)
+        for x in range(OLED_WIDTH):
+            display.pixel(x, (x + phase[0]) % OLED_HEIGHT, 1)
+        display.show()
+        phase[0] += 1
+
+    benchmark(draw, iterations=20)
+
+
+def test_save_state_json_bank(benchmark):
+    bank = [[step * 15 % 1000 for step in range(BANK_STEPS)] for _ in range(BANK_CHANNELS)]
+    benchmark(EuroPiScript().save_state_json, {"bank": bank}, iterations=20)
+
+
+def test_save_state_struct_bank(benchmark):
+    schema = StateSchema([packed_array("bank", "H", BANK_CHANNELS * BANK_STEPS)])
+    state = schema.default_state()
+    for i in range(BANK_CHANNELS * BANK_STEPS):
+        state["bank"][i] = i * 15 % 1000
+    benchmark(EuroPiScript().save_state_struct, state, schema, iterations=20)
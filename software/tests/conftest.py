@@ -11,6 +11,26 @@ sys.path.append(str(Path(__file__).parent.parent / "tests" / "mocks"))
 from mock_hardware import MockHardware
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks", "EuroPi benchmarks, see tests/benchmarks/conftest.py")
+    group.addoption(
+        "--benchmark-update",
+        action="store_true",
+        help="save the benchmark results as the new baselines",
+    )
+    group.addoption(
+        "--benchmark-check",
+        action="store_true",
+        help="fail benchmarks that are slower than their baseline by more than the threshold",
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.5,
+        help="the slowdown relative to the baseline that counts as a regression, default 0.5",
+    )
+
+
 @pytest.fixture
 def mockHardware(monkeypatch):
     return MockHardware(monkeypatch)
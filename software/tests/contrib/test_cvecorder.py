@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+from array import array
+
+import pytest
+import utime
+
+from europi import ain, b1, b2, din, k1
+from europi_script import unload_module
+from mock_hardware import MockHardware
+from state_journal import ArrayJournal
+
+
+@pytest.fixture
+def CVecorder(tmp_path, monkeypatch):
+    """Import the script with ``time`` mocked by ``utime``, saving its state in a temporary
+    directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sys.modules, "time", utime)
+    unload_module("contrib.cvecorder")
+    from contrib.cvecorder import CVecorder
+
+    yield CVecorder
+    unload_module("contrib.cvecorder")
+
+
+def record_pass(cvecorder, mockHardware, percent):
+    """Arm the active channel with b1, then record a whole pass of clocks from the analogue
+    input."""
+    b1._rising_handler()
+    mockHardware.set_analogue_input_percent(ain, percent)
+    for _ in range(cvecorder.stepLength):
+        din._rising_handler()
+
+
+def test_recording_is_saved_and_loaded(CVecorder, mockHardware: MockHardware):
+    cvecorder = CVecorder()
+    mockHardware.set_knob_percent(k1, 0.4)
+    cvecorder.getCvBank()
+    for _ in range(3):
+        b2._rising_handler()
+    assert (cvecorder.ActiveBank, cvecorder.ActiveCvr) == (2, 3)
+
+    record_pass(cvecorder, mockHardware, 0.125)
+    assert cvecorder.saveRequested
+    cvecorder.save_state()
+
+    # only the recorded channel is written
+    assert os.path.getsize("saved_state_CVecorder_2.jnl") == 64 * 6
+    assert not os.path.exists("saved_state_CVecorder_1.jnl")
+
+    bank = array("f", bytearray(4 * 6 * 64))
+    assert ArrayJournal("saved_state_CVecorder_2", bank, "f").load()
+    assert list(bank[3 * 64 : 4 * 64]) == [2.5] * 64
+    assert not any(bank[: 3 * 64]) and not any(bank[4 * 64 :])
+
+    loaded = CVecorder()
+    assert list(loaded.CVR[2][3]) == [2.5] * 64
+    assert list(loaded.CVR[2][2]) == [0] * 64
+
+
+def test_json_banks_are_converted(CVecorder):
+    bank = [[0] * 64 for _ in range(6)]
+    bank[1] = [125] * 64
+    with open("saved_state_CVecorder_0.txt", "w") as file:
+        json.dump(bank, file)
+
+    cvecorder = CVecorder()
+
+    assert list(cvecorder.CVR[0][1]) == [1.25] * 64
+    assert not os.path.exists("saved_state_CVecorder_0.txt")
+    assert os.path.exists("saved_state_CVecorder_0.bin")
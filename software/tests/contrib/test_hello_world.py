@@ -20,10 +20,7 @@ def test_toggle_enablement(hw):
     assert hw.enabled == False
 
 
-def test_save_load_state_json(hw, monkeypatch):
-    # Mock last_saved to return a deterministic time duration.
-    monkeypatch.setattr(hw, "last_saved", lambda *args: 6000)
-
+def test_save_load_state_json(hw):
     # Verity initial state.
     assert hw.load_state_json() == {}
     assert hw.counter == 0
@@ -37,9 +34,20 @@ def test_save_load_state_json(hw, monkeypatch):
     # Verify state modified.
     assert hw.counter == 1
     assert hw.enabled == False
+    assert hw.state_dirty
 
     # Test save and load state behaves as expected.
-    hw.save_state()
+    assert hw.flush_state(force=True)
     with open(hw._state_filename, 'r') as f:
         assert f.read() == '{"counter": 1, "enabled": false}'
     assert hw.load_state_json() == {"counter": 1, "enabled": False}
+
+
+def test_teardown_saves_latest_state(hw):
+    hw.save_state()
+    hw.increment_counter()
+
+    # straight after the last save, as when switching scripts with a soft exit
+    hw.teardown()
+
+    assert hw.load_state_json() == {"counter": 1, "enabled": True}
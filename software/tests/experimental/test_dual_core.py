@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from experimental.dual_core import RenderThread, TripleBuffer
+
+
+def test_triple_buffer_hands_over_latest_snapshot():
+    buffer = TripleBuffer(lambda: [0])
+    assert buffer.latest() is None
+
+    buffer.back[0] = 1
+    buffer.publish()
+    buffer.back[0] = 2
+    buffer.publish()
+
+    assert buffer.latest() == [2]
+    assert buffer.latest() is None
+
+
+def test_triple_buffer_keeps_reader_snapshot():
+    buffer = TripleBuffer(lambda: [0])
+    buffer.back[0] = 1
+    buffer.publish()
+    front = buffer.latest()
+
+    for value in range(2, 5):
+        assert buffer.back is not front
+        buffer.back[0] = value
+        buffer.publish()
+
+    assert front == [1]
+    assert buffer.latest() == [4]
+
+
+def test_triple_buffer_wait():
+    buffer = TripleBuffer(dict)
+    buffer.back["step"] = 1
+    buffer.publish()
+
+    assert buffer.wait() == {"step": 1}
+    buffer.wake()
+    assert buffer.wait() is None
+
+
+def test_render_thread_draws_published_state():
+    rendered = []
+    done = threading.Event()
+
+    def render(state):
+        rendered.append((state["step"], threading.get_ident()))
+        if state["step"] == 3:
+            done.set()
+
+    renderer = RenderThread(render, frame_ms=0)
+    renderer.start()
+    for step in range(1, 4):
+        renderer.state["step"] = step
+        renderer.publish()
+        done.wait(0.01)
+    assert done.wait(1)
+    renderer.stop()
+
+    assert not renderer.running
+    assert rendered[-1][0] == 3
+    assert all(thread != threading.get_ident() for _, thread in rendered)
+    assert renderer.frames == len(rendered)
+
+
+def test_render_thread_stops_on_error():
+    def render(state):
+        raise ValueError("bad frame")
+
+    renderer = RenderThread(render, frame_ms=0)
+    renderer.start()
+    renderer.publish()
+    renderer._done.acquire()  # wait for the thread to end
+
+    assert isinstance(renderer.error, ValueError)
+    assert not renderer.running
+    renderer.stop()  # already stopped
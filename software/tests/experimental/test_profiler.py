@@ -0,0 +1,206 @@
+import gc
+
+import pytest
+
+import europi
+from europi import DigitalInput, Display
+from experimental import profiler as profiler_module
+from experimental.profiler import (
+    AllocationProfiler,
+    HeapMeter,
+    Histogram,
+    Profiler,
+    TracedMemoryMeter,
+)
+
+from mock_hardware import MockHardware
+
+
+class Clock:
+    def __init__(self):
+        self.now_us = 1000
+
+    def ticks_us(self):
+        return self.now_us
+
+    def ticks_ms(self):
+        return self.now_us // 1000
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(europi, "time", clock)
+    monkeypatch.setattr(profiler_module, "ticks_us", clock.ticks_us)
+    monkeypatch.setattr(profiler_module, "ticks_diff", clock.ticks_diff)
+    return clock
+
+
+@pytest.mark.parametrize(
+    "us, bucket",
+    [(0, 0), (1, 1), (2, 2), (3, 2), (4, 3), (1000, 10), (1024, 11), (-5, 0), (10**9, 23)],
+)
+def test_histogram_buckets(us, bucket):
+    histogram = Histogram()
+    histogram.record(us)
+
+    assert histogram.counts[bucket] == 1
+    assert histogram.count == 1
+
+
+def test_histogram_statistics():
+    histogram = Histogram()
+    for us in [10] * 98 + [300, 5000]:
+        histogram.record(us)
+
+    assert histogram.mean() == (980 + 5300) // 100
+    assert histogram.max == 5000
+    assert histogram.percentile(0.5) == 15  # 10us is in the 8-15us bucket
+    assert histogram.percentile(0.99) == 511
+    assert histogram.percentile(1) == 5000  # capped to the longest duration
+    assert "n=100" in histogram.summary()
+
+    histogram.reset()
+    assert histogram.count == 0
+    assert histogram.summary() == "no samples"
+
+
+def test_histogram_needs_buckets():
+    with pytest.raises(ValueError):
+        Histogram(buckets=1)
+
+
+def test_loop_times(clock):
+    profiler = Profiler()
+    for step in [100, 200, 300]:
+        profiler.tick()
+        clock.now_us += step
+    profiler.tick()
+
+    loop = profiler.histograms["loop"]
+    assert loop.count == 3
+    assert loop.max == 300
+
+
+def test_reader_handler_and_latency(clock, mockHardware: MockHardware):
+    din = DigitalInput(pin=1, debounce_delay=0)
+    profiler = Profiler()
+
+    @din.handler
+    def slow_handler():
+        clock.now_us += 250
+
+    profiler.attach_reader("din", din)
+
+    mockHardware.set_digital_value(din, 1)
+    din._bounce_wrapper(din.pin)
+
+    assert profiler.histograms["din"].max == 250
+    assert profiler.histograms["din latency"].count == 1
+
+    profiler.detach()
+    din._bounce_wrapper(din.pin)
+    assert profiler.histograms["din"].count == 1
+
+
+def test_queued_edge_latency(clock, mockHardware: MockHardware):
+    din = DigitalInput(pin=1, debounce_delay=0)
+    din.enable_edge_queue(schedule=False)
+    din.handler(lambda: None)
+    profiler = Profiler()
+    profiler.attach_reader("din", din)
+
+    mockHardware.set_digital_value(din, 1)
+    din._bounce_wrapper(din.pin)
+    clock.now_us += 700
+    din.process_edges()
+
+    assert profiler.histograms["din latency"].max == 700
+
+
+def test_display_show_and_overlay(clock):
+    display = Display(0, 1)
+    profiler = Profiler()
+    profiler.histograms["loop"].record(1500)
+    profiler.attach_display(display, overlay=True)
+
+    display.fill(0)
+    display.show()
+
+    assert profiler.histograms["show"].count == 1
+    assert any(display.pixel(x, display.height - 4) for x in range(display.width))
+    assert not any(display.pixel(x, 0) for x in range(display.width))
+
+    profiler.detach()
+    assert "show" not in vars(display)
+
+
+def test_report(clock, capsys):
+    profiler = Profiler()
+    profiler.profiled("step", lambda: None)()
+
+    assert len(profiler.report()) == 1  # the loop has no samples
+    profiler.dump()
+    assert "step" in capsys.readouterr().out
+
+
+def test_allocation_profiler_records_bytes_and_collections():
+    profiler = AllocationProfiler()
+    retained = []
+    allocate = profiler.profiled("allocate", lambda: retained.append(bytearray(1000)))
+    nothing = profiler.profiled("nothing", lambda: None)
+    collect = profiler.profiled("collect", gc.collect)
+
+    for _ in range(10):
+        allocate()
+        nothing()
+    collect()
+    profiler.detach()
+
+    assert profiler.histograms["allocate"].mean() >= 1000
+    assert profiler.histograms["nothing"].max == 0
+    assert profiler.histograms["collect"].gc_runs == 1
+    assert "gc=1" in "".join(profiler.report())
+
+
+def test_allocation_profiler_handlers(clock, mockHardware: MockHardware):
+    din = DigitalInput(pin=1, debounce_delay=0)
+    din.handler(lambda: bytearray(500))
+    profiler = AllocationProfiler()
+    profiler.attach_reader("din", din)
+
+    mockHardware.set_digital_value(din, 1)
+    din._bounce_wrapper(din.pin)
+    profiler.detach()
+
+    assert profiler.histograms["din"].max >= 500
+    assert "din latency" not in profiler.histograms
+
+
+def test_traced_memory_nested_intervals():
+    meter = TracedMemoryMeter()
+    try:
+        outer = meter.begin()
+        kept = bytearray(1000)
+        inner = meter.begin()
+        temporary = bytearray(5000)
+        del temporary
+        inner_bytes, _ = meter.end(inner)
+        outer_bytes, _ = meter.end(outer)
+    finally:
+        meter.close()
+
+    assert 5000 <= inner_bytes < 6000
+    assert 6000 <= outer_bytes < 7000
+
+
+def test_heap_meter(monkeypatch):
+    readings = iter([100, 150, 200, 120])
+    monkeypatch.setattr(profiler_module, "mem_alloc", lambda: next(readings))
+    meter = HeapMeter()
+
+    assert meter.end(meter.begin()) == (50, False)
+    assert meter.end(meter.begin()) == (None, True)
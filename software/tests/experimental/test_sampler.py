@@ -0,0 +1,112 @@
+import pytest
+
+from europi import AnalogueReader, Knob, MAX_UINT16
+from experimental import sampler
+from experimental.sampler import BackgroundSampler, SampleBuffer
+
+from mock_hardware import MockHardware
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000
+
+    monkeypatch.setattr(sampler, "ticks_ms", lambda: Clock.now)
+    monkeypatch.setattr(sampler, "ticks_diff", lambda a, b: a - b)
+    return Clock
+
+
+@pytest.fixture
+def reader():
+    return AnalogueReader(pin=1)  # actual pin value doesn't matter
+
+
+def test_buffer_average(clock):
+    buffer = SampleBuffer(size=4)
+    assert buffer.average() == 0
+    assert not buffer.is_fresh()
+
+    buffer.write(100)
+    buffer.write(200)
+    assert buffer.average() == 150
+    assert buffer.is_fresh()
+
+
+def test_buffer_wraps(clock):
+    buffer = SampleBuffer(size=2)
+    for value in [100, 200, 300, 400]:
+        buffer.write(value)
+
+    assert buffer.average() == 350
+
+
+def test_buffer_staleness(clock):
+    buffer = SampleBuffer(size=2, max_age_ms=50)
+    buffer.write(100)
+
+    clock.now += 50
+    assert buffer.is_fresh()
+    clock.now += 1
+    assert not buffer.is_fresh()
+
+
+def test_sampler_averages_sweeps(mockHardware: MockHardware, clock, reader):
+    s = BackgroundSampler([reader], buffer_size=4)
+    s.attach()
+
+    mockHardware.set_ADC_u16_value(reader, 0)
+    s.sweep()
+    s.sweep()
+    mockHardware.set_ADC_u16_value(reader, MAX_UINT16)
+    s.sweep()
+    s.sweep()
+
+    # the reader returns the buffered average, not the current ADC value
+    assert reader._sample_adc() == round(MAX_UINT16 / 2)
+    assert round(reader.percent(), 2) == 0.5
+
+
+def test_sampler_round_robin(mockHardware: MockHardware, clock, reader):
+    knob = Knob(pin=2)
+    s = BackgroundSampler([reader, knob], buffer_size=2)
+    mockHardware.set_ADC_u16_value(reader, 1000)
+    mockHardware.set_ADC_u16_value(knob, 2000)
+    s.start()
+
+    assert reader._sample_adc() == 1000
+    assert knob._sample_adc() == 2000
+    s.stop()
+
+
+def test_stale_buffer_falls_back_to_adc(mockHardware: MockHardware, clock, reader):
+    s = BackgroundSampler([reader], max_age_ms=10)
+    s.attach()
+    mockHardware.set_ADC_u16_value(reader, 1000)
+    s.sweep()
+    mockHardware.set_ADC_u16_value(reader, 3000)
+
+    assert reader._sample_adc() == 1000
+    clock.now += 11
+    assert reader._sample_adc() == 3000
+
+
+def test_explicit_samples_bypass_buffer(mockHardware: MockHardware, clock, reader):
+    s = BackgroundSampler([reader])
+    s.attach()
+    mockHardware.set_ADC_u16_value(reader, 1000)
+    s.sweep()
+    mockHardware.set_ADC_u16_value(reader, 3000)
+
+    assert reader._sample_adc(samples=1) == 3000
+
+
+def test_stop_detaches(mockHardware: MockHardware, clock, reader):
+    s = BackgroundSampler([reader])
+    mockHardware.set_ADC_u16_value(reader, 1000)
+    s.start()
+    assert s.running
+    s.stop()
+
+    assert not s.running
+    assert reader._sample_buffer is None
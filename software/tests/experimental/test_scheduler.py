@@ -0,0 +1,113 @@
+import pytest
+
+from europi import Output, cv1
+from experimental import scheduler as scheduler_module
+from experimental.scheduler import OutputScheduler
+from simulator import Simulator
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000
+
+    monkeypatch.setattr(scheduler_module, "ticks_us", lambda: Clock.now)
+    monkeypatch.setattr(scheduler_module, "ticks_add", lambda a, b: a + b)
+    monkeypatch.setattr(scheduler_module, "ticks_diff", lambda a, b: a - b)
+    return Clock
+
+
+@pytest.fixture
+def outputs():
+    return [Output(21), Output(20)]
+
+
+@pytest.fixture
+def scheduler(clock, outputs):
+    return OutputScheduler(outputs, size=8)
+
+
+def test_events_applied_in_time_order(scheduler, outputs):
+    a, b = outputs
+    scheduler.schedule(300, a, 3)
+    scheduler.schedule(100, a, 1)
+    scheduler.schedule(200, b, 2)
+
+    assert scheduler.process(50) == 0
+    assert scheduler.process(100) == 1
+    assert a.voltage() > 0 and b.voltage() == 0
+    assert scheduler.process(250) == 1
+    assert a.voltage() < b.voltage()
+    assert len(scheduler) == 1
+    assert scheduler.process(1000) == 1
+    assert len(scheduler) == 0
+
+
+def test_simultaneous_events_leave_gate_high(scheduler, outputs):
+    scheduler.trigger(outputs[0], 100, when_us=0)
+    scheduler.trigger(outputs[0], 100, when_us=100)
+
+    scheduler.process(100)
+    assert outputs[0].voltage() > 0
+    scheduler.process(200)
+    assert outputs[0].voltage() == 0
+
+
+def test_ratchet(scheduler, outputs):
+    assert scheduler.ratchet(1, 3, 1000, 200)
+    assert len(scheduler) == 6
+
+    times = [1000, 1200, 2000, 2200, 3000, 3200]
+    duties = []
+    for now in times:
+        scheduler.process(now)
+        duties.append(outputs[1].voltage() > 0)
+    assert duties == [True, False] * 3
+
+
+def test_overflow(scheduler):
+    for when in range(7):
+        assert scheduler.schedule(when, 0, 5)
+    assert not scheduler.trigger(0, 100)  # doesn't fit both edges
+    assert len(scheduler) == 7
+    assert scheduler.schedule(10, 0, 0)
+    assert not scheduler.schedule(11, 0, 0)
+    assert scheduler.overflows == 2
+
+
+def test_cancel(scheduler, outputs):
+    a, b = outputs
+    for when in range(4):
+        scheduler.schedule(when, a, 5)
+        scheduler.schedule(when, b, 4 - when)
+    scheduler.cancel(a)
+
+    assert len(scheduler) == 4
+    assert scheduler.process(2) == 3
+    assert b.voltage() > 0
+    assert scheduler.process(3) == 1
+    assert a.voltage() == 0
+    assert b.voltage() > 0
+
+
+def test_unknown_output(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.schedule(0, cv1, 5)
+    with pytest.raises(ValueError):
+        scheduler.schedule(0, 2, 5)
+
+
+def test_triggers_on_time_while_main_loop_is_busy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with Simulator() as sim:
+        scheduler = OutputScheduler([cv1], freq=2000)
+        scheduler.start()
+        assert scheduler.trigger(cv1, 10000, when_us=sim.clock.now_us + 5000)
+        sim.clock.advance(50000)  # e.g. redrawing the display
+        scheduler.stop()
+
+        (on, high), (off, low) = sim.output(cv1)
+        assert 0.005 <= on <= 0.0055
+        assert 0.015 <= off <= 0.0155
+        assert high == pytest.approx(5, abs=0.01)
+        assert low == 0
@@ -1,6 +1,155 @@
+MONO_VLSB = 0
+MONO_HLSB = 3
+
+
 class FrameBuffer:
-    def __init__(self, *args):
-        pass
+    """A 1-bit frame buffer with MicroPython's drawing methods. The MicroPython font isn't available
+    on the host, so ``text`` draws each character other than a space as a solid 7x7 block."""
 
+    def __init__(self, buffer=None, width=0, height=0, format=MONO_VLSB, *args):
+        self.buffer = buffer
+        self.fb_width = width
+        self.fb_height = height
+        self.format = format
 
-MONO_HLSB = 3
+    def _index(self, x, y):
+        if self.format == MONO_HLSB:
+            return (y * self.fb_width + x) // 8, 0x80 >> (x & 7)
+        return (y >> 3) * self.fb_width + x, 1 << (y & 7)
+
+    def pixel(self, x, y, c=None):
+        if self.buffer is None or not (0 <= x < self.fb_width and 0 <= y < self.fb_height):
+            return 0 if c is None else None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    # _get and _set expect coordinates within the buffer. The drawing methods use them, and
+    # _fill_rect, rather than pixel() and fill_rect(), which subclasses such as europi.Display
+    # override. Like MicroPython's, they then don't call back into the subclass for each part drawn.
+
+    def _get(self, x, y):
+        index, mask = self._index(x, y)
+        return 1 if self.buffer[index] & mask else 0
+
+    def _set(self, x, y, c):
+        index, mask = self._index(x, y)
+        if c:
+            self.buffer[index] |= mask
+        else:
+            self.buffer[index] &= ~mask & 0xFF
+
+    def fill_rect(self, x, y, w, h, c):
+        self._fill_rect(x, y, w, h, c)
+
+    def _fill_rect(self, x, y, w, h, c):
+        if self.buffer is None:
+            return
+        x0, x1 = max(x, 0), min(x + w, self.fb_width)
+        y0, y1 = max(y, 0), min(y + h, self.fb_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.format != MONO_VLSB:
+            for yy in range(y0, y1):
+                for xx in range(x0, x1):
+                    self._set(xx, yy, c)
+            return
+        # set whole columns of each page at once
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            mask = 0
+            for yy in range(max(y0, page * 8), min(y1, page * 8 + 8)):
+                mask |= 1 << (yy & 7)
+            offset = page * self.fb_width
+            for index in range(offset + x0, offset + x1):
+                if c:
+                    self.buffer[index] |= mask
+                else:
+                    self.buffer[index] &= ~mask & 0xFF
+
+    def fill(self, c):
+        if self.buffer is not None:
+            self.buffer[:] = bytes([0xFF if c else 0]) * len(self.buffer)
+
+    def hline(self, x, y, w, c):
+        self._fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self._fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            return self._fill_rect(x, y, w, h, c)
+        self._fill_rect(x, y, w, 1, c)
+        self._fill_rect(x, y + h - 1, w, 1, c)
+        self._fill_rect(x, y, 1, h, c)
+        self._fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        # Bresenham's line algorithm
+        dx, dy = abs(x2 - x1), -abs(y2 - y1)
+        sx, sy = (1 if x1 < x2 else -1), (1 if y1 < y2 else -1)
+        error = dx + dy
+        while True:
+            if 0 <= x1 < self.fb_width and 0 <= y1 < self.fb_height:
+                self._set(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                return
+            if 2 * error >= dy:
+                error += dy
+                x1 += sx
+            if 2 * error <= dx:
+                error += dx
+                y1 += sy
+
+    def ellipse(self, x, y, xr, yr, c, f=False, m=0xF):
+        # m selects the quadrants drawn: 1 top right, 2 top left, 4 bottom left, 8 bottom right
+        def inside(dx, dy):
+            return (dx * dx) * (yr * yr) + (dy * dy) * (xr * xr) <= (xr * xr) * (yr * yr)
+
+        for dy in range(-yr, yr + 1):
+            for dx in range(-xr, xr + 1):
+                quadrant = (1 if dx >= 0 else 2) if dy <= 0 else (8 if dx >= 0 else 4)
+                if not m & quadrant or not inside(dx, dy):
+                    continue
+                edge = not all(
+                    inside(dx + ex, dy + ey) for ex, ey in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                )
+                if (f or edge) and 0 <= x + dx < self.fb_width and 0 <= y + dy < self.fb_height:
+                    self._set(x + dx, y + dy, c)
+
+    def poly(self, x, y, coords, c, f=False):
+        points = [(x + coords[i], y + coords[i + 1]) for i in range(0, len(coords), 2)]
+        if f:
+            # fill the pixels whose centres are inside the polygon, by the even-odd rule
+            ys = [py for _, py in points]
+            xs = [px for px, _ in points]
+            for yy in range(max(min(ys), 0), min(max(ys) + 1, self.fb_height)):
+                for xx in range(max(min(xs), 0), min(max(xs) + 1, self.fb_width)):
+                    crossings = 0
+                    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+                        if (y1 > yy) != (y2 > yy) and xx < x1 + (yy - y1) * (x2 - x1) / (y2 - y1):
+                            crossings += 1
+                    if crossings % 2:
+                        self._set(xx, yy, c)
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+            FrameBuffer.line(self, x1, y1, x2, y2, c)
+
+    def text(self, s, x, y, c=1):
+        for i, char in enumerate(str(s)):
+            if char != " ":
+                self._fill_rect(x + i * 8, y, 7, 7, c)
+
+    def blit(self, fbuf, x, y, key=-1, *args):
+        for yy in range(fbuf.fb_height):
+            for xx in range(fbuf.fb_width):
+                c = fbuf._get(xx, yy)
+                if c != key and 0 <= x + xx < self.fb_width and 0 <= y + yy < self.fb_height:
+                    self._set(x + xx, y + yy, c)
+
+    def scroll(self, xstep, ystep):
+        # like MicroPython, the area scrolled away from keeps its previous contents
+        pixels = [[self._get(x, y) for x in range(self.fb_width)] for y in range(self.fb_height)]
+        for y in range(self.fb_height):
+            for x in range(self.fb_width):
+                if 0 <= x - xstep < self.fb_width and 0 <= y - ystep < self.fb_height:
+                    self._set(x, y, pixels[y - ystep][x - xstep])
@@ -1,6 +1,6 @@
 class ADC:
-    def __init__(self, *args):
-        pass
+    def __init__(self, pin, *args):
+        self.pin = pin
 
     def read_u16(self, *args):
         return 0
@@ -8,28 +8,41 @@ class ADC:
 
 class I2C:
     def __init__(self, channel, sda, scl, freq, *args):
-        pass
+        self.freq = freq
+        self.bytes_written = 0  # including the address byte of each transaction
+        self.transactions = []
 
     def scan(self):
         return []
 
+    def writeto(self, addr, buf, *args):
+        self.bytes_written += 1 + len(buf)
+        self.transactions.append(bytes(buf))
+
+    def writevto(self, addr, vector, *args):
+        self.writeto(addr, b"".join(bytes(buf) for buf in vector))
+
 
 class Pin:
     IN = "in"
+    OUT = "out"
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
 
     def __init__(self, id, *args):
-        pass
+        self.id = id
+        self.handler = None
 
-    def irq(self, handler=None, trigger=None):
-        pass
+    def irq(self, handler=None, trigger=None, hard=False):
+        self.handler = handler
 
     def value(self, *args):
         pass
 
 
 class PWM:
-    def __init__(self, *args):
-        pass
+    def __init__(self, pin, *args):
+        self.pin = pin
 
     def freq(self, f):
         pass
@@ -40,3 +53,26 @@ class PWM:
 
 def freq(_):
     pass
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state):
+    pass
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, *args, **kwargs):
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
@@ -0,0 +1,2 @@
+def schedule(func, arg):
+    func(arg)
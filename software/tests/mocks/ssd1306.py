@@ -1,27 +1,40 @@
-class SSD1306_I2C:
-    def __init__(self, *args):
-        pass
+from framebuf import FrameBuffer, MONO_VLSB
 
-    def contrast(self, *args):
-        pass
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
 
-    def fill(self, *args):
-        pass
 
-    def fill_rect(self, *args):
-        pass
+class SSD1306_I2C(FrameBuffer):
+    """Mirrors the buffer layout and I2C traffic of the micropython-ssd1306 driver."""
 
-    def rect(self, *args):
-        pass
+    def __init__(self, width, height, i2c, addr=0x3C, *args):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.i2c = i2c
+        self.addr = addr
+        self.buffer = bytearray(self.pages * self.width)
+        super().__init__(self.buffer, self.width, self.height, MONO_VLSB)
+        self.init_display()
 
-    def text(self, *args):
-        pass
+    def init_display(self):
+        self.fill(0)
+        self.show()
 
-    def show(self, *args):
-        pass
+    def write_cmd(self, cmd):
+        self.i2c.writeto(self.addr, bytearray([0x80, cmd]))
 
-    def blit(self, *args):
-        pass
+    def write_data(self, buf):
+        self.i2c.writevto(self.addr, [b"\x40", buf])
 
-    def hline(self, *args):
+    def show(self):
+        self.write_cmd(SET_COL_ADDR)
+        self.write_cmd(0)
+        self.write_cmd(self.width - 1)
+        self.write_cmd(SET_PAGE_ADDR)
+        self.write_cmd(0)
+        self.write_cmd(self.pages - 1)
+        self.write_data(self.buffer)
+
+    def contrast(self, *args):
         pass
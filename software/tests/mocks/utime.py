@@ -1,18 +1,35 @@
-def sleep_ms(*args):
-    pass
+"""Stand-in for MicroPython's utime module. Time stands still and sleeps return immediately,
+unless a ``simulator.VirtualClock`` is installed as ``clock``."""
 
+clock = None
 
-def sleep(*args):
-    pass
+
+def sleep_ms(ms=0, *args):
+    if clock:
+        clock.sleep_us(int(ms * 1000))
+
+
+def sleep_us(us=0, *args):
+    if clock:
+        clock.sleep_us(int(us))
+
+
+def sleep(seconds=0, *args):
+    if clock:
+        clock.sleep_us(int(seconds * 1_000_000))
 
 
 def ticks_add(*args):
-    return 0
+    return clock.ticks_add(*args) if clock else 0
 
 
 def ticks_diff(*args):
-    return 0
+    return clock.ticks_diff(*args) if clock else 0
 
 
 def ticks_ms():
-    return 0
+    return clock.ticks_ms() if clock else 0
+
+
+def ticks_us():
+    return clock.ticks_us() if clock else 0
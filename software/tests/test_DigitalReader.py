@@ -1,5 +1,6 @@
 import pytest
 
+import europi
 from europi import DigitalReader
 
 from mock_hardware import MockHardware
@@ -21,3 +22,114 @@ def test_value(mockHardware: MockHardware, digitalReader, value, expected):
     mockHardware.set_digital_value(digitalReader, value)
 
     assert digitalReader.value() == expected
+
+
+class FakeTime:
+    def __init__(self):
+        self.now_us = 0
+
+    def ticks_us(self):
+        self.now_us += 100
+        return self.now_us
+
+    def ticks_ms(self):
+        return self.now_us // 1000
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+
+@pytest.fixture
+def edges(monkeypatch, mockHardware: MockHardware):
+    monkeypatch.setattr(europi, "time", FakeTime())
+    reader = DigitalReader(pin=1, debounce_delay=0)
+    calls = []
+    reader.handler(lambda: calls.append(("rising", reader.last_edge_us)))
+    reader.handler_falling(lambda: calls.append(("falling", reader.last_edge_us)))
+
+    def edge(value):
+        mockHardware.set_digital_value(reader, value)
+        reader._bounce_wrapper(reader.pin)
+
+    return reader, edge, calls
+
+
+def test_handlers_called_directly_by_default(edges):
+    reader, edge, calls = edges
+
+    edge(1)
+    assert calls == [("rising", 0)]
+
+
+def test_edge_queue_deferred_until_processed(edges):
+    reader, edge, calls = edges
+    reader.enable_edge_queue(size=4, schedule=False)
+
+    edge(1)
+    edge(0)
+    assert calls == []
+
+    assert reader.process_edges() == 2
+    assert calls == [("rising", 100), ("falling", 200)]
+    assert reader.process_edges() == 0
+
+
+def test_edge_queue_overflow(edges):
+    reader, edge, calls = edges
+    reader.enable_edge_queue(size=2, schedule=False)
+
+    for value in [1, 0, 1, 0, 1]:
+        edge(value)
+
+    assert reader.edge_overflows == 3
+    reader.process_edges()
+    assert [c[0] for c in calls] == ["rising", "falling"]
+
+
+def test_edge_overflows_wrap(edges):
+    reader, edge, calls = edges
+    reader.enable_edge_queue(size=1, schedule=False)
+    reader.edge_overflows = 0x3FFFFFFF
+
+    edge(1)
+    edge(0)
+
+    assert reader.edge_overflows == 0
+
+
+def test_edge_queue_scheduled(edges):
+    reader, edge, calls = edges
+    reader.enable_edge_queue()
+
+    # the micropython mock runs scheduled functions straight away
+    edge(1)
+    edge(0)
+    assert [c[0] for c in calls] == ["rising", "falling"]
+    assert not reader._dispatch_scheduled
+
+
+def test_disable_edge_queue_processes_pending_edges(edges):
+    reader, edge, calls = edges
+    reader.enable_edge_queue(schedule=False)
+    edge(1)
+
+    reader.disable_edge_queue()
+    assert len(calls) == 1
+
+    edge(0)
+    assert len(calls) == 2
+
+
+def test_reset_handler(edges):
+    reader, edge, calls = edges
+    other = DigitalReader(pin=2)
+    both = []
+    reader._handler_both(other, lambda: both.append(True))
+    reader.enable_edge_queue()
+
+    reader.reset_handler()
+
+    assert reader._other is None and reader._edge_queue is None
+    for call in (reader._rising_handler, reader._falling_handler, reader._both_handler):
+        call()
+    assert calls == [] and both == []
@@ -0,0 +1,111 @@
+import pytest
+
+import europi
+from europi import AnalogueInput, clamp, poll_inputs
+
+from mock_hardware import MockHardware
+
+ELEVEN_POINT_CALIBRATION = [
+    384,
+    4800,
+    9240,
+    13670,
+    18100,
+    22530,
+    26960,
+    31390,
+    35820,
+    40250,
+    44680,
+]
+
+
+def reference_voltage(calibration, raw_reading):
+    """The calibration maths as it was before it was table driven."""
+    reading = raw_reading - calibration[0]
+    max_value = max(reading, calibration[-1] - calibration[0])
+    percent = max(reading / max_value, 0.0)
+    gradients = [1 / (b - a) for a, b in zip(calibration, calibration[1:])]
+    gradients.append(gradients[-1])
+    if len(gradients) == 2:
+        cv = 10 * max(reading / (calibration[-1] - calibration[0]), 0.0)
+    else:
+        index = int(percent * (len(calibration) - 1))
+        cv = index + (gradients[index] * (raw_reading - calibration[index]))
+    return clamp(cv, 0, 12)
+
+
+@pytest.fixture(params=[[384, 44634], ELEVEN_POINT_CALIBRATION], ids=["two_point", "eleven_point"])
+def calibration(request, monkeypatch):
+    monkeypatch.setattr(europi, "INPUT_CALIBRATION_VALUES", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "raw_reading", [0, 384, 1000, 4800, 10000, 22530, 30000, 44680, 55000, 65535]
+)
+def test_read_voltage(mockHardware: MockHardware, calibration, raw_reading):
+    ain = AnalogueInput(pin=1)
+    mockHardware.set_ADC_u16_value(ain, raw_reading)
+
+    assert ain.read_voltage() == pytest.approx(
+        reference_voltage(calibration, raw_reading), abs=0.002
+    )
+
+
+@pytest.mark.parametrize(
+    "raw_reading", [0, 384, 1000, 4800, 10000, 22530, 30000, 44680, 55000, 65535]
+)
+def test_read_voltage_mv(mockHardware: MockHardware, calibration, raw_reading):
+    ain = AnalogueInput(pin=1)
+    mockHardware.set_ADC_u16_value(ain, raw_reading)
+
+    assert isinstance(ain.read_voltage_mv(), int)
+    assert abs(ain.read_voltage_mv() - ain.read_voltage() * 1000) <= 1
+
+
+def test_calibration_points_are_exact(mockHardware: MockHardware, calibration):
+    ain = AnalogueInput(pin=1)
+    points = (
+        calibration if len(calibration) > 2 else [calibration[0]] + [None] * 9 + [calibration[1]]
+    )
+    for volts, raw_reading in enumerate(points):
+        if raw_reading is None:
+            continue
+        mockHardware.set_ADC_u16_value(ain, raw_reading)
+        assert ain.read_voltage() == pytest.approx(volts)
+
+
+def test_read_voltage_clamps_to_range(mockHardware: MockHardware, calibration):
+    ain = AnalogueInput(pin=1, min_voltage=1, max_voltage=5)
+
+    mockHardware.set_ADC_u16_value(ain, 0)
+    assert ain.read_voltage() == 1
+    assert ain.read_voltage_mv() == 1000
+
+    mockHardware.set_ADC_u16_value(ain, 65535)
+    assert ain.read_voltage() == 5
+    assert ain.read_voltage_mv() == 5000
+
+
+@pytest.mark.parametrize("percent", [0, 0.25, 0.5, 1])
+def test_percent(mockHardware: MockHardware, percent):
+    ain = AnalogueInput(pin=1)
+    mockHardware.set_analogue_input_percent(ain, percent)
+
+    assert ain.percent() == pytest.approx(percent, abs=0.0001)
+
+
+def test_on_change(mockHardware: MockHardware):
+    ain = AnalogueInput(pin=1)
+    changes = []
+    mockHardware.set_analogue_input_percent(ain, 0.25)
+    ain.on_change(changes.append, steps=4, hysteresis=0.0)
+
+    poll_inputs()
+    assert changes == []
+
+    mockHardware.set_analogue_input_percent(ain, 0.8)
+    poll_inputs()
+    assert changes == [3]
+    ain.reset_on_change()
@@ -1,6 +1,11 @@
+import os
+import sys
+
 import pytest
 
-from bootloader import BootloaderMenu
+import bootloader
+from bootloader import BootloaderMenu, build_menu_manifest, menu_manifest_is_valid
+from europi import oled
 from europi_script import EuroPiScript
 
 
@@ -38,3 +43,171 @@ def test_build_scripts_mapping():
 
     assert config["GoodTestScript1"] == GoodTestScript1
     assert config["GoodTestScript2"] == GoodTestScript2
+
+
+SCRIPTS = ["test_bootloader.GoodTestScript1", "test_bootloader.GoodTestScript2"]
+
+
+@pytest.fixture
+def lib(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lib_dir = tmp_path / "lib"
+    lib_dir.mkdir()
+    (lib_dir / "version.py").write_text('__version__ = "test"\n')
+    (lib_dir / "test_bootloader.py").write_text("# scripts\n")
+    monkeypatch.setattr(bootloader, "LIB_DIRS", [str(lib_dir)])
+    monkeypatch.setattr(BootloaderMenu, "show_progress", lambda percentage: None)
+    return lib_dir
+
+
+@pytest.fixture
+def imports(monkeypatch):
+    imported = []
+    get_class_for_name = BootloaderMenu.get_class_for_name
+
+    def counting_get_class_for_name(name):
+        imported.append(name)
+        return get_class_for_name(name)
+
+    monkeypatch.setattr(BootloaderMenu, "get_class_for_name", counting_get_class_for_name)
+    return imported
+
+
+def test_menu_items_from_manifest(lib, imports):
+    items = BootloaderMenu(SCRIPTS).load_menu_items()
+
+    assert items == {
+        "GoodTestScript1": "test_bootloader.GoodTestScript1",
+        "GoodTestScript2": "test_bootloader.GoodTestScript2",
+    }
+    assert imports == SCRIPTS
+
+    # the second time the menu is built from the manifest, without importing the scripts
+    imports.clear()
+    assert BootloaderMenu(SCRIPTS).load_menu_items() == items
+    assert imports == []
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda lib: (lib / "test_bootloader.py").write_text("# a changed script\n"),
+        lambda lib: (lib / "version.py").write_text('__version__ = "changed"\n'),
+        lambda lib: os.utime(lib / "version.py", (0, 0)),
+        lambda lib: (lib / "test_bootloader.py").rename(lib / "test_bootloader.mpy"),
+    ],
+)
+def test_manifest_invalidated_by_file_changes(lib, imports, change):
+    BootloaderMenu(SCRIPTS).load_menu_items()
+    imports.clear()
+
+    change(lib)
+    BootloaderMenu(SCRIPTS).load_menu_items()
+
+    assert imports == SCRIPTS
+
+
+def test_manifest_invalidated_by_script_list(lib, imports):
+    BootloaderMenu(SCRIPTS).load_menu_items()
+    imports.clear()
+
+    items = BootloaderMenu(SCRIPTS[:1]).load_menu_items()
+
+    assert list(items) == ["GoodTestScript1"]
+    assert imports == SCRIPTS[:1]
+
+
+def test_manifest_invalidated_by_version(lib, imports, monkeypatch):
+    BootloaderMenu(SCRIPTS).load_menu_items()
+    imports.clear()
+
+    monkeypatch.setattr(bootloader, "__version__", "0.0.0")
+    BootloaderMenu(SCRIPTS).load_menu_items()
+
+    assert imports == SCRIPTS
+
+
+def test_manifest_without_mtimes_checks_sizes(lib):
+    manifest = build_menu_manifest(SCRIPTS, [], with_mtime=False)
+    assert manifest["files"]["test_bootloader.py"] == [len("# scripts\n"), None]
+
+    os.utime(lib / "test_bootloader.py", (0, 0))
+    assert menu_manifest_is_valid(manifest, SCRIPTS)
+
+    (lib / "test_bootloader.py").write_text("# a changed script\n")
+    assert not menu_manifest_is_valid(manifest, SCRIPTS)
+
+
+class SoftExitScript(EuroPiScript):
+    SUPPORTS_SOFT_EXIT = True
+    __module__ = "soft_exit_script"
+
+    menu = None
+    torn_down = []
+
+    def main(self):
+        self.menu.exit_to_menu()  # as if both buttons were held
+        assert self.exit_requested
+
+    def teardown(self):
+        self.torn_down.append(self)
+
+
+@pytest.fixture
+def menu(monkeypatch):
+    resets = []
+    monkeypatch.setattr(bootloader.machine, "reset", lambda: resets.append(True), raising=False)
+    menu = BootloaderMenu(SCRIPTS)
+    menu.resets = resets
+    monkeypatch.setattr(SoftExitScript, "menu", menu)
+    monkeypatch.setattr(SoftExitScript, "torn_down", [])
+    return menu
+
+
+def test_run_script_soft_exit(menu):
+    menu.run_script(SoftExitScript)
+
+    assert len(SoftExitScript.torn_down) == 1
+    assert menu.running_script is None
+    assert menu.resets == []
+
+
+def test_exit_to_menu_resets_without_soft_exit(menu):
+    menu.running_script = GoodTestScript1()
+
+    menu.exit_to_menu()
+
+    assert menu.resets == [True]
+
+
+def test_manifest_rebuild_unloads_scripts(lib, monkeypatch):
+    (lib / "menu_only_script.py").write_text(
+        "from europi_script import EuroPiScript\n\nclass MenuOnlyScript(EuroPiScript):\n    pass\n"
+    )
+    monkeypatch.syspath_prepend(str(lib))
+
+    items = BootloaderMenu(["menu_only_script.MenuOnlyScript"]).load_menu_items()
+
+    assert items == {"MenuOnlyScript": "menu_only_script.MenuOnlyScript"}
+    assert "menu_only_script" not in sys.modules
+
+
+class DoubleBufferedScript(EuroPiScript):
+    SUPPORTS_SOFT_EXIT = True
+    __module__ = "double_buffered_script"
+
+    def main(self):
+        oled.set_double_buffered()
+        oled.fill(1)
+        oled.show()  # left for service() to send
+        assert oled.busy
+
+
+def test_run_script_soft_exit_restores_display(menu, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    menu.run_script(DoubleBufferedScript)
+
+    assert not oled.busy
+    BootloaderMenu.show_progress(0.5)
+    assert not oled.busy
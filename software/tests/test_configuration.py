@@ -150,3 +150,56 @@ def test_load_config_with_unspecd_config_points(class_with_config, simple_config
             "a": 6,
             "b": 7,
         }
+
+
+def test_load_config_is_cached(class_with_config, simple_config_spec, monkeypatch):
+    ConfigFile.save_config(class_with_config, {"a": 1})
+    assert ConfigFile.load_config(class_with_config, simple_config_spec)["a"] == 1
+
+    reads = []
+    monkeypatch.setattr(
+        config, "load_json_file", lambda filename: reads.append(filename) or {"a": 3}
+    )
+    assert ConfigFile.load_config(class_with_config, simple_config_spec)["a"] == 1
+    assert reads == []
+
+    with open(ConfigFile.config_filename(class_with_config), "w") as f:
+        f.write('{"a": 3, "b": 4}')  # edited, e.g. uploaded from a computer
+    assert ConfigFile.load_config(class_with_config, simple_config_spec)["a"] == 3
+    assert len(reads) == 1
+
+
+def test_forget_config(class_with_config, simple_config_spec):
+    ConfigFile.save_config(class_with_config, {"a": 1})
+    ConfigFile.load_config(class_with_config, simple_config_spec)
+    filename = ConfigFile.config_filename(class_with_config)
+    # keyed by filename, so that the cache doesn't keep unloaded script classes alive
+    assert filename in config._cache
+
+    ConfigFile.forget_config(class_with_config)
+
+    assert filename not in config._cache
+
+
+class AnotherClassWithConfig:
+    pass
+
+
+@pytest.fixture
+def config_store():
+    yield
+    config.delete_file(config.CONFIG_STORE_FILENAME)
+    ConfigFile.delete_config(AnotherClassWithConfig)
+
+
+def test_config_store(class_with_config, simple_config_spec, config_store):
+    ConfigFile.save_config_store(
+        {class_with_config: {"a": 1}, AnotherClassWithConfig: {"a": 3, "b": 0}}
+    )
+
+    assert ConfigFile.load_config(class_with_config, simple_config_spec) == {"a": 1, "b": 3}
+    assert ConfigFile.load_config(AnotherClassWithConfig, simple_config_spec) == {"a": 3, "b": 0}
+
+    # a class's own config file takes precedence
+    ConfigFile.save_config(AnotherClassWithConfig, {"b": 1})
+    assert ConfigFile.load_config(AnotherClassWithConfig, simple_config_spec) == {"a": 2, "b": 1}
@@ -0,0 +1,109 @@
+import pytest
+
+import europi
+from europi import DigitalInput
+
+from mock_hardware import MockHardware
+
+
+class Clock:
+    def __init__(self):
+        self.now_us = 0
+
+    def ticks_us(self):
+        return self.now_us
+
+    def ticks_ms(self):
+        return self.now_us // 1000
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+    def ticks_add(self, a, b):
+        return a + b
+
+
+@pytest.fixture
+def clock_input(monkeypatch, mockHardware: MockHardware):
+    clock = Clock()
+    monkeypatch.setattr(europi, "time", clock)
+    din = DigitalInput(pin=1)
+
+    def pulse(at_us):
+        clock.now_us = at_us
+        mockHardware.set_digital_value(din, 1)
+        din._bounce_wrapper(din.pin)
+        clock.now_us = at_us + 5000
+        mockHardware.set_digital_value(din, 0)
+        din._bounce_wrapper(din.pin)
+
+    return din, pulse
+
+
+def test_no_tempo_until_tracked(clock_input):
+    din, pulse = clock_input
+    pulse(1_000_000)
+    pulse(1_500_000)
+
+    assert din.last_triggered_us() == 1_500_000
+    assert din.period_us() == 0
+    assert din.bpm() == 0
+    assert din.next_edge_us() == 0
+
+
+def test_tempo_estimate(clock_input):
+    din, pulse = clock_input
+    din.track_tempo(window=4)
+
+    pulse(1_000_000)
+    assert din.period_us() == 0
+
+    for at_us in [1_500_000, 2_000_000, 2_500_000]:
+        pulse(at_us)
+
+    assert din.period_us() == 500_000
+    assert din.bpm() == 120
+    assert din.bpm(ppqn=4) == 30
+    assert din.next_edge_us() == 3_000_000
+
+
+def test_tempo_ignores_jitter_and_outliers(clock_input):
+    din, pulse = clock_input
+    din.track_tempo(window=5)
+
+    # a late pulse followed by one that is back on time
+    for at_us in [0, 500_100, 999_900, 1_800_000, 2_000_000, 2_500_000]:
+        pulse(at_us + 1_000_000)
+
+    assert din.period_us() == 500_000
+
+
+def test_tempo_window_wraps(clock_input):
+    din, pulse = clock_input
+    din.track_tempo(window=3)
+
+    at_us = 1_000_000
+    for period in [100_000] * 4 + [250_000] * 2:
+        at_us += period
+        pulse(at_us)
+
+    assert din.period_us() == 250_000
+    assert din._period_count == 3  # bounded by the window, so that it stays a small int
+
+
+def test_track_tempo_bad_window(clock_input):
+    din, _ = clock_input
+    with pytest.raises(ValueError):
+        din.track_tempo(window=0)
+
+
+def test_reset_handler_stops_tempo(clock_input):
+    din, pulse = clock_input
+    din.track_tempo(window=4)
+    pulse(1_000_000)
+    pulse(1_500_000)
+
+    din.reset_handler()
+
+    assert din.period_us() == 0
+    assert din.last_triggered_us() == 0
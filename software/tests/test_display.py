@@ -0,0 +1,209 @@
+import pytest
+
+from europi import Display
+
+FULL_FRAME_BYTES = 6 * 3 + 1 + 1 + 512  # six commands, then the address, control byte and data
+
+
+class SSD1306Memory:
+    """Replays the I2C traffic sent to an SSD1306 into a model of its display memory."""
+
+    def __init__(self, width=128, pages=4):
+        self.width = width
+        self.memory = bytearray(width * pages)
+        self.commands = []
+        self.col = self.col_start = self.page = self.page_start = 0
+        self.col_end = width - 1
+        self.page_end = pages - 1
+
+    def replay(self, transactions):
+        for t in transactions:
+            if t[0] == 0x80:
+                self._command(t[1])
+            else:
+                for byte in t[1:]:
+                    self._data(byte)
+
+    def _command(self, value):
+        self.commands.append(value)
+        if len(self.commands) == 3 and self.commands[0] == 0x21:
+            self.col = self.col_start = self.commands[1]
+            self.col_end = self.commands[2]
+            self.commands = []
+        elif len(self.commands) == 3 and self.commands[0] == 0x22:
+            self.page = self.page_start = self.commands[1]
+            self.page_end = self.commands[2]
+            self.commands = []
+
+    def _data(self, byte):
+        self.memory[self.page * self.width + self.col] = byte
+        self.col += 1
+        if self.col > self.col_end:
+            self.col = self.col_start
+            self.page = self.page_start if self.page >= self.page_end else self.page + 1
+
+
+@pytest.fixture
+def display():
+    d = Display(0, 1)
+    d.i2c.bytes_written = 0
+    d.i2c.transactions = []
+    return d
+
+
+def flush(display):
+    """Call show() and return the number of bytes it sent over I2C."""
+    before = display.i2c.bytes_written
+    display.show()
+    return display.i2c.bytes_written - before
+
+
+def draw_frame(display, value):
+    # a typical redraw: clear, then draw a static frame and a changing value
+    display.fill(0)
+    display.rect(0, 0, 128, 32, 1)
+    display.fill_rect(2, 3, 60, 7, 1)
+    display.fill_rect(100, 13, value, 7, 1)
+
+
+def test_initialization_sends_full_frame():
+    display = Display(0, 1)
+
+    assert display.i2c.bytes_written == FULL_FRAME_BYTES
+
+
+def test_unchanged_show_sends_nothing(display):
+    draw_frame(display, 10)
+    display.show()
+
+    assert flush(display) == 0
+    draw_frame(display, 10)
+    assert flush(display) == 0
+
+
+def test_partial_redraw_sends_changed_columns(display):
+    draw_frame(display, 10)
+    display.show()
+
+    draw_frame(display, 12)
+    sent = flush(display)
+
+    # two new columns on the two pages the value spans, each with their window commands
+    assert sent == 2 * (6 * 3 + 1 + 1 + 2)
+    assert sent < FULL_FRAME_BYTES / 10
+
+
+def test_display_memory_matches_buffer(display):
+    memory = SSD1306Memory()
+    for value in [10, 12, 3, 20, 20, 0]:
+        draw_frame(display, value)
+        display.pixel(value, value, 1)
+        display.vline(127 - value, 0, 32, 0)
+        display.show()
+    memory.replay(display.i2c.transactions)
+
+    assert memory.memory == display.buffer
+
+
+def test_invalidate_resends_full_frame(display):
+    display.show()
+    display.invalidate()
+
+    assert flush(display) == FULL_FRAME_BYTES
+
+
+@pytest.mark.parametrize(
+    "x, y, w, h, expected_pages",
+    [
+        (0, 0, 1, 1, [(0, 0), None, None, None]),
+        (10, 6, 5, 4, [(10, 14), (10, 14), None, None]),
+        (-5, 30, 10, 10, [None, None, None, (0, 4)]),
+        (126, 0, 10, 32, [(126, 127)] * 4),
+        (200, 0, 10, 10, [None] * 4),
+    ],
+)
+def test_mark(display, x, y, w, h, expected_pages):
+    display.show()
+    display._mark(x, y, w, h)
+
+    pages = [
+        (start, end) if start <= end else None
+        for start, end in zip(display._dirty_start, display._dirty_end)
+    ]
+    assert pages == expected_pages
+
+
+def test_double_buffered_show_returns_without_sending(display):
+    display.set_double_buffered(chunk_size=16)
+    draw_frame(display, 10)
+
+    assert flush(display) == 0
+    assert display.busy
+
+
+def test_double_buffered_service_sends_chunks(display):
+    display.set_double_buffered(chunk_size=16)
+    display.fill_rect(0, 0, 40, 8, 1)
+    display.show()
+
+    sizes = []
+    while display.busy:
+        before = display.i2c.bytes_written
+        display.service()
+        sizes.append(display.i2c.bytes_written - before)
+
+    assert sizes == [6 * 3 + 2 + 16, 6 * 3 + 2 + 16, 6 * 3 + 2 + 8]
+    assert not display.service()
+
+
+def test_double_buffered_display_memory_matches_buffer(display):
+    memory = SSD1306Memory()
+    display.set_double_buffered(chunk_size=7)
+    for value in [10, 12, 3, 20, 20, 0]:
+        draw_frame(display, value)
+        display.pixel(value, value, 1)
+        display.show()
+        # only partially flush before the next frame is drawn
+        display.service()
+        display.service()
+    display.flush()
+    memory.replay(display.i2c.transactions)
+
+    assert memory.memory == display.buffer
+
+
+def test_disabling_double_buffering_flushes(display):
+    display.set_double_buffered()
+    draw_frame(display, 10)
+    display.show()
+
+    display.set_double_buffered(False)
+
+    assert not display.busy
+    draw_frame(display, 10)
+    assert flush(display) == 0
+
+
+@pytest.mark.parametrize(
+    "draw",
+    [
+        lambda d: d.pixel(64, 20, 1),
+        lambda d: d.hline(10, 12, 20, 1),
+        lambda d: d.line(0, 31, 127, 0, 1),
+        lambda d: d.ellipse(64, 16, 10, 6, 1),
+        lambda d: d.ellipse(20, 16, 4, 4, 1, True, 0b0101),
+        lambda d: d.poly(40, 4, [0, 0, 20, 5, 5, 20], 1, True),
+    ],
+)
+def test_untracked_drawing_is_sent(display, draw):
+    memory = SSD1306Memory()
+    display.show()
+
+    draw(display)
+    assert display._dirty_unknown
+    display.show()
+    memory.replay(display.i2c.transactions)
+
+    assert any(display.buffer)
+    assert memory.memory == display.buffer
+    assert flush(display) == 0
@@ -1,6 +1,6 @@
 import pytest
 
-from europi import clamp
+from europi import Button, LazyComponent, clamp
 
 
 @pytest.mark.parametrize(
@@ -15,3 +15,69 @@ from europi import clamp
 )
 def test_clamp(value, low, high, expected):
     assert clamp(value, low, high) == expected
+
+
+class Component:
+    instances = 0
+
+    def __init__(self, value):
+        Component.instances += 1
+        self.value = value
+        self.handler = lambda: "default"
+
+    def double(self):
+        return self.value * 2
+
+    def set_handler(self, func):
+        self.handler = func
+
+
+@pytest.fixture
+def lazy():
+    Component.instances = 0
+    return LazyComponent(Component, 21)
+
+
+def test_lazy_component_constructed_on_first_use(lazy):
+    assert not lazy.constructed
+    assert Component.instances == 0
+
+    assert lazy.double() == 42
+    assert lazy.value == 21
+    assert lazy.constructed
+    assert Component.instances == 1
+
+
+def test_lazy_component_caches_methods(lazy):
+    assert lazy.double is lazy.double
+    assert "value" not in lazy.__dict__
+
+
+def test_lazy_component_does_not_cache_callable_attributes(lazy):
+    assert lazy.handler() == "default"
+
+    lazy.set_handler(lambda: "new")
+
+    assert lazy.handler() == "new"
+    assert "handler" not in lazy.__dict__
+
+
+def test_lazy_component_forwards_setattr(lazy):
+    lazy.double()
+    lazy.double = lambda: "patched"
+    lazy.value = 1
+
+    assert lazy.construct().value == 1
+    assert lazy.double() == "patched"
+    assert "value" not in lazy.__dict__
+
+    del lazy.double
+    assert lazy.double() == 2
+
+
+def test_handler_both_uses_component():
+    b1 = LazyComponent(Button, 4)
+    b2 = LazyComponent(Button, 5)
+    b1._handler_both(b2, lambda: None)
+
+    assert b1.construct()._other is b2.construct()
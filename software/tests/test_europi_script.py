@@ -1,7 +1,19 @@
+import asyncio
+import importlib
+import os
+import sys
+from types import ModuleType
+
 import pytest
+import europi
+import europi_script
 from firmware import configuration as config
-from europi_script import EuroPiScript
+from europi import din
+from europi_script import EuroPiScript, every_ms, every_us
+from experimental.sampler import BackgroundSampler
+from experimental.scheduler import OutputScheduler
 from configuration import ConfigFile
+from file_utils import save_file
 from collections import namedtuple
 from struct import pack, unpack
 
@@ -51,6 +63,16 @@ def test_save_load_state_json(script_for_testing):
     assert script_for_testing.load_state_json() == state
 
 
+def test_load_state_json_missing_or_invalid(script_for_testing, capsys):
+    assert script_for_testing.load_state_json() == {}
+    script_for_testing.save_state_str("")
+    assert script_for_testing.load_state_json() == {}
+    assert capsys.readouterr().out == ""
+    script_for_testing.save_state_str('{"one": 1,')
+    assert script_for_testing.load_state_json() == {}
+    assert "Unable to decode" in capsys.readouterr().out
+
+
 def test_save_load_state_bytes(script_for_testing):
     State = namedtuple("State", "one two three")
     format_string = "b2s?"  # https://docs.python.org/3/library/struct.html#format-characters
@@ -66,6 +88,106 @@ def test_save_load_state_bytes(script_for_testing):
     assert got_struct.three == True
 
 
+def test_save_load_state_struct(script_for_testing):
+    from state_schema import StateSchema, integer, packed_array
+
+    schema = StateSchema([integer("step"), packed_array("steps", "H", 3)])
+    assert script_for_testing.load_state_struct(schema) == schema.default_state()
+
+    script_for_testing.save_state_struct({"step": 2, "steps": [10, 20, 30]}, schema)
+    with open(script_for_testing._state_filename, "rb") as f:
+        assert f.read() == b"ES\x01\x02\x00\x0a\x00\x14\x00\x1e\x00"
+    state = script_for_testing.load_state_struct(schema)
+    assert state["step"] == 2
+    assert list(state["steps"]) == [10, 20, 30]
+
+
+def test_save_state_replaces_file_atomically(script_for_testing):
+    script_for_testing.save_state_str("old state")
+
+    def power_cut(file):
+        file.write("half a st")
+        raise OSError("power cut")
+
+    with pytest.raises(OSError):
+        save_file(script_for_testing._state_filename, power_cut)
+    assert script_for_testing.load_state_str() == "old state"
+
+    script_for_testing.save_state_str("new state")
+    assert script_for_testing.load_state_str() == "new state"
+    assert not os.path.exists(f"{script_for_testing._state_filename}.tmp")
+
+
+def test_load_state_recovers_interrupted_rename(script_for_testing):
+    # a power cut after save_file() deleted the old file, but before it renamed the new one
+    filename = script_for_testing._state_filename
+    script_for_testing.save_state_json({"one": 1})
+    os.rename(filename, f"{filename}.tmp")
+
+    assert script_for_testing.load_state_json() == {"one": 1}
+    assert os.path.exists(filename)
+    assert not os.path.exists(f"{filename}.tmp")
+
+
+class SaveCountingScript(EuroPiScript):
+    def __init__(self):
+        super().__init__()
+        self.saves = 0
+
+    def save_state(self):
+        self.saves += 1
+        self._last_saved = europi_script.ticks_ms()
+        self._state_saved = True
+
+
+class ThrottledSaveScript(SaveCountingScript):
+    def save_state(self):
+        if self.last_saved() >= 5000:
+            super().save_state()
+
+
+def test_flush_state_coalesces_changes(monkeypatch):
+    now = [0]
+    monkeypatch.setattr(europi_script, "ticks_ms", lambda: now[0])
+    monkeypatch.setattr(europi_script, "ticks_diff", lambda a, b: a - b)
+    script = SaveCountingScript()
+    assert not script.flush_state()
+
+    for _ in range(5):  # e.g. a knob being turned
+        script.mark_state_dirty()
+        now[0] += 500
+        assert not script.flush_state()
+    assert script.state_dirty
+
+    now[0] += script.SAVE_QUIET_MS
+    assert script.flush_state()
+    assert not script.flush_state()
+    assert script.saves == 1
+
+    script.mark_state_dirty()
+    assert script.flush_state(force=True)
+    assert script.saves == 2
+
+
+def test_flush_state_keeps_change_until_saved(monkeypatch):
+    now = [10_000]
+    monkeypatch.setattr(europi_script, "ticks_ms", lambda: now[0])
+    monkeypatch.setattr(europi_script, "ticks_diff", lambda a, b: a - b)
+    script = ThrottledSaveScript()
+    script.mark_state_dirty()
+    assert script.flush_state(force=True)
+
+    script.mark_state_dirty()
+    now[0] += script.SAVE_QUIET_MS
+    assert not script.flush_state()  # throttled by save_state()
+    assert script.state_dirty
+
+    now[0] += 5000
+    assert script.flush_state()
+    assert not script.state_dirty
+    assert script.saves == 2
+
+
 def test_load_config_no_config(script_for_testing):
     assert EuroPiScript._load_config_for_class(script_for_testing.__class__) == {}
 
@@ -79,3 +201,216 @@ def test_load_config_defaults(script_for_testing_with_config):
 
 def test_load_europi_config(script_for_testing_with_config):
     assert script_for_testing_with_config.europi_config["pico_model"] == "pico"
+
+
+class VirtualClock:
+    def __init__(self, monkeypatch):
+        self.now_us = 0
+        monkeypatch.setattr(europi_script, "ticks_us", lambda: self.now_us)
+        monkeypatch.setattr(europi_script, "ticks_add", lambda a, b: a + b)
+        monkeypatch.setattr(europi_script, "ticks_diff", lambda a, b: a - b)
+        monkeypatch.setattr(europi_script, "_sleep_ms", self.sleep_ms)
+
+    async def sleep_ms(self, ms):
+        # time passes in small steps while the tasks take turns
+        wake_us = self.now_us + ms * 1000
+        self.now_us += 10
+        await asyncio.sleep(0)
+        while self.now_us < wake_us:
+            self.now_us += 10
+            await asyncio.sleep(0)
+
+
+class AsyncScriptForTesting(EuroPiScript):
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.fast_calls = []
+        self.slow_calls = []
+
+    @every_us(500)
+    def fast(self):
+        self.fast_calls.append(self.clock.now_us)
+
+    @every_ms(20)
+    def slow(self):
+        self.slow_calls.append(self.clock.now_us)
+        if len(self.slow_calls) == 5:
+            self.request_exit()
+
+
+def test_run_async_periodic_rates(monkeypatch):
+    clock = VirtualClock(monkeypatch)
+    script = AsyncScriptForTesting(clock)
+
+    script.run_async()
+
+    assert script.exit_requested
+    assert len(script.slow_calls) == 5
+    # 80ms between the first and last slow calls, with the fast task called every 0.5ms
+    assert 155 <= len(script.fast_calls) <= 165
+    # the deadlines don't drift even though every wake up is late
+    assert all(t - 20000 * i < 1000 for i, t in enumerate(script.slow_calls))
+
+
+def test_periodic_methods_remain_callable(monkeypatch):
+    script = AsyncScriptForTesting(VirtualClock(monkeypatch))
+
+    script.fast()
+
+    assert script.fast_calls == [0]
+
+
+def test_run_async_runs_coroutines(monkeypatch):
+    clock = VirtualClock(monkeypatch)
+    script = ScriptForTesting()
+    flag = script.edge_event(din)
+
+    async def on_edge():
+        await flag.wait()
+        script.request_exit()
+
+    async def trigger():
+        await clock.sleep_ms(5)
+        din._rising_handler()
+
+    script.run_async(on_edge(), trigger())
+
+    assert script.exit_requested
+    din.reset_handler()
+
+
+def test_asyncio_imported_on_first_use(monkeypatch):
+    uasyncio = ModuleType("uasyncio")
+    uasyncio.sleep_ms = lambda ms: None
+    monkeypatch.setitem(sys.modules, "uasyncio", uasyncio)
+    monkeypatch.delitem(sys.modules, "europi_script")
+    fresh = importlib.import_module("europi_script")
+    assert fresh._sleep_ms is None
+
+    assert fresh._import_asyncio() is uasyncio
+    assert fresh._sleep_ms is uasyncio.sleep_ms
+
+
+def test_every_rejects_bad_periods():
+    with pytest.raises(ValueError):
+        every_ms(0)(lambda self: None)
+
+
+def test_unload_module(monkeypatch):
+    package = ModuleType("package")
+    module = ModuleType("package.module")
+    package.module = module
+    monkeypatch.setitem(sys.modules, "package", package)
+    monkeypatch.setitem(sys.modules, "package.module", module)
+
+    europi_script.unload_module("package.module")
+
+    assert "package.module" not in sys.modules
+    assert not hasattr(package, "module")
+    europi_script.unload_module("package.module")  # already unloaded
+
+
+def test_teardown(monkeypatch):
+    calls = []
+
+    class SoftExitScript(EuroPiScript):
+        SUPPORTS_SOFT_EXIT = True
+
+        def on_exit(self):
+            calls.append("on_exit")
+
+        def save_state(self):
+            calls.append("save_state")
+
+    SoftExitScript.__module__ = "soft_exit_script"
+    monkeypatch.setitem(sys.modules, "soft_exit_script", ModuleType("soft_exit_script"))
+    monkeypatch.setattr(europi, "reset_state", lambda: calls.append("reset_state"))
+
+    SoftExitScript().teardown()
+
+    assert calls == ["on_exit", "save_state", "reset_state"]
+    assert "soft_exit_script" not in sys.modules
+
+
+def test_teardown_saves_only_dirty_state(monkeypatch):
+    monkeypatch.setitem(sys.modules, "save_counting_script", ModuleType("save_counting_script"))
+    monkeypatch.setattr(SaveCountingScript, "__module__", "save_counting_script")
+    script = SaveCountingScript()
+    script.mark_state_dirty()
+    script.flush_state(force=True)
+
+    script.teardown()
+    assert script.saves == 1
+
+    script.mark_state_dirty()
+    script.teardown()
+    assert script.saves == 2
+
+
+def test_run_async_profiles_periodic_methods(monkeypatch):
+    clock = VirtualClock(monkeypatch)
+    script = AsyncScriptForTesting(clock)
+    profiler = script.enable_profiler()
+
+    script.run_async()
+
+    assert profiler.histograms["slow"].count == 5
+    assert profiler.histograms["fast"].count == len(script.fast_calls)
+    profiler.detach()
+
+
+def test_teardown_dumps_profile(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "profiled_script", ModuleType("profiled_script"))
+
+    class ProfiledScript(EuroPiScript):
+        pass
+
+    ProfiledScript.__module__ = "profiled_script"
+    script = ProfiledScript()
+    script.enable_profiler(allocations=True)
+    script.profile_loop()
+    script.profile_loop()
+
+    script.teardown()
+
+    assert "gc=" in capsys.readouterr().out
+    assert "show" not in vars(europi.oled.construct())
+    script.remove_state()
+
+
+def test_teardown_stops_render_thread(monkeypatch):
+    monkeypatch.setitem(sys.modules, "rendering_script", ModuleType("rendering_script"))
+
+    class RenderingScript(EuroPiScript):
+        pass
+
+    RenderingScript.__module__ = "rendering_script"
+    script = RenderingScript()
+    renderer = script.start_render_thread(lambda state: None)
+    assert renderer.running
+
+    script.teardown()
+
+    assert not renderer.running
+    script.remove_state()
+
+
+def test_teardown_stops_background_tasks(monkeypatch):
+    monkeypatch.setitem(sys.modules, "background_script", ModuleType("background_script"))
+
+    class BackgroundScript(EuroPiScript):
+        pass
+
+    BackgroundScript.__module__ = "background_script"
+    script = BackgroundScript()
+    sampler = BackgroundSampler([europi.k1])
+    scheduler = OutputScheduler([europi.cv1])
+    sampler.start()
+    scheduler.start()
+
+    script.teardown()
+
+    assert not sampler.running and not scheduler.running
+    assert europi._background_tasks == []
+    script.remove_state()
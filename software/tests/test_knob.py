@@ -1,6 +1,6 @@
 import pytest
 
-from europi import k1, k2, MAX_UINT16
+from europi import k1, k2, MAX_UINT16, poll_inputs
 
 from mock_hardware import MockHardware
 
@@ -107,3 +107,70 @@ def test_knobs_are_independent(mockHardware: MockHardware):
 
     assert k1.percent(deadzone=0.01) == 1.0
     assert k2.percent(deadzone=0.01) == 0.0
+
+
+@pytest.fixture
+def changes(mockHardware: MockHardware):
+    mockHardware.set_knob_percent(k1, 0.55)
+    positions = []
+    yield positions
+    k1.reset_on_change()
+
+
+def test_on_change_fires_on_position_change(mockHardware: MockHardware, changes):
+    k1.on_change(changes.append, steps=10, hysteresis=0.0)
+
+    poll_inputs()
+    assert changes == []
+
+    mockHardware.set_knob_percent(k1, 0.75)
+    poll_inputs()
+    poll_inputs()
+    assert changes == [7]
+
+
+def test_on_change_hysteresis(mockHardware: MockHardware, changes):
+    k1.on_change(changes.append, steps=10, hysteresis=0.5)
+
+    # just over the edge of the current position, but within the hysteresis band
+    mockHardware.set_knob_percent(k1, 0.62)
+    poll_inputs()
+    assert changes == []
+
+    mockHardware.set_knob_percent(k1, 0.66)
+    poll_inputs()
+    assert changes == [6]
+
+    # back across the edge, still within the band around the new position
+    mockHardware.set_knob_percent(k1, 0.58)
+    poll_inputs()
+    assert changes == [6]
+
+    mockHardware.set_knob_percent(k1, 0.54)
+    poll_inputs()
+    assert changes == [6, 5]
+
+
+def test_on_change_multiple_listeners(mockHardware: MockHardware, changes):
+    coarse = []
+    k1.on_change(changes.append, steps=100, hysteresis=0.0)
+    k1.on_change(coarse.append, steps=2, hysteresis=0.0)
+
+    mockHardware.set_knob_percent(k1, 0.52)
+    poll_inputs()
+    assert changes == [52]
+    assert coarse == []
+
+
+def test_reset_on_change(mockHardware: MockHardware, changes):
+    k1.on_change(changes.append, steps=10)
+    k1.reset_on_change()
+
+    mockHardware.set_knob_percent(k1, 1)
+    poll_inputs()
+    assert changes == []
+
+
+def test_on_change_requires_callable():
+    with pytest.raises(ValueError):
+        k1.on_change(None)
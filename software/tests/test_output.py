@@ -0,0 +1,132 @@
+import pytest
+
+from europi import (
+    LazyComponent,
+    Output,
+    MAX_OUTPUT_VOLTAGE,
+    MAX_UINT16,
+    OUTPUT_CALIBRATION_VALUES,
+    cvs,
+    set_outputs,
+)
+from machine import PWM
+
+
+@pytest.fixture
+def output():
+    return Output(pin=1)  # actual pin value doesn't matter
+
+
+@pytest.mark.parametrize(
+    "millivolts", [0, 1, 5, 250, 999, 1000, 1234, 3333, 5000, 7499, 9995, 9999, 10000]
+)
+def test_voltage_mv_matches_voltage(output, millivolts):
+    output.voltage(millivolts / 1000)
+    expected = output._duty
+
+    output.voltage_mv(millivolts)
+
+    assert abs(output._duty - expected) <= 1
+
+
+@pytest.mark.parametrize(
+    "millivolts, expected",
+    [
+        (-500, OUTPUT_CALIBRATION_VALUES[0]),
+        (0, OUTPUT_CALIBRATION_VALUES[0]),
+        (5000, OUTPUT_CALIBRATION_VALUES[5]),
+        (MAX_OUTPUT_VOLTAGE * 1000, OUTPUT_CALIBRATION_VALUES[-1]),
+        (12000, OUTPUT_CALIBRATION_VALUES[-1]),
+    ],
+)
+def test_voltage_mv_clamps(output, millivolts, expected):
+    output.voltage_mv(millivolts)
+
+    assert output._duty == expected
+
+
+def test_voltage_mv_accepts_floats(output):
+    output.voltage_mv(2500)
+    expected = output._duty
+
+    output.voltage_mv(2500.7)
+
+    assert output._duty == expected
+
+
+def test_voltage_mv_respects_max_voltage():
+    output = Output(pin=1, max_voltage=5)
+
+    output.voltage_mv(8000)
+
+    assert output._duty == OUTPUT_CALIBRATION_VALUES[5]
+
+
+def test_duty_table_is_shared():
+    a = Output(pin=1)
+    b = Output(pin=2)
+    a.voltage_mv(1000)
+    b.voltage_mv(1000)
+
+    assert a._duty_table is b._duty_table
+
+
+@pytest.fixture
+def duty_writes(monkeypatch):
+    writes = []
+    monkeypatch.setattr(PWM, "duty_u16", lambda pwm, duty: writes.append(duty))
+    for cv in cvs:
+        cv.off()
+    writes.clear()
+    return writes
+
+
+def test_set_outputs(duty_writes):
+    set_outputs([0, 1, 2, 3, 4, 5])
+
+    assert [cv._duty for cv in cvs] == OUTPUT_CALIBRATION_VALUES[:6]
+    # cv1 was already at 0V so it is not written
+    assert duty_writes == OUTPUT_CALIBRATION_VALUES[1:6]
+
+
+def test_set_outputs_matches_voltage(duty_writes):
+    set_outputs([1.23, 4.56, 7.89])
+    expected = [cv._duty for cv in cvs[:3]]
+    for cv, voltage in zip(cvs, [1.23, 4.56, 7.89]):
+        cv.voltage(voltage)
+
+    assert [cv._duty for cv in cvs[:3]] == expected
+
+
+def test_set_outputs_skips_unchanged(duty_writes):
+    set_outputs([5, 5, 5, 5, 5, 5])
+    duty_writes.clear()
+
+    set_outputs([5, 5, 6, 5, None, 5])
+
+    assert duty_writes == [OUTPUT_CALIBRATION_VALUES[6]]
+
+
+def test_set_outputs_duties(duty_writes):
+    set_outputs([100, 70000, -5], duties=True)
+
+    assert duty_writes == [100, MAX_UINT16]
+    assert cvs[2]._duty == 0
+
+
+def test_set_outputs_uses_cached_methods(duty_writes, monkeypatch):
+    set_outputs([1, 2, 3, 4, 5, 6])
+
+    def forwarded(*args):
+        raise AssertionError("attribute access went through the LazyComponent")
+
+    monkeypatch.setattr(LazyComponent, "__getattr__", forwarded)
+    monkeypatch.setattr(LazyComponent, "__setattr__", forwarded)
+    set_outputs([6, 5, 4, 3, 2, 1])
+
+    assert duty_writes[-6:] == OUTPUT_CALIBRATION_VALUES[6:0:-1]
+
+
+def test_set_outputs_too_many_values():
+    with pytest.raises(ValueError):
+        set_outputs([0] * 7)
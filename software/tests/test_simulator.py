@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+
+import pytest
+
+import europi
+from europi import b1, cv1, din, k1, oled
+from europi_script import EuroPiScript
+from framebuf import FrameBuffer, MONO_HLSB, MONO_VLSB
+from simulator import Clock, Gate, SimulationFinished, Simulator, VirtualClock, saw
+from simulator.hardware import TEMPERATURE_SENSOR_READING
+from simulator.clock import TICKS_PERIOD
+
+
+@pytest.fixture
+def sim(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # keep saved state out of the source tree
+    return Simulator()
+
+
+class EdgeCounter(EuroPiScript):
+    def main(self):
+        from time import sleep
+
+        self.rising = []
+        din.handler(lambda: self.rising.append(europi.time.ticks_ms()))
+        b1.handler(lambda: cv1.toggle())
+        while True:
+            sleep(0.01)
+
+
+class KnobFollower(EuroPiScript):
+    def main(self):
+        from time import sleep
+
+        while True:
+            cv1.voltage(k1.percent(samples=1) * 10)
+            sleep(0.1)
+
+
+def test_clock_ticks_wrap():
+    clock = VirtualClock()
+    clock.now_us = TICKS_PERIOD - 50
+    start = clock.ticks_us()
+    clock.advance(100)
+    end = clock.ticks_us()
+
+    assert end < start
+    assert clock.ticks_diff(end, start) >= 100
+    assert clock.ticks_add(start, 10) == (start + 10) % TICKS_PERIOD
+
+
+def test_clock_fires_events_in_order():
+    clock = VirtualClock()
+    fired = []
+    clock.add_source(lambda now: (100, lambda: fired.append(clock.now_us)) if now < 100 else None)
+    clock.add_source(lambda now: (50, lambda: fired.append(clock.now_us)) if now < 50 else None)
+
+    clock.advance(200)
+
+    assert fired == [50, 100]
+    assert clock.now_us == 200
+
+
+def test_clock_finishes():
+    clock = VirtualClock()
+    clock.end_us = 1000
+    with pytest.raises(SimulationFinished):
+        clock.sleep_us(5000)
+    assert clock.now_us == 1000
+
+
+def test_run_for_virtual_seconds(sim):
+    sim.set_digital(din, Clock(freq=10, start=0.05))
+    sim.set_digital(b1, Gate((0.5, 0.6), (0.7, 0.8)))
+
+    script = sim.run(EdgeCounter, seconds=1)
+
+    assert sim.clock.now_us == 1_000_000
+    assert script.rising == [50 + 100 * i for i in range(10)]
+    assert [volts for _, volts in sim.output(cv1)] == [5.0, 0.0]
+    assert [round(t, 2) for t, _ in sim.output(cv1)] == [0.5, 0.7]
+
+
+def test_knob_signal(sim):
+    sim.set_knob(k1, saw(1))
+
+    sim.run(KnobFollower, seconds=1)
+
+    voltages = [volts for _, volts in sim.output(cv1)]
+    assert len(voltages) == 10
+    assert voltages == sorted(voltages)
+    assert voltages[0] == pytest.approx(0, abs=0.01)
+    assert voltages[-1] == pytest.approx(9, abs=0.1)
+
+
+def test_analogue_input(sim):
+    sim.set_analogue_input(2.5)
+    with sim:
+        assert europi.ain.read_voltage(samples=1) == pytest.approx(2.5, abs=0.01)
+
+
+def test_uninstall_restores_time(sim):
+    with sim:
+        assert sys.modules["time"] is not time
+    assert sys.modules["time"] is time
+    assert europi.time is time
+
+
+def test_contrib_script(sim):
+    sim.run("contrib.harmonic_lfos.HarmonicLFOs", seconds=1)
+
+    assert len(sim.output(cv1)) > 10
+    assert "#" in sim.display()
+
+
+def test_display_drawing(sim):
+    with sim:
+        oled.fill(0)
+        oled.line(0, 0, 3, 3, 1)
+        oled.text("a b", 10, 0, 1)
+        image = FrameBuffer(bytearray([0b10100000]), 8, 1, MONO_HLSB)
+        oled.blit(image, 0, 10)
+        rows = sim.display().split("\n")
+
+    assert [rows[y][:4] for y in range(4)] == ["#...", ".#..", "..#.", "...#"]
+    assert rows[0][10:27] == "#######.........#"
+    assert rows[10][:4] == "#.#."
+
+
+def test_framebuffer_scroll():
+    fb = FrameBuffer(bytearray(8), 8, 8, MONO_VLSB)
+    fb.pixel(0, 0, 1)
+    fb.scroll(2, 1)
+
+    assert fb.pixel(2, 1) == 1
+    assert fb.pixel(0, 0) == 1  # scrolled from, so left as it was
+
+
+def test_constant_digital_level(sim):
+    sim.set_digital(din, 1)
+    sim.set_digital(b1, 0)
+    with sim:
+        assert din.value() == 1
+        assert b1.value() == 0
+
+
+def test_temperature_sensor(sim):
+    from machine import ADC
+
+    with sim:
+        assert ADC(4).read_u16() == TEMPERATURE_SENSOR_READING
+
+
+def test_simulation_speed(sim):
+    # a script that redraws the display on every iteration of its main loop
+    sim.set_digital(din, Clock(bpm=120))
+    start = time.perf_counter()
+
+    sim.run("contrib.euclid.EuclideanRhythms", seconds=2)
+
+    assert time.perf_counter() - start < 2
+
+
+class DoubleBufferedDrawer(EuroPiScript):
+    def main(self):
+        from time import sleep
+
+        oled.set_double_buffered(chunk_size=1)
+        x = 0
+        while True:
+            oled.fill_rect(x % 128, 0, 1, 32, 1)
+            oled.show()
+            oled.service()
+            x += 1
+            sleep(0.01)
+
+
+def test_run_flushes_display(sim):
+    try:
+        sim.run(DoubleBufferedDrawer, seconds=0.5)
+        assert not oled.busy
+    finally:
+        oled.set_double_buffered(False)
+
+
+def test_main_restores_working_directory(sim, monkeypatch, capsys):
+    from simulator.__main__ import main
+
+    cwd = os.getcwd()
+    monkeypatch.setattr(
+        sys, "argv", ["simulator", "contrib.harmonic_lfos.HarmonicLFOs", "--seconds", "0.1"]
+    )
+
+    main()
+
+    assert os.getcwd() == cwd
+    assert "virtual seconds" in capsys.readouterr().out
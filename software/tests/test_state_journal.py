@@ -0,0 +1,104 @@
+import os
+from array import array
+
+import pytest
+
+from state_journal import ArrayJournal
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def new_journal(typecode="h", length=8):
+    return ArrayJournal("state", array(typecode, [0] * length), typecode)
+
+
+def test_load_nothing():
+    journal = new_journal()
+    journal.values[0] = 5
+
+    assert not journal.load()
+    assert list(journal.values) == [0] * 8
+
+
+def test_flush_appends_only_changes():
+    journal = new_journal()
+    journal.values[2] = 7
+    journal.mark(2)
+    journal.values[5] = -3
+    journal.mark(5)
+
+    assert journal.flush() == 2
+    assert journal.flush() == 0
+    assert os.path.getsize("state.jnl") == 2 * 4
+    assert not os.path.exists("state.bin")
+
+    journal.values[2] = 8
+    journal.mark(2)
+    assert journal.flush() == 1
+    assert os.path.getsize("state.jnl") == 3 * 4
+
+    loaded = new_journal()
+    assert loaded.load()
+    assert list(loaded.values) == [0, 0, 8, 0, 0, -3, 0, 0]
+    assert loaded.journal_entries == 3
+
+
+def test_compaction():
+    journal = new_journal("f", 4)
+    for step in range(4):
+        journal.values[step] = step / 2
+    journal.mark_range(1, 3)
+    journal.flush()
+    assert not journal.needs_compaction  # 2 entries of 6 bytes, the snapshot has 16
+    journal.mark(3)
+    journal.flush()
+    assert journal.needs_compaction
+
+    journal.compact()
+    assert not os.path.exists("state.jnl")
+    assert os.path.getsize("state.bin") == 5 + 16
+
+    journal.values[3] = 9.5
+    journal.mark(3)
+    journal.flush()
+    loaded = new_journal("f", 4)
+    assert loaded.load()
+    assert list(loaded.values) == [0, 0.5, 1, 9.5]
+
+
+def test_journal_longer_than_a_chunk():
+    journal = new_journal()
+    for value in range(1, 4):  # 24 entries, read in chunks of 8
+        for step in range(8):
+            journal.values[step] = value * step
+        journal.mark_range(0, 8)
+        journal.flush()
+
+    loaded = new_journal()
+    assert loaded.load()
+    assert list(loaded.values) == [3 * step for step in range(8)]
+    assert loaded.journal_entries == 24
+
+
+def test_torn_journal_entry():
+    journal = new_journal()
+    journal.values[1] = 4
+    journal.mark(1)
+    journal.flush()
+    with open("state.jnl", "ab") as file:
+        file.write(b"\x02\x00")  # cut short by a power cut
+
+    loaded = new_journal()
+    assert loaded.load()
+    assert list(loaded.values) == [0, 4, 0, 0, 0, 0, 0, 0]
+    assert not os.path.exists("state.jnl")  # compacted, so that new entries are readable
+
+
+def test_snapshot_of_another_layout_is_ignored():
+    new_journal("h", 8).compact()
+
+    journal = new_journal("h", 4)
+    assert not journal.load()
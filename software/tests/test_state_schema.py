@@ -0,0 +1,141 @@
+from array import array
+from io import BytesIO
+
+import pytest
+
+from state_schema import StateSchema, boolean, fixed, integer, packed_array
+
+
+@pytest.fixture
+def schema():
+    return StateSchema(
+        [
+            integer("step", bits=8, signed=False),
+            integer("offset", default=-3),
+            fixed("swing", default=0.5, scale=100),
+            boolean("running", default=True),
+            packed_array("steps", "B", 4),
+            packed_array("voltages", "f", 3, default=2.5),
+        ]
+    )
+
+
+def save(schema, state):
+    file = BytesIO()
+    schema.write(file, state)
+    file.seek(0)
+    return file
+
+
+def test_default_state(schema):
+    state = schema.default_state()
+
+    assert state["step"] == 0
+    assert state["offset"] == -3
+    assert state["swing"] == 0.5
+    assert state["running"] is True
+    assert list(state["steps"]) == [0] * 4
+    assert list(state["voltages"]) == [2.5] * 3
+
+
+def test_round_trip(schema):
+    state = {
+        "step": 200,
+        "offset": -1000,
+        "swing": 0.333,
+        "running": False,
+        "steps": array("B", [1, 2, 3, 4]),
+        "voltages": [0.5, 1.0, 9.75],  # lists are converted
+    }
+    file = save(schema, state)
+
+    assert len(file.getvalue()) == schema.size == 3 + 6 + 4 + 12
+    loaded = schema.read(file)
+    assert loaded["step"] == 200
+    assert loaded["offset"] == -1000
+    assert loaded["swing"] == 0.33
+    assert loaded["running"] is False
+    assert list(loaded["steps"]) == [1, 2, 3, 4]
+    assert list(loaded["voltages"]) == [0.5, 1.0, 9.75]
+
+
+def test_values_are_clamped(schema):
+    state = schema.default_state()
+    state["step"] = 300
+    state["offset"] = -40000
+    state["swing"] = 1000
+
+    loaded = schema.read(save(schema, state))
+
+    assert loaded["step"] == 255
+    assert loaded["offset"] == -32768
+    assert loaded["swing"] == 327.67
+
+
+def test_read_in_place(schema):
+    saved = schema.default_state()
+    saved["steps"][2] = 7
+    file = save(schema, saved)
+
+    state = schema.default_state()
+    steps = state["steps"]
+    assert schema.read(file, state) is state
+    assert state["steps"] is steps
+    assert steps[2] == 7
+
+
+def test_wrong_array_length(schema):
+    state = schema.default_state()
+    state["steps"] = array("B", [1, 2])
+
+    with pytest.raises(ValueError):
+        schema.write(BytesIO(), state)
+
+
+@pytest.mark.parametrize("data", [b"", b"nonsense", b"ES\x01\x00"])
+def test_bad_data_gives_defaults(schema, data):
+    assert schema.read(BytesIO(data)) == schema.default_state()
+
+
+def test_previous_version(schema):
+    old = StateSchema([integer("step"), packed_array("steps", "B", 2)], version=1)
+    new = StateSchema(
+        [integer("step"), boolean("running", True), packed_array("steps", "B", 4, default=9)],
+        version=2,
+        previous=old,
+    )
+    file = save(old, {"step": 5, "steps": [1, 2]})
+
+    state = new.read(file)
+
+    assert state["step"] == 5
+    assert state["running"] is True
+    assert list(state["steps"]) == [1, 2, 9, 9]
+
+
+def test_unknown_version():
+    old = StateSchema([integer("step")], version=1)
+    new = StateSchema([integer("step", default=1)], version=2)
+
+    assert new.read(save(old, {"step": 5})) == {"step": 1}
+
+
+def test_bad_declarations():
+    with pytest.raises(ValueError):
+        integer("a", bits=12)
+    with pytest.raises(ValueError):
+        StateSchema([integer("a"), boolean("a")])
+    with pytest.raises(ValueError):
+        StateSchema([], version=256)
+
+
+def test_read_into_state_holding_lists(schema):
+    state = schema.default_state()
+    state["steps"] = [1, 2, 3, 4]
+    state["voltages"] = [0.5, 1.0, 9.75]
+    file = save(schema, state)
+
+    loaded = schema.read(file, state)
+
+    assert list(loaded["steps"]) == [1, 2, 3, 4]
+    assert list(loaded["voltages"]) == [0.5, 1.0, 9.75]